@@ -22,8 +22,9 @@ from template import *
 from misc import *
 from profiler import *
 from system import *
+from stats import *
 
-import argparse, glob, re, collections, simplejson, codecs, random
+import argparse, glob, re, collections, simplejson, codecs, random, gzip
 
 '''
 Create the timings table.
@@ -240,22 +241,177 @@ def CreateMethodInfo(results, methodName):
 
   return methodInfo
 
+'''
+Create the speedup and parallel efficiency content of the thread axis.
+
+@param db - The database object.
+@param methodId - The id of the method.
+@return Tuple with the HTML code and the chart ids or None if there are no
+thread results for the method.
+'''
+def CreateScalingContent(db, methodId):
+  curves = {}
+  for libraryId, name, buildId in db.GetLatestBuilds():
+    timings = {}
+    for dataset, threads, time in db.GetMethodThreadResultsForLibrary(buildId,
+        methodId):
+      timings.setdefault(dataset, {})[threads] = time
+
+    curve = ScalingCurve(timings)
+    if curve:
+      curves[name] = curve
+
+  if not curves:
+    return None
+
+  content = ""
+  ids = []
+  threads = sorted(set(n for curve in curves.values() for n, s, e in curve))
+  for column, title in [(1, "Speedup"), (2, "Parallel Efficiency")]:
+    chartInfo = GenerateScalingChart(curves, title, column)
+
+    # Create the table with the values of the chart.
+    header = "".join("<th>" + str(n) + " Threads</th>" for n in threads)
+    table = ""
+    for library, curve in sorted(curves.items()):
+      values = dict((point[0], point[column]) for point in curve)
+      table += "<tr><td>" + library + "</td>"
+      for n in threads:
+        table += "<td>" + ("{0:.2f}".format(values[n]) if n in values
+            else "-") + "</td>"
+      table += "</tr>"
+
+    resultValues = {}
+    resultValues["container"] = chartInfo[1]
+    resultValues["timingHeader"] = header
+    resultValues["timingTable"] = table
+    content += resultsPanel % resultValues
+    ids.append(chartInfo[0])
+
+  return (content, ",".join(ids))
+
+'''
+Create the badge of a fitted scaling exponent, e.g. 'O(n^1.12)' with the
+confidence interval of the exponent.
+
+@param axis - The axis of the exponent ('n' or 'd').
+@param exponent - The fitted exponent.
+@param low - The lower bound of the confidence interval or None.
+@param high - The upper bound of the confidence interval or None.
+@return HTML code of the badge.
+'''
+def ComplexityBadge(axis, exponent, low, high):
+  badge = ('<span class="label label-info">O(' + axis + '<sup>' +
+      "{0:.2f}".format(exponent) + '</sup>)</span>')
+  if low is not None and high is not None:
+    badge += " [{0:.2f}, {1:.2f}]".format(low, high)
+  return badge
+
+'''
+Create the table with the fitted scaling exponents of the complexity mode and
+the runtimes extrapolated to the given number of rows.
+
+@param db - The database object.
+@param methodId - The id of the method.
+@param extrapolate - List of row counts for the extrapolated runtimes.
+@return HTML code or None if there are no complexity results for the method.
+'''
+def CreateComplexityContent(db, methodId, extrapolate):
+  table = ""
+  for libraryId, name, buildId in db.GetLatestBuilds():
+    fits = collections.OrderedDict()
+    for dataset, axis, size, exponent, low, high, intercept in \
+        db.GetMethodComplexityResultsForLibrary(buildId, methodId):
+      fits.setdefault(dataset, {})[axis] = (size, exponent, low, high,
+          intercept)
+
+    for dataset, axes in fits.items():
+      table += "<tr><td>" + name + "</td><td>" + dataset + "</td>"
+      for axis in ["n", "d"]:
+        if axis in axes:
+          size, exponent, low, high, intercept = axes[axis]
+          table += "<td>" + ComplexityBadge(axis, exponent, low, high) + \
+              " (" + axis + "=" + str(size) + ")</td>"
+        else:
+          table += "<td>-</td>"
+
+      for rows in extrapolate:
+        if "n" in axes:
+          size, exponent, low, high, intercept = axes["n"]
+          table += "<td>{0:.6g}s</td>".format(Extrapolate(exponent, intercept,
+              rows))
+        else:
+          table += "<td>-</td>"
+      table += "</tr>"
+
+  if not table:
+    return None
+
+  resultValues = {}
+  resultValues["container"] = ""
+  resultValues["timingHeader"] = "<th>Dataset</th><th>Rows</th>" + \
+      "<th>Columns</th>" + "".join("<th>n=" + "{0:g}".format(rows) + "</th>"
+      for rows in extrapolate)
+  resultValues["timingTable"] = table
+  return resultsPanel % resultValues
+
+'''
+Create the table with the statistics of the measured trials of every dataset,
+derived from the trial results (median, 90th percentile, minimum and median
+absolute deviation of the successful trials).
+
+@param db - The database object.
+@param methodId - The id of the method.
+@return HTML code or None if there are no trial results for the method.
+'''
+def CreateTrialContent(db, methodId):
+  table = ""
+  for libraryId, name, buildId in db.GetLatestBuilds():
+    trials = collections.OrderedDict()
+    for dataset, threads, status, time in \
+        db.GetMethodTrialResultsForLibrary(buildId, methodId):
+      trials.setdefault((dataset, threads), []).append((status, time))
+
+    for (dataset, threads), values in trials.items():
+      times = [time for status, time in values if status == "ok"]
+      failed = [status for status, time in values if status != "ok"]
+
+      table += "<tr><td>" + name + "</td><td>" + dataset + (" (" +
+          str(threads) + " threads)" if threads else "") + "</td>"
+      table += "<td>" + str(len(times)) + "/" + str(len(values)) + "</td>"
+      for value in [Median(times), Percentile(times, 90),
+          min(times) if times else None, MedianAbsoluteDeviation(times)]:
+        table += "<td>" + ("{0:.6f}".format(value) if value is not None
+            else "-") + "</td>"
+      table += "<td>" + (", ".join(sorted(set(failed))) if failed else "ok") \
+          + "</td></tr>"
+
+  if not table:
+    return None
+
+  resultValues = {}
+  resultValues["container"] = ""
+  resultValues["timingHeader"] = "<th>Dataset</th><th>Trials</th>" + \
+      "<th>Median</th><th>P90</th><th>Min</th><th>MAD</th><th>Status</th>"
+  resultValues["timingTable"] = table
+  return resultsPanel % resultValues
+
 '''
 Create the method container with the information from the database.
 
 @param db - The database object.
 @param bootstrapCountb - The number of selections from the metric results.
+@param extrapolate - List of row counts for the extrapolated runtimes of the
+complexity mode.
 @return HTML code which contains the information for the container.
 '''
-def MethodReports(db, bootstrapCount):
+def MethodReports(db, bootstrapCount, extrapolate=[]):
   methodsPage = ""
   numDatasets = 0
 
   # Get the latest builds.
-  libraryIds  = db.GetLibraryIds()
-  buildIds = []
-  for libraryid in libraryIds:
-    buildIds.append((db.GetLatestBuildFromLibary(libraryid[0]), libraryid[1]))
+  latestBuilds = db.GetLatestBuilds()
+  buildIds = [(buildId, name) for libraryId, name, buildId in latestBuilds]
 
   methodGroup = {}
   # Iterate throw all methods and create for each method a new container.
@@ -311,6 +467,9 @@ def MethodReports(db, bootstrapCount):
 
   methodGroup = collections.OrderedDict(sorted(methodGroup.items()))
   collapseGroup = 0
+
+  # The summed timings of every method over all mlpack builds.
+  methodSums = db.GetResultsMethodSums("mlpack")
   for methodName, results in methodGroup.items():
     # Create the container.
     reportValues = {}
@@ -321,10 +480,8 @@ def MethodReports(db, bootstrapCount):
     methodInfo = ""
     memoryContent = ""
 
-    mlpackMemoryId = db.GetLibrary("mlpack_memory")
-    mlpackMemoryBuilId = ""
-    if mlpackMemoryId:
-        mlpackMemoryBuilId = db.GetLatestBuildFromLibary(mlpackMemoryId[0][0])
+    mlpackMemoryBuilId = dict((name, buildId) for libraryId, name, buildId in
+        latestBuilds).get("mlpack_memory", "")
 
     # Variables to count the status informations.
     failureCount = 0
@@ -379,7 +536,7 @@ def MethodReports(db, bootstrapCount):
       # Generate a "unique" name for the metric line chart.
       lineChartNameMetric = "img/line_" + chartHash + "_metric.png"
 
-      res = db.GetResultsMethodSum("mlpack", methodId)
+      res = methodSums.get(methodId)
       if res:
         build, methodResultsSum = res
       else:
@@ -523,6 +680,39 @@ def MethodReports(db, bootstrapCount):
 
       resultPanel += resultsTemplate % groupPanelTiming
 
+      # Create the speedup and efficiency charts of the thread axis.
+      scalingContent = CreateScalingContent(db, methodId)
+      if scalingContent:
+        groupPanelScaling = {}
+        groupPanelScaling["nameID"] = chartHash + "s"
+        groupPanelScaling["name"] = "Thread Scaling: " + (parameters if
+            parameters else "None")
+        groupPanelScaling["content"] = scalingContent[0]
+        groupPanelScaling["containerID"] = scalingContent[1]
+        resultPanel += resultsTemplate % groupPanelScaling
+
+      # Create the statistics of the measured trials.
+      trialContent = CreateTrialContent(db, methodId)
+      if trialContent:
+        groupPanelTrials = {}
+        groupPanelTrials["nameID"] = chartHash + "t"
+        groupPanelTrials["name"] = "Trials: " + (parameters if parameters
+            else "None")
+        groupPanelTrials["content"] = trialContent
+        groupPanelTrials["containerID"] = ""
+        resultPanel += resultsTemplate % groupPanelTrials
+
+      # Create the scaling exponents of the complexity mode.
+      complexityContent = CreateComplexityContent(db, methodId, extrapolate)
+      if complexityContent:
+        groupPanelComplexity = {}
+        groupPanelComplexity["nameID"] = chartHash + "c"
+        groupPanelComplexity["name"] = "Complexity: " + (parameters if
+            parameters else "None")
+        groupPanelComplexity["content"] = complexityContent
+        groupPanelComplexity["containerID"] = ""
+        resultPanel += resultsTemplate % groupPanelComplexity
+
       if datasetNamesMetric:
         groupPanelMetric["containerID"] = groupPanelMetric["containerID"][:-1]
         resultPanelMetric += resultsTemplate % groupPanelMetric
@@ -717,6 +907,155 @@ def ShiftReports():
   if CheckFileAvailable(fileName):
     os.rename(fileName, "reports/index_1.html")
 
+'''
+Write the given data as gzip compressed JSON file. The file is written to a
+temporary file first, so the reports never fetch a partial shard.
+
+@param fileName - The name of the shard file.
+@param data - The data of the shard.
+'''
+def WriteShard(fileName, data):
+  with gzip.open(fileName + ".tmp", "wb") as fid:
+    fid.write(simplejson.dumps(data, separators=(",", ":")).encode("UTF-8"))
+  os.rename(fileName + ".tmp", fileName)
+
+'''
+Map the given method or dataset names to shard names. The names are used as file
+names, so the characters which aren't safe in an url or a file name are
+replaced.
+
+@param keys - The names to map.
+@return Ordered dictionary with the shard name of every name.
+'''
+def ShardNames(keys):
+  names = collections.OrderedDict()
+  for key in sorted(keys):
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+    while name in names.values():
+      name += "_"
+    names[key] = name
+  return names
+
+'''
+Export the results of the database as gzip compressed JSON shards for the
+views of the reports, so the reports don't have to load the whole database.
+The index shard lists the libraries, the methods with their parameters and the
+shard name of every method and every dataset; for every method there is a
+runtime shard (latest results, also used by the datasize view), a historical
+shard (results of all builds) and a metric shard (latest and historical
+metrics). The method shards are keyed by the parameters and the dataset name.
+For every dataset there is a dataset shard with the latest results and metrics
+of all methods, used by the dataset and the metric comparison views.
+
+@param db - The database object.
+@param path - The directory of the shards.
+'''
+def ExportShards(db, path="reports/data/"):
+  views = ["runtime", "historical", "metric"]
+  CreateDirectoryStructure([os.path.join(path, view) for view in views +
+      ["dataset"]])
+
+  index = {"libraries": [library[1] for library in db.GetLibraryIds()],
+      "runtime": collections.OrderedDict(),
+      "metric": collections.OrderedDict(), "shards": {},
+      "datasets": collections.OrderedDict()}
+  shards = dict((view, collections.OrderedDict()) for view in views)
+  datasets = collections.OrderedDict()
+
+  for row in db.GetLatestResults():
+    method, parameters = row[0], row[1]
+    shard = shards["runtime"].setdefault(method, collections.OrderedDict())
+    shard.setdefault(parameters, []).append(list(row[2:]))
+
+    # (method, parameters, library, time, var)
+    datasets.setdefault(row[6], {"runtime": [], "metric": []})[
+        "runtime"].append([method, parameters, row[5], row[2], row[3]])
+
+  for row in db.GetResultsHistory():
+    method, parameters, dataset = row[0], row[1], row[2]
+    shard = shards["historical"].setdefault(method, collections.OrderedDict())
+    shard.setdefault(parameters, collections.OrderedDict()).setdefault(
+        dataset, []).append(list(row[3:]))
+
+  for row in db.GetLatestMetrics():
+    method, parameters = row[0], row[1]
+    shard = shards["metric"].setdefault(method, collections.OrderedDict())
+    shard.setdefault(parameters, {"latest": [], "historical":
+        collections.OrderedDict()})["latest"].append(list(row[2:]))
+
+    # (method, parameters, library, metric)
+    datasets.setdefault(row[5], {"runtime": [], "metric": []})[
+        "metric"].append([method, parameters, row[4], row[2]])
+
+  for row in db.GetMetricsHistory():
+    method, parameters, dataset = row[0], row[1], row[2]
+    if parameters not in shards["metric"].get(method, {}):
+      continue
+    shards["metric"][method][parameters]["historical"].setdefault(dataset,
+        []).append(list(row[3:]))
+
+  # The parameters of every method with the number of libraries.
+  for method, shard in shards["runtime"].items():
+    index["runtime"][method] = [[parameters, len(set(result[3] for result in
+        results))] for parameters, results in shard.items()]
+
+  for method, shard in shards["metric"].items():
+    index["metric"][method] = [[parameters, len(set(result[2] for result in
+        results["latest"]))] for parameters, results in shard.items()]
+
+  names = ShardNames(set().union(*[shards[view].keys() for view in views]))
+  for method, name in names.items():
+    index["shards"][method] = name
+
+    for view in views:
+      if method in shards[view]:
+        WriteShard(os.path.join(path, view, name + ".json.gz"),
+            shards[view][method])
+
+  # The index lists the shard name of every dataset and whether the dataset
+  # has metrics.
+  names = ShardNames(datasets.keys())
+  for dataset, name in names.items():
+    index["datasets"][dataset] = [name, len(datasets[dataset]["metric"]) > 0]
+    WriteShard(os.path.join(path, "dataset", name + ".json.gz"),
+        datasets[dataset])
+
+  WriteShard(os.path.join(path, "index.json.gz"), index)
+
+'''
+Apply the retention policy to the database. The records of the dropped builds
+are written to a compressed archive before they are removed, afterwards the
+database is compacted.
+
+@param db - The database object.
+@param retention - Dictionary with the retention settings (keep, period,
+archive).
+'''
+def ApplyRetention(db, retention):
+  period = retention["period"]
+  if not period or str(period).lower() == "none":
+    period = None
+  elif period not in ["week", "month"]:
+    Log.Fatal("Unknown retention period: " + str(period) + " (week, month).")
+    return
+
+  expired = db.GetExpiredBuilds(retention["keep"], period)
+  if not expired:
+    return
+
+  fileName = None
+  if retention["archive"]:
+    CreateDirectoryStructure([retention["archive"]])
+    fileName = os.path.join(retention["archive"], "benchmark-" +
+        datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".jsonl.gz")
+    db.ArchiveBuilds(expired, fileName)
+
+  db.DeleteBuilds(expired)
+  db.Compact()
+
+  Log.Info("Removed " + str(len(expired)) + " builds from the database" +
+      (", archived in " + fileName if fileName else "") + ".")
+
 '''
 Create the new report.
 
@@ -727,6 +1066,8 @@ def Main(configfile):
   database = "reports/benchmark.db"
   keepReports = 3
   bootstrapCount = 10
+  extrapolate = []
+  retention = None
 
   # Create the folder structure.
   CreateDirectoryStructure(["reports/img",
@@ -751,11 +1092,22 @@ def Main(configfile):
         version = value
       elif key == "bootstrap":
         bootstrapCount = value
+      elif key == "complexity" and isinstance(value, dict):
+        extrapolate = [float(rows) for rows in value.get("extrapolate", [])]
+      elif key == "retention" and value:
+        # Default values of the retention policy.
+        retention = {"keep": 50, "period": "month",
+            "archive": "reports/archive/"}
+        retention.update(value if isinstance(value, dict) else {})
 
   # Create a database object and create the necessary tables.
   db = Database(database)
   db.CreateTables()
 
+  # Remove the old builds from the database.
+  if retention:
+    ApplyRetention(db, retention)
+
   # Rename the old index files.
   ShiftReports()
 
@@ -766,11 +1118,25 @@ def Main(configfile):
   reportValues = {}
   chartInfoTop = CreateTopLineChart(db)
 
-  reportValues["CPUModel"] =  SystemInfo.GetCPUModel()
-  reportValues["Distribution"] =  SystemInfo.GetDistribution()
-  reportValues["Platform"] =  SystemInfo.GetPlatform()
-  reportValues["Memory"] =  SystemInfo.GetMemory()
-  reportValues["CPUCores"] =  SystemInfo.GetCPUCores()
+  # Show the machine of the latest builds, the reports may be created on
+  # another machine.
+  machine = None
+  for libraryId, name, buildId in db.GetLatestBuilds():
+    machine = machine or db.GetBuildMachine(buildId)
+
+  if machine:
+    reportValues["CPUModel"] = str(machine["model"])
+    reportValues["Distribution"] = str(machine["distribution"])
+    reportValues["Platform"] = str(machine["platform"])
+    reportValues["Memory"] = (str(machine["memory"] / 1024.0) + ' GB' if
+        machine["memory"] else 'N/A')
+    reportValues["CPUCores"] = str(machine["cpus"])
+  else:
+    reportValues["CPUModel"] =  SystemInfo.GetCPUModel()
+    reportValues["Distribution"] =  SystemInfo.GetDistribution()
+    reportValues["Platform"] =  SystemInfo.GetPlatform()
+    reportValues["Memory"] =  SystemInfo.GetMemory()
+    reportValues["CPUCores"] =  SystemInfo.GetCPUCores()
 
   reportValues["LibraryInformation"] = ""
   for i, libary in enumerate(libraries):
@@ -781,9 +1147,12 @@ def Main(configfile):
 
   reportValues["container"] = chartInfoTop[1]
   reportValues["pagination"] = NewPagination()
-  reportValues["methods"] = MethodReports(db, bootstrapCount)
+  reportValues["methods"] = MethodReports(db, bootstrapCount, extrapolate)
   reportValues["scripts"] = '<script src="' + chartInfoTop[0] + '"></script>'
 
+  # Export the results for the views of the reports.
+  ExportShards(db)
+
   template = pageTemplate % reportValues
 
   # Write the new index.html file.
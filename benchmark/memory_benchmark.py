@@ -18,6 +18,7 @@ from log import *
 from loader import *
 from parser import *
 from convert import *
+from cache import *
 from misc import *
 from database import *
 
@@ -29,9 +30,11 @@ Return a list with modified dataset.
 
 @param dataset - Datasets to be modified.
 @param format - List of file formats to be converted to.
+@param cache - The conversion cache, if set the converted datasets are taken
+from the cache and aren't listed as temporary datasets.
 @return List of modified datasets.
 '''
-def GetDataset(dataset, format):
+def GetDataset(dataset, format, cache=None):
   # Check if the given dataset is a list or a single dataset.
   if not isinstance(dataset, str):
     datasetList = []
@@ -45,9 +48,12 @@ def GetDataset(dataset, format):
         datasetList.append(mdata)
       else:
         # Convert the dataset into the new format.
-        convert = Convert(data, format[0])
-        datasetList.append(convert.modifiedDataset)
-        modifiedList.append(convert.modifiedDataset)
+        if cache:
+          datasetList.append(cache.Get(data, format[0]))
+        else:
+          convert = Convert(data, format[0])
+          datasetList.append(convert.modifiedDataset)
+          modifiedList.append(convert.modifiedDataset)
   else:
     datasetList = ""
     modifiedList = ""
@@ -59,9 +65,12 @@ def GetDataset(dataset, format):
       datasetList = mdataset
     else:
       # Convert the dataset into the new format.
-      convert = Convert(dataset, format[0])
-      datasetList = convert.modifiedDataset
-      modifiedList = convert.modifiedDataset
+      if cache:
+        datasetList = cache.Get(dataset, format[0])
+      else:
+        convert = Convert(dataset, format[0])
+        datasetList = convert.modifiedDataset
+        modifiedList = convert.modifiedDataset
 
   return (datasetList, modifiedList)
 
@@ -78,6 +87,7 @@ def Main(configfile, blocks, log, methodBlocks, update):
   # Benchmark settings.
   timeout = 23000
   database = "reports/benchmark.db"
+  conversionCacheSize = 20
 
   # Create the folder structure.
   CreateDirectoryStructure(["reports/img", "reports/etc"])
@@ -93,6 +103,11 @@ def Main(configfile, blocks, log, methodBlocks, update):
         timeout = value
       if key == "database":
         database = value
+      if key == "conversionCacheSize":
+        conversionCacheSize = value
+
+  # The converted datasets are kept in the conversion cache.
+  conversionCache = ConversionCache.Default(conversionCacheSize)
 
   # Temporary datastructures for the current build.
   build = {}
@@ -157,11 +172,10 @@ def Main(configfile, blocks, log, methodBlocks, update):
 
                 # Logging: Create a new dataset record fot this dataset.
                 if log:
-                  datasetId = db.GetDataset(datasetName)
-                  datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
+                  datasetId = GetDatasetId(db, dataset)
 
                 Log.Info("Dataset: " + datasetName)
-                modifiedDataset = GetDataset(dataset, format)
+                modifiedDataset = GetDataset(dataset, format, conversionCache)
 
                 try:
                   instance = methodCall(modifiedDataset[0], timeout=timeout,
@@ -0,0 +1,76 @@
+'''
+  @file merge_databases.py
+  @author Marcus Edel
+
+  Merge the benchmark databases of several machines into one database.
+'''
+
+import os, sys, inspect
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from parser import *
+from log import *
+from database import *
+
+import argparse
+
+'''
+Merge the given databases into the database of the configuration file.
+
+@param configfile - The configuration file with the database settings.
+@param databases - List of the databases which are imported, either the path
+of the database or 'machine=path'. Without a machine the name of the database
+file is used as machine of the builds.
+'''
+def Main(configfile, databases):
+  # Default database settings.
+  database = "reports/benchmark.db"
+
+  # Read the config.
+  config = Parser(configfile, verbose=False)
+  streamData = config.StreamMerge()
+
+  # Read the general block and set the attributes.
+  if "general" in streamData:
+    for key, value in streamData["general"]:
+      if key == "database":
+        database = value
+
+  db = Database(database)
+  db.CreateTables()
+
+  for source in databases:
+    machine, path = source.split("=", 1) if "=" in source else (
+        os.path.splitext(os.path.basename(source))[0], source)
+
+    if not os.path.isfile(path):
+      Log.Fatal("Database " + path + " not found.")
+      continue
+
+    if os.path.realpath(path) == os.path.realpath(database):
+      Log.Warn("Skip " + path + ", the database can't be merged into itself.")
+      continue
+
+    counts = db.MergeDatabase(path, machine)
+    Log.Info("Merged " + path + " (" + machine + "): " + ", ".join(
+        str(counts.get(table, 0)) + " " + table for table in ["builds",
+        "results", "metrics", "bootstrap", "memory"]) + ".")
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="""Merge the benchmark databases
+      of several machines into the database of the given config.""")
+  parser.add_argument('-c','--config', help='Configuration file name.',
+      required=True)
+  parser.add_argument('-d','--databases', help="""The databases to merge,
+      either the path or machine=path.""", required=True, nargs='+')
+
+  args = parser.parse_args()
+
+  if args:
+    Main(args.config, args.databases)
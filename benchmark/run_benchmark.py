@@ -19,8 +19,18 @@ from system import *
 from loader import *
 from parser import *
 from convert import *
+from cache import *
 from misc import *
 from database import *
+from scheduler import *
+from job_queue import *
+from worker import *
+from broker import *
+from stats import *
+from result_cache import *
+from subsample import *
+
+import timer
 
 try:
   from irc_bot import *
@@ -29,8 +39,12 @@ except ImportError:
   irc_available = False
 
 import random
+import socket
+import shutil
+import uuid
 import argparse
 import datetime
+import tempfile
 import simplejson
 
 
@@ -45,15 +59,20 @@ def SystemInformation():
   Log.Info("Platform: " + SystemInfo.GetPlatform())
   Log.Info("Memory: " + SystemInfo.GetMemory())
   Log.Info("CPU Cores: " + SystemInfo.GetCPUCores())
+  Log.Info("Kernel: " + str(SystemInfo.GetFingerprint()["kernel"]))
+  Log.Info("Governor: " + str(SystemInfo.GetFingerprint()["governor"]))
+  Log.Info("Fingerprint: " + SystemInfo.GetFingerprint()["id"])
 
 '''
 Return a list with modified datasets.
 
 @param dataset - Datasets to be modified.
 @param format - List of file formats to be converted to.
+@param cache - The conversion cache, if set the converted datasets are taken
+from the cache and aren't listed as temporary datasets.
 @return List of modified datasets.
 '''
-def GetDataset(dataset, format):
+def GetDataset(dataset, format, cache=None):
   # Check if the given dataset is a list or a single dataset.
   if not isinstance(dataset, str):
     datasetList = []
@@ -67,9 +86,12 @@ def GetDataset(dataset, format):
         datasetList.append(mdata)
       else:
         # Convert the dataset in the given format.
-        convert = Convert(data, format[0])
-        datasetList.append(convert.modifiedDataset)
-        modifiedList.append(convert.modifiedDataset)
+        if cache:
+          datasetList.append(cache.Get(data, format[0]))
+        else:
+          convert = Convert(data, format[0])
+          datasetList.append(convert.modifiedDataset)
+          modifiedList.append(convert.modifiedDataset)
   else:
     datasetList = ""
     modifiedList = ""
@@ -81,9 +103,12 @@ def GetDataset(dataset, format):
       datasetList = mdataset
     else:
       # Convert the dataset in the given format.
-      convert = Convert(dataset, format[0])
-      datasetList = convert.modifiedDataset
-      modifiedList = convert.modifiedDataset
+      if cache:
+        datasetList = cache.Get(dataset, format[0])
+      else:
+        convert = Convert(dataset, format[0])
+        datasetList = convert.modifiedDataset
+        modifiedList = convert.modifiedDataset
 
   return (datasetList, modifiedList)
 
@@ -103,6 +128,373 @@ def CountLibrariesDatasets(libraries):
 
   return len(datasetList)
 
+'''
+Run the benchmark tasks of a single cell. A cell is a (method, options,
+library, dataset) combination which is independent from all other cells, so
+the cells can run concurrently.
+
+@param cell - Dictionary which contains the cell settings.
+@return Dictionary which contains the results of the cell or None if the
+script couldn't be loaded.
+'''
+def RunCell(cell):
+  script = cell["script"]
+
+  Log.Info("Method: " + cell["method"] + ", Library: " + cell["library"] +
+      ", Dataset: " + cell["datasetName"])
+
+  # Load the script.
+  try:
+    module = Loader.ImportModuleFromPath(script)
+    methodCall = getattr(module, cell["method"])
+  except Exception as e:
+    Log.Fatal("Could not load the script: " + script)
+    Log.Fatal("Exception: " + str(e))
+    return None
+
+  # Scripts which measure in-process through timer.timeout load the datasets
+  # in the timed process, so publish the datasets once in shared memory.
+  inProcess = getattr(module, "timeout", None) is timer.timeout
+
+  published = []
+  if inProcess:
+    datasets = cell["modifiedDataset"]
+    for dataset in [datasets] if isinstance(datasets, str) else datasets:
+      if os.path.splitext(dataset)[1] in [".csv", ".txt"]:
+        try:
+          published.append(DatasetBroker.Acquire(dataset))
+        except Exception as e:
+          Log.Warn("Could not publish the dataset: " + dataset)
+
+  # The thread settings are read when the libraries are imported, so the
+  # in-process scripts of the thread axis always run in a new worker for
+  # every thread count.
+  try:
+    return RunCellTasks(cell, methodCall, inProcess and (cell["warmWorkers"]
+        or bool(cell["threads"])))
+  finally:
+    for name in published:
+      DatasetBroker.Release(name)
+
+'''
+Run the timing trials of a cell.
+
+@param cell - Dictionary which contains the cell settings.
+@param instance - The instance of the method class.
+@param warm - If True the trials run in the warm worker of the library.
+@param threads - The thread count of the trials or None if the thread settings
+are inherited.
+@return Tuple with the measured time and the resource usage of every trial.
+'''
+def RunTrials(cell, instance, warm, threads=None):
+  # In the adaptive mode the trials continue until the confidence interval of
+  # the median is narrow enough, or the trial limit or the time budget of the
+  # cell is reached.
+  adaptive = cell["adaptive"]
+  maxTrials = adaptive["maxTrials"] if adaptive else cell["trials"]
+  start = datetime.datetime.now()
+
+  time = []
+  usage = []
+  for trial in range(maxTrials):
+    # Don't report the usage of an earlier trial or cell (e.g. of the previous
+    # cell of a worker), if the trial doesn't measure in-process.
+    timer.lastUsage = None
+    before = timer.ResourceUsage()
+    try:
+      if warm:
+        time.append(WorkerPool.Call(cell["library"], cell["script"],
+            cell["method"], cell["modifiedDataset"], "RunTiming",
+            cell["options"], cell["timeout"], threads))
+      else:
+        time.append(instance.RunTiming(cell["options"]))
+
+      # Scripts which measure in-process report the resource usage of the
+      # timed region, for the other scripts (e.g. external binaries) use the
+      # usage of the children waited for during the trial.
+      usage.append(dict(timer.lastUsage or timer.UsageDifference(before,
+          timer.ResourceUsage())))
+
+      # Method unsuccessful.
+      if sum(time) < 0:
+        break
+    except Exception as e:
+      Log.Fatal("Exception: " + str(e))
+
+    if adaptive and len(time) >= adaptive["minTrials"]:
+      elapsed = (datetime.datetime.now() - start).total_seconds()
+      if (IsMedianStable(time, adaptive["width"]) or
+          elapsed >= adaptive["budget"]):
+        break
+
+  return (time, usage)
+
+'''
+Measure the cell on geometric subsamples of the rows and the columns of the
+dataset and fit the scaling exponents. The rows are subsampled in the first
+dataset file (e.g. the train set), the columns only if the cell has a single
+dataset file. The subsamples grow until a size fails or times out.
+
+@param cell - Dictionary which contains the cell settings.
+@param methodCall - The method class of the script.
+@param warm - If True the trials run in the warm worker of the library.
+@param time - The measured time of every trial on the full dataset.
+@param threads - The thread count of the measured time; the subsamples run
+with the same thread count, so all points of the fit share the settings.
+@return List with the fitted exponent and the measured points of every axis.
+'''
+def RunComplexity(cell, methodCall, warm, time, threads=None):
+  settings = cell["complexity"]
+  datasets = cell["modifiedDataset"]
+  single = isinstance(datasets, str)
+  dataset = datasets if single else datasets[0]
+
+  rows, columns = DatasetShape(dataset)
+  axes = [("n", rows, 10)]
+  if single and settings["columns"]:
+    axes.append(("d", columns, 1))
+
+  cores = []
+  if threads and hasattr(os, "sched_getaffinity"):
+    cores = sorted(os.sched_getaffinity(0))
+  previous = Scheduler.SetThreads(threads, cores) if threads else None
+
+  directory = tempfile.mkdtemp(prefix="benchmark_complexity_")
+  results = []
+  try:
+    for axis, size, minimum in axes:
+      points = [(size, Median(time))]
+      for subsize in SubsampleSizes(size, settings["steps"],
+          settings["factor"], minimum):
+        Log.Info("Complexity: " + axis + "=" + str(subsize))
+
+        # Keep the file name, the scripts derive names from the dataset.
+        fileName = os.path.join(directory, axis + str(subsize),
+            os.path.basename(dataset))
+        CreateDirectoryStructure([os.path.dirname(fileName)])
+        Subsample(dataset, subsize if axis == "n" else rows,
+            subsize if axis == "d" else None, fileName)
+
+        subDatasets = fileName if single else [fileName] + datasets[1:]
+        try:
+          instance = methodCall(subDatasets, timeout=cell["timeout"],
+              verbose=False)
+          subTime, usage = RunTrials(dict(cell, modifiedDataset=subDatasets),
+              instance, warm, threads)
+        except Exception as e:
+          Log.Fatal("Exception: " + str(e))
+          break
+
+        if not subTime or sum(subTime) < 0:
+          break
+        points.append((subsize, Median(subTime)))
+
+      fit = LogLogFit(points)
+      if fit:
+        results.append({"axis": axis, "size": size, "points": sorted(points),
+            "exponent": fit[0], "low": fit[1], "high": fit[2],
+            "intercept": fit[3]})
+  finally:
+    shutil.rmtree(directory, ignore_errors=True)
+    if previous is not None:
+      Scheduler.ResetThreads(previous, cores)
+
+  return results
+
+'''
+Run the timing, metric and bootstrap tasks of a cell.
+
+@param cell - Dictionary which contains the cell settings.
+@param methodCall - The method class of the script.
+@param warm - If True the trials run in the warm worker of the library
+instead of a new process for every trial.
+@return Dictionary which contains the results of the cell or None if the
+method couldn't be created.
+'''
+def RunCellTasks(cell, methodCall, warm):
+  method = cell["method"]
+  options = cell["options"]
+  script = cell["script"]
+  tasks = cell["tasks"]
+  timeout = cell["timeout"]
+
+  try:
+    instance = methodCall(cell["modifiedDataset"], timeout=timeout,
+        verbose=False)
+  except Exception as e:
+    Log.Fatal("Could not call the constructor: " + script)
+    Log.Fatal("Exception: " + str(e))
+    return None
+
+  result = {"time": None, "metrics": None, "bootstrap": None}
+
+  # Some script define a method description.
+  result["description"] = getattr(instance, "description", None)
+
+  if 'timing' in tasks:
+    if cell["threads"]:
+      # Measure the cell for every thread count on the cores of the cell, the
+      # last thread count is the main result of the cell.
+      cores = []
+      if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+
+      result["threads"] = []
+      for threads in cell["threads"]:
+        Log.Info("Threads: " + str(threads))
+        previous = Scheduler.SetThreads(threads, cores)
+        try:
+          time, usage = RunTrials(cell, instance, warm, threads)
+        finally:
+          Scheduler.ResetThreads(previous, cores)
+
+        result["threads"].append({"threads": threads, "time": time,
+            "usage": usage})
+    else:
+      time, usage = RunTrials(cell, instance, warm)
+
+    result["time"] = time
+    result["usage"] = usage
+
+    # Fit the scaling exponents if the complexity mode is enabled, the time
+    # of the full dataset is the time of the last thread count.
+    if cell["complexity"] and time and sum(time) >= 0:
+      result["complexity"] = RunComplexity(cell, methodCall, warm, time,
+          cell["threads"][-1] if cell["threads"] else None)
+
+  if 'metric' in tasks:
+    try:
+      result["metrics"] = instance.RunMetrics(options)
+    except Exception as e:
+      Log.Fatal("Exception: " + str(e))
+
+  if 'bootstrap' in tasks:
+    bootstrap_metrics = {}
+
+    # Start bootstrapping for this method.
+    bootstrapCounter = 0
+    for i in range(cell["bootstrap"]):
+      instance = methodCall(cell["modifiedDataset"], timeout=timeout,
+          verbose=False)
+
+      # Get the metric results for the specified method.
+      metrics = instance.RunMetrics(options)
+
+      # Merge the obtained metrics with the existing.
+      if metrics:
+        bootstrapCounter += 1
+        bootstrap_metrics = { m: metrics.get(m, 0) +
+                              bootstrap_metrics.get(m, 0)
+                              for m in set(metrics) }
+
+    # Normalize each obtained metric.
+    for m in bootstrap_metrics:
+      bootstrap_metrics[m] = float("{0:.6f}".format
+                                   (round(bootstrap_metrics[m] /
+                                    bootstrapCounter, 5)))
+
+    result["bootstrap"] = bootstrap_metrics
+
+  return result
+
+'''
+Get the time label of the measured trials of a cell.
+
+@param cell - Dictionary which contains the cell settings.
+@param time - The measured time of every trial.
+@return The averaged time or the failure label.
+'''
+def TimeLabel(cell, time):
+  if sum(time) == -2:
+    # Timout failure.
+    return ">" + str(cell["timeout"])
+  elif sum(time) < 0:
+    # Exception.
+    return "failure"
+  else:
+    # Measured time, the adaptive mode runs a variable number of trials.
+    trials = len(time) if cell["adaptive"] else cell["trials"]
+    return "{0:.6f}".format(sum(time) / trials)
+
+'''
+Run a cell claimed from the queue of a coordinator. The converted dataset of
+the coordinator isn't available on every host, so the dataset is converted
+again if the file is missing; the conversion cache of the worker uses the disk
+budget of the coordinator's config.
+
+@param cell - Dictionary which contains the cell settings.
+@return Dictionary which contains the results of the cell.
+'''
+def RunRemoteCell(cell):
+  modified = (cell["modifiedDataset"], "")
+  datasets = modified[0]
+  for dataset in [datasets] if isinstance(datasets, str) else datasets:
+    if not os.path.isfile(dataset):
+      modified = GetDataset(cell["dataset"], cell["format"],
+          ConversionCache.Default(cell["conversionCacheSize"]))
+      cell["modifiedDataset"] = modified[0]
+      break
+
+  try:
+    result = RunCell(cell)
+  finally:
+    RemoveDataset(modified[1])
+
+  # The coordinator stores the results of other machines in separate builds.
+  if result:
+    result["fingerprint"] = SystemInfo.GetFingerprint()
+    result["machine"] = socket.gethostname()
+  return result
+
+'''
+Start a worker which runs the cells of a coordinator until the coordinator is
+done.
+
+@param address - The address of the coordinator, 'host:port'.
+'''
+def Work(address):
+  Coordinator.Work(address, RunRemoteCell)
+  WorkerPool.Shutdown()
+  DatasetBroker.Cleanup()
+
+'''
+Get the build whose results are updated, that is the latest build of the
+library. If new is set the latest build is copied into a new build first.
+
+@param db - The database.
+@param libraryId - The id of the library.
+@param new - Copy the latest build before the results are updated.
+@return The id of the build or None if the library has no build.
+'''
+def GetUpdateBuild(db, libraryId, new):
+  buildId = db.GetLatestBuildFromLibary(libraryId)[0][0]
+  if buildId > 0 and new:
+    newBuildId = db.NewBuild(libraryId)
+    db.CopyLatestBuildFromLibary(buildId, newBuildId)
+    buildId = newBuildId
+
+  return buildId if buildId > 0 else None
+
+'''
+Check if a cell of a resumed build has to run. A finished cell is skipped, the
+partial records of a cell that was interrupted are removed, so the cell runs
+again.
+
+@param db - The database.
+@param buildId - The id of the resumed build.
+@param libraryId - The id of the library.
+@param datasetId - The id of the dataset.
+@param methodId - The id of the method.
+@param tasks - The tasks of the cell.
+@return True if the cell has to run.
+'''
+def ResumeCell(db, buildId, libraryId, datasetId, methodId, tasks):
+  if db.IsCellFinished(buildId, libraryId, datasetId, methodId, tasks):
+    return False
+
+  db.DeleteCellResults(buildId, libraryId, datasetId, methodId)
+  return True
+
 '''
 Start the main benchmark routine. The method shows some DEBUG information and
 prints a runtime information table.
@@ -112,23 +504,42 @@ prints a runtime information table.
 @param log - If True save the reports otherwise use stdout and print the reports.
 @param methodBlocks - Run only the specified methods.
 @param update - Update the records in the database.
+@param watchFiles - Run only the blocks for the specified files.
+@param new - Copy the latest build before the results are updated.
+@param jobs - The number of cells to run concurrently.
+@param coresPerCell - The number of cores reserved for every cell.
+@param resume - Continue the latest unfinished build of every library and
+skip the finished cells.
+@param force - Measure all cells, even if there is a cached result.
+@param coordinator - If set, the address ('host:port') of the job queue
+server; the cells are run by the connected workers instead of this process.
 '''
-def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
+def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
+    jobs=1, coresPerCell=1, resume=False, force=False, coordinator=None):
   # Benchmark settings.
   timeout = 23000
   database = "reports/benchmark.db"
 
   bootstrapCount = 10
+  warmWorkers = True
+  adaptive = None
+  cacheSettings = {"maxAge": 7}
+  threadCounts = None
+  conversionCacheSize = 20
+  complexity = None
+  queueSettings = {"path": "reports/queue.db", "leaseTime": 300,
+      "reset": False}
 
   watchFiles = watchFiles.split()
 
+  if resume and (not log or update):
+    Log.Warn("The resume mode needs the LOG flag and can't be combined with "
+        + "the UPDATE flag, start a new build.")
+    resume = False
+
   # Create the folder structure.
   CreateDirectoryStructure(["reports/img", "reports/etc"])
 
-  #Create the bootstrapped method dictionary which will contain the
-  #normalized values of all metrics for all methods
-  bootstrapped_method_dict = {}
-
   # Read the config.
   config = Parser(configfile, verbose=False)
   streamData = config.StreamMerge()
@@ -145,12 +556,44 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
         bootstrapCount = value
       if key == "irc":
         ircData = value
+      if key == "warmWorkers":
+        warmWorkers = value
+      if key == "adaptive" and value:
+        # Default values of the adaptive trial mode.
+        adaptive = {"width": 0.05, "minTrials": 5, "maxTrials": 30,
+            "budget": 3600}
+        adaptive.update(value if isinstance(value, dict) else {})
+      if key == "conversionCacheSize":
+        conversionCacheSize = value
+      if key == "threads" and value:
+        threadCounts = value if isinstance(value, list) else [value]
+      if key == "complexity" and value:
+        # Default values of the complexity mode.
+        complexity = {"methods": [], "steps": 4, "factor": 2,
+            "columns": True}
+        complexity.update(value if isinstance(value, dict) else {})
+      if key == "queue" and value:
+        queueSettings.update(value)
+      if key == "resultCache":
+        cacheSettings = None
+        if value:
+          # Default values of the result cache.
+          cacheSettings = {"maxAge": 7}
+          cacheSettings.update(value if isinstance(value, dict) else {})
 
   # Create database connection if the user asked for to save the reports.
+  resultCache = None
   if log:
     db = Database(database)
     db.CreateTables()
 
+    # Queue the records and commit them once a method block is done, so the
+    # timed runs don't wait for the disk.
+    db.StartWriter()
+
+    if cacheSettings:
+      resultCache = ResultCache(db, cacheSettings["maxAge"])
+
   if irc_available and ircData:
     ircBOT = IRCBot(ircData[0], ircData[1], ircData[2])
     watchMessages = []
@@ -159,8 +602,23 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
   if blocks:
     blocks = blocks.split(",")
 
-  # Temporary datastructures for the current build.
+  # Temporary datastructures for the current build. The builds of this run
+  # share the run id, also the builds of the workers on other machines.
   build = {}
+  buildPrevious = {}
+  runs = {}
+  run = uuid.uuid4().hex
+
+  # Converted datasets, shared by all cells of this run. The converted files
+  # are kept in the conversion cache for the next runs.
+  modifiedDatasets = {}
+  conversionCache = ConversionCache.Default(conversionCacheSize)
+
+  # The result tables (one for every method and option combination) and the
+  # cells to run.
+  groups = []
+  cells = []
+  cachedCells = []
 
   # Iterate through all libraries.
   for method, sets in streamData.items():
@@ -171,6 +629,7 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
       for options, libraries in sets.items():
         Log.Info("Options: " + (options if options != "" else "None"))
 
+        methodId = None
         if log:
           methodId = db.GetMethod(method, options)
           methodId = methodId[0][0] if methodId else db.NewMethod(method,
@@ -185,20 +644,24 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
         # Count the datasets.
         datasetCount = CountLibrariesDatasets(libraries)
 
+        group = {}
+        group["method"] = method
+        group["options"] = options
+        group["table"] = table
+        group["run"] = 0
+        group["pending"] = 0
+
         # Create the matrix which contains the time and dataset informations.
-        dataMatrix = [['-' for x in range(len(libraries) + 1)] for x in
-            range(datasetCount)]
+        group["dataMatrix"] = [['-' for x in range(len(libraries) + 1)] for x
+            in range(datasetCount)]
 
         # Create the matrix which contains the time from the previous run.
-        dataMatrixPrevious = [['-' for x in range(len(libraries) + 1)] for x in
-            range(datasetCount)]
+        group["dataMatrixPrevious"] = [['-' for x in range(len(libraries) + 1)]
+            for x in range(datasetCount)]
 
-        #Dictionary which will contain key as the library name and value as
-        #a dictionary of metrics for the current method
-        method_dict = {}
+        groups.append(group)
 
         col = 1
-        run = 0
         for library in libraries:
           name = library[0]
           datasets = library[1]
@@ -209,13 +672,15 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
           alias = library[6]
           files = library[7]
 
+          group["tasks"] = tasks
+
           if log:
             db.UpdateMethod(methodId, alias)
 
           header.append(name)
 
           if not blocks or name in blocks:
-            run += 1
+            group["run"] += 1
             Log.Info("Library: " + name)
 
             # Logging: create a new build and library record for this library.
@@ -224,232 +689,380 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new):
               libraryId = libraryId[0][0] if libraryId else db.NewLibrary(name)
 
               if update:
-                if new:
-                  buildId = db.GetLatestBuildFromLibary(libraryId)[0][0]
-                  if buildId:
-                    newBuildId = db.NewBuild(libraryId)
-                    db.CopyLatestBuildFromLibary(buildId, newBuildId)
-
-                buildId = db.GetLatestBuildFromLibary(libraryId)
-                buildIdPrevious = [(buildId,)]
+                buildId = GetUpdateBuild(db, libraryId, new)
+                buildPrevious[name] = [(buildId,)]
 
                 if buildId:
                   build[name] = (buildId, libraryId)
+                  runs[name] = db.GetBuildRun(buildId) or run
                 else:
                   Log.Warn("Nothing to update.")
                   continue
               else:
-                if db.GetLatestBuildFromLibary(libraryId)[0][0] <= 0:
-                  buildIdPrevious = [(1,)]
+                # Reopen the unfinished build of an interrupted run, the
+                # builds of the workers on other machines aren't resumed.
+                buildId = db.GetUnfinishedBuild(libraryId,
+                    SystemInfo.GetFingerprint()["id"]) if resume else None
+                if buildId:
+                  Log.Info("Resume build " + str(buildId) + ".")
+
+                # Compare only with the builds of this machine.
+                previous = [b for b in db.GetLatestBuildFromLibary(libraryId,
+                    SystemInfo.GetFingerprint()["id"]) if b[0] != buildId]
+                if not previous or previous[0][0] <= 0:
+                  buildPrevious[name] = [(1,)]
                 else:
-                  buildIdPrevious = db.GetLatestBuildFromLibary(libraryId)
+                  buildPrevious[name] = previous
+
+                # The build is created with the first stored result (see
+                # LocalBuild), so a run whose cells all ran on other machines
+                # doesn't leave an empty build.
+                build[name] = (buildId, libraryId)
+                runs[name] = (db.GetBuildRun(buildId) if buildId else None) or \
+                    run
+
+            for dataset in datasets:
+              datasetName = NormalizeDatasetName(dataset)
+              row = FindRightRow(group["dataMatrix"], datasetName,
+                  datasetCount)
+
+              # Logging: Create a new dataset record fot this dataset.
+              datasetId = None
+              if log:
+                datasetId = GetDatasetId(db, dataset)
+
+              group["dataMatrix"][row][0] = datasetName
+              group["dataMatrixPrevious"][row][0] = datasetName
+
+              if 'watch' in tasks and log:
+                watchCheck = False
+                checkFiles = [method, method.lower()] + files
+
+                for checkFile in checkFiles:
+                  for watchFile in watchFiles:
+                    if checkFile in watchFile:
+                      watchCheck = True
+                      break;
+
+                if not watchCheck:
+                  continue
 
-                build[name] = (db.NewBuild(libraryId), libraryId)
+              # Skip the finished cells of a resumed build and remove the
+              # partial records of the cell that was interrupted.
+              if resume and build[name][0] and not ResumeCell(db,
+                  build[name][0], build[name][1], datasetId, methodId, tasks):
+                continue
+
+              cell = {}
+              cell["method"] = method
+              cell["options"] = options
+              cell["library"] = name
+              cell["dataset"] = dataset
+              cell["format"] = format
+              cell["datasetName"] = datasetName
+              cell["trials"] = trials
+              cell["script"] = script
+              cell["tasks"] = tasks
+              cell["timeout"] = timeout
+              cell["bootstrap"] = bootstrapCount
+              cell["warmWorkers"] = warmWorkers
+              cell["conversionCacheSize"] = conversionCacheSize
+              cell["adaptive"] = adaptive
+              cell["threads"] = threadCounts
+              cell["complexity"] = None
+              if complexity and (not complexity["methods"] or
+                  method in complexity["methods"]):
+                cell["complexity"] = complexity
+              cell["group"] = group
+              cell["row"] = row
+              cell["col"] = col
+              cell["methodId"] = methodId
+              cell["datasetId"] = datasetId
+              group["pending"] += 1
+
+              # Reuse the cached result if nothing changed since the last
+              # measurement of the cell.
+              if resultCache:
+                cell["cacheKey"] = resultCache.Key(cell)
+                result = None if force else resultCache.Get(cell["cacheKey"])
+                if result:
+                  Log.Info("Method: " + method + ", Library: " + name +
+                      ", Dataset: " + datasetName + " (cached)")
+                  cachedCells.append((cell, result))
+                  continue
 
-            # Load the script.
-            try:
-              module = Loader.ImportModuleFromPath(script)
-              methodCall = getattr(module, method)
-            except Exception as e:
-              Log.Fatal("Could not load the script: " + script)
-              Log.Fatal("Exception: " + str(e))
-            else:
+              # Convert the dataset once, cells which share the dataset may
+              # run concurrently.
+              key = (str(dataset), format[0])
+              if key not in modifiedDatasets:
+                modifiedDatasets[key] = GetDataset(dataset, format,
+                    conversionCache)
 
-              for dataset in datasets:
-                datasetName = NormalizeDatasetName(dataset)
-                row = FindRightRow(dataMatrix, datasetName, datasetCount)
+              cell["modifiedDataset"] = modifiedDatasets[key][0]
+              cells.append(cell)
+          col += 1
 
-                # Logging: Create a new dataset record fot this dataset.
-                if log:
-                  datasetId = db.GetDataset(datasetName)
-                  datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
+  # The builds of the workers on other machines, keyed by the library name and
+  # the fingerprint.
+  workerBuilds = {}
+
+  '''
+  Get the build of a cell which ran on this machine, the build is created with
+  the first result of the library. The build is marked as finished when all
+  cells are done.
+
+  @param name - The name of the library.
+  @return Tuple with the build id and the library id.
+  '''
+  def LocalBuild(name):
+    buildId, libraryId = build[name]
+    if not buildId:
+      buildId = db.NewBuild(libraryId, finished=False, run=runs[name])
+      build[name] = (buildId, libraryId)
+    return build[name]
+
+  '''
+  Get the build of a cell which ran on a worker on another machine. Every
+  library gets a separate build for every machine, so the history of a machine
+  only contains its own timings; the builds share the run id, so the reports
+  show the whole run.
+
+  @param name - The name of the library.
+  @param result - The results of the cell with the fingerprint of the worker.
+  @return Tuple with the build id and the library id.
+  '''
+  def WorkerBuild(name, result):
+    fingerprint = result["fingerprint"]
+    key = (name, fingerprint["id"])
+    if key not in workerBuilds:
+      libraryId = build[name][1]
+      buildId = db.NewBuild(libraryId, False, fingerprint,
+          result.get("machine"), runs[name])
+      Log.Info("Cells of " + name + " ran on another machine (fingerprint " +
+          fingerprint["id"] + "), the results are stored in build " +
+          str(buildId) + ".")
+      workerBuilds[key] = (buildId, libraryId)
+    return workerBuilds[key]
+
+  '''
+  Store the results of a finished cell in the result table and in the
+  database if the user asked for.
+
+  @param cell - The finished cell.
+  @param result - The results of the cell.
+  @param cached - True if the result was taken from the result cache.
+  '''
+  def StoreCell(cell, result, cached=False):
+    if not result:
+      return
+
+    dataMatrix = cell["group"]["dataMatrix"]
+    dataMatrixPrevious = cell["group"]["dataMatrixPrevious"]
+    row, col = cell["row"], cell["col"]
+    methodId, datasetId = cell["methodId"], cell["datasetId"]
+    name = cell["library"]
+    tasks = cell["tasks"]
+
+    # The results of a worker on another machine are stored in the new build
+    # of the worker's machine, also in the update mode.
+    fingerprint = result.get("fingerprint")
+    foreign = bool(fingerprint) and (fingerprint["id"] !=
+        SystemInfo.GetFingerprint()["id"])
+    replace = update and not foreign
+    if log:
+      buildId, libraryId = WorkerBuild(name, result) if foreign else \
+          LocalBuild(name)
+
+    # Logging: Add method information record.
+    if log:
+      methodDescription = result["description"]
+
+      # Only store the description in the databse if there isn't a
+      # description.
+      if methodDescription and not db.GetMethodInfo(methodId):
+        db.NewMethodInfo(methodId, methodDescription)
+
+    if 'timing' in tasks:
+      time = result["time"]
+      dataMatrix[row][col] = TimeLabel(cell, time)
+
+      # Save the results in the databse if the user asked for.
+      if log:
+        var = Variance(time)
+
+        # Get the confidence interval of the median.
+        ciLow, ciHigh = None, None
+        if sum(time) >= 0:
+          interval = MedianConfidenceInterval(time)
+          if interval:
+            ciLow, ciHigh = interval
+
+        if replace:
+          try:
+            db.UpdateResult(buildId, libraryId, dataMatrix[row][col], var,
+                datasetId, methodId, len(time), ciLow, ciHigh)
+          except Exception:
+            pass
+        else:
+          db.NewResult(buildId, libraryId, dataMatrix[row][col], var,
+              datasetId, methodId, len(time), ciLow, ciHigh)
+
+        # Store the time and the resource usage of every trial; with the
+        # thread axis also the result of every thread count.
+        if replace:
+          db.DeleteTrialResults(buildId, libraryId, datasetId, methodId)
+          db.DeleteThreadResults(buildId, libraryId, datasetId, methodId)
+
+        if result.get("threads"):
+          for entry in result["threads"]:
+            db.NewThreadResult(buildId, libraryId, datasetId, methodId,
+                entry["threads"], TimeLabel(cell, entry["time"]),
+                Variance(entry["time"]))
+            db.NewTrialResults(buildId, libraryId, datasetId, methodId,
+                entry["time"], entry["usage"], entry["threads"])
+        else:
+          db.NewTrialResults(buildId, libraryId, datasetId, methodId, time,
+              result.get("usage") or [])
+
+        # Store the fitted scaling exponents of the complexity mode.
+        if replace:
+          db.DeleteComplexityResults(buildId, libraryId, datasetId, methodId)
+
+        for entry in result.get("complexity") or []:
+          db.NewComplexityResult(buildId, libraryId, datasetId, methodId,
+              entry["axis"], entry["size"], entry["exponent"], entry["low"],
+              entry["high"], entry["intercept"],
+              simplejson.dumps(entry["points"]))
+
+      if 'watch' in tasks and log:
+        for prevbuildID in buildPrevious[name]:
+          resultsPrevious = db.GetResult(prevbuildID[0], libraryId,
+              datasetId, methodId)
+          if (resultsPrevious and resultsPrevious[0][3] != '-'):
+            break
+
+        if resultsPrevious:
+          dataMatrixPrevious[row][col] = str(resultsPrevious[0][3])
+
+    if 'metric' in tasks and result["metrics"]:
+      if log:
+        if replace:
+          try:
+            db.UpdateMetricResult(buildId, libraryId,
+                simplejson.dumps(result["metrics"]), datasetId, methodId)
+          except Exception:
+            pass
+        else:
+          db.NewMetricResult(buildId, libraryId,
+              simplejson.dumps(result["metrics"]), datasetId, methodId)
+
+    if 'bootstrap' in tasks:
+      # Store the results in db if the user asked for it.
+      if log:
+        if replace:
+          try:
+            db.UpdateBootstrapResult(buildId, libraryId,
+                simplejson.dumps(result["bootstrap"]), datasetId, methodId)
+          except Exception as e:
+            pass
+        else:
+          db.NewBootstrapResult(buildId, libraryId,
+              simplejson.dumps(result["bootstrap"]), datasetId, methodId)
+
+    # Store the measured result, cached results are already in the cache. The
+    # key contains the fingerprint of this machine, so the results of other
+    # machines aren't cached.
+    if resultCache and not cached and not foreign:
+      resultCache.Put(cell.get("cacheKey"), result)
+
+    # Logging: Journal the finished cell, a resumed build continues after it.
+    if log and not replace:
+      db.NewJournalEntry(buildId, libraryId, datasetId, methodId)
+
+  '''
+  Record a finished cell. The queued database records are committed once all
+  cells of the method block are recorded.
+
+  @param cell - The finished cell.
+  @param result - The results of the cell.
+  @param cached - True if the result was taken from the result cache.
+  '''
+  def RecordCell(cell, result, cached=False):
+    StoreCell(cell, result, cached)
+
+    group = cell["group"]
+    group["pending"] -= 1
+    if log and not group["pending"]:
+      db.Flush()
+
+  # Copy the cached results into the current build.
+  for cell, result in cachedCells:
+    RecordCell(cell, result, True)
+
+  # Run the cells, cells run concurrently if the user asked for or on the
+  # workers of the coordinator.
+  if coordinator:
+    scheduler = Coordinator(coordinator, queueSettings["path"],
+        queueSettings["leaseTime"], queueSettings["reset"])
+  else:
+    scheduler = Scheduler(jobs, coresPerCell)
+  scheduler.Run(cells, RunCell, RecordCell)
+  WorkerPool.Shutdown()
+  DatasetBroker.Cleanup()
+
+  # Logging: All cells are done, so the builds are complete. The libraries
+  # without a stored result don't have a build.
+  if log and not update:
+    for buildId, libraryId in build.values():
+      if buildId:
+        db.FinishBuild(buildId)
+
+  # Logging: The builds of the workers on other machines are new builds, also
+  # in the update mode.
+  if log:
+    for buildId, libraryId in workerBuilds.values():
+      db.FinishBuild(buildId)
 
-                dataMatrix[row][0] = datasetName
-                dataMatrixPrevious[row][0] = datasetName
+  # Logging: Write the remaining records.
+  if log:
+    db.Close()
 
-                Log.Info("Dataset: " + dataMatrix[row][0])
+  # Remove temporary datasets.
+  for modifiedDataset in modifiedDatasets.values():
+    RemoveDataset(modifiedDataset[1])
 
-                modifiedDataset = GetDataset(dataset, format)
+  # Show the results.
+  for group in groups:
+    table = group["table"]
+    dataMatrix = group["dataMatrix"]
+    tasks = group["tasks"]
 
-                try:
-                  instance = methodCall(modifiedDataset[0], timeout=timeout,
-                    verbose=False)
-                except Exception as e:
-                  Log.Fatal("Could not call the constructor: " + script)
-                  Log.Fatal("Exception: " + str(e))
-                  continue
+    if not log and group["run"] > 0 and 'timing' in tasks:
+      Log.Notice("\n\n")
+      Log.PrintTable(AddMatrixToTable(dataMatrix, table))
+      Log.Notice("\n\n")
 
-                # Logging: Add method information record.
-                if log:
-                  try:
-                    # Some script define a method description, if
-                    # the description is set, save this in the database.
-                    methodDescription = instance.description
-                  except AttributeError:
-                    pass
-                  else:
-                    # Only store the description in the databse if there isn't
-                    # a description.
-                    if methodDescription and not db.GetMethodInfo(methodId):
-                      db.NewMethodInfo(methodId, methodDescription)
-
-                if 'watch' in tasks and log:
-                  watchCheck = False
-                  checkFiles = [method, method.lower()] + files
-
-                  for checkFile in checkFiles:
-                    for watchFile in watchFiles:
-                      if checkFile in watchFile:
-                        watchCheck = True
-                        break;
-
-                  if not watchCheck:
-                    continue
-
-                if 'timing' in tasks:
-                  time = []
-                  for trial in range(trials + 1):
-                    if trial > 0:
-                      try:
-                        time.append(instance.RunTiming(options))
-
-                        # Method unsuccessful.
-                        if sum(time) < 0:
-                          break
-                      except Exception as e:
-                        Log.Fatal("Exception: " + str(e))
-
-                  # Set the correct time label.
-                  if sum(time) == -2:
-                    # Timout failure.
-                    dataMatrix[row][col] = ">" + str(timeout)
-                  elif sum(time) < 0:
-                    # Exception.
-                    dataMatrix[row][col] = "failure"
-                  else:
-                    # Measured time.
-                    dataMatrix[row][col] = "{0:.6f}".format(sum(time) / trials)
-
-                  # Save the results in the databse if the user asked for.
-                  if log:
-                    # Get the variance.
-                    var = 0
-                    if len(time) != 0:
-                      avg = sum(time) / len(time)
-                      var = sum((avg - value) ** 2 for value in time) / len(time)
-
-                    buildId, libraryId = build[name]
-                    if update:
-                      try:
-                        db.UpdateResult(buildId, libraryId, dataMatrix[row][col],
-                          var, datasetId, methodId)
-                      except Exception:
-                        pass
-                    else:
-                      db.NewResult(buildId, libraryId, dataMatrix[row][col], var,
-                          datasetId, methodId)
-
-                  if 'watch' in tasks and log:
-                    for prevbuildID in buildIdPrevious:
-                      resultsPrevious = db.GetResult(prevbuildID[0], libraryId,
-                          datasetId, methodId)
-                      if (resultsPrevious and resultsPrevious[0][3] != '-'):
-                        break
-
-                    if resultsPrevious:
-                      dataMatrixPrevious[row][col] = str(resultsPrevious[0][3])
-
-                if 'metric' in tasks:
-                  try:
-                    metrics = instance.RunMetrics(options)
-                  except Exception as e:
-                    Log.Fatal("Exception: " + str(e))
-                    metrics = None
-
-                  if metrics:
-                    if log:
-                      buildID, libraryID = build[name]
-                      if update:
-                        try:
-                          db.UpdateMetricResult(buildID, libraryID,
-                              simplejson.dumps(metrics), datasetId, methodId)
-                        except Exception:
-                          pass
-                      else:
-                        db.NewMetricResult(buildID, libraryID,
-                            simplejson.dumps(metrics), datasetId, methodId)
-
-                if 'bootstrap' in tasks:
-                  bootstrap_metrics = {}
-
-                  # Start bootstrapping for this method.
-                  bootstrapCounter = 0
-                  for i in range(bootstrapCount):
-                    instance = methodCall(modifiedDataset[0], timeout=timeout,
-                        verbose=False)
-
-                    # Get the metric results for the specified method.
-                    metrics = instance.RunMetrics(options)
-
-                    # Merge the obtained metrics with the existing.
-                    if metrics:
-                      bootstrapCounter += 1
-                      bootstrap_metrics = { m: metrics.get(m, 0) +
-                                            bootstrap_metrics.get(m, 0)
-                                            for m in set(metrics) }
-
-                  # Normalize each obtained metric.
-                  for m in bootstrap_metrics:
-                    bootstrap_metrics[m] = float("{0:.6f}".format
-                                                 (round(bootstrap_metrics[m] /
-                                                  bootstrapCounter, 5)))
-
-                  # Store the results in db if the user asked for it.
-                  if log:
-                    buildID, libraryID = build[name]
-                    if update:
-                      try:
-                        db.UpdateBootstrapResult(buildID, libraryID,
-                            simplejson.dumps(bootstrap_metrics), datasetId,
-                            methodId)
-                      except Exception as e:
-                        pass
-                    else:
-                      db.NewBootstrapResult(buildID, libraryID,
-                          simplejson.dumps(bootstrap_metrics), datasetId,
-                          methodId)
-
-                # Remove temporary datasets.
-                RemoveDataset(modifiedDataset[1])
-          col += 1
-        # Show the results.
-        if not log and run > 0 and 'timing' in tasks:
-          Log.Notice("\n\n")
-          Log.PrintTable(AddMatrixToTable(dataMatrix, table))
-          Log.Notice("\n\n")
-          run = 0
-
-        if 'watch' in tasks and log:
-          Log.Notice("\n\n")
-          Log.PrintTable(AddMatrixToTable(dataMatrix, table))
-
-          resultsMessage = method
-          if options:
-            resultsMessage += " (" + options + ")"
-
-          resultsMessage += " | "
-          for result in zip(dataMatrixPrevious, dataMatrix):
-            if result[0][1] != '-' and result[1][1] != '-':
-              resultsMessage += result[0][0] + " " + result[0][1]
-              resultsMessage += " <=> " + result[1][1] + " | "
-
-          if '=' in resultsMessage:
-            if irc_available and ircData:
-              watchMessages.append(resultsMessage)
-            else:
-              Log.Info(resultsMessage)
-
-          Log.Notice("\n\n")
+    if 'watch' in tasks and log:
+      Log.Notice("\n\n")
+      Log.PrintTable(AddMatrixToTable(dataMatrix, table))
+
+      resultsMessage = group["method"]
+      if group["options"]:
+        resultsMessage += " (" + group["options"] + ")"
+
+      resultsMessage += " | "
+      for result in zip(group["dataMatrixPrevious"], dataMatrix):
+        if result[0][1] != '-' and result[1][1] != '-':
+          resultsMessage += result[0][0] + " " + result[0][1]
+          resultsMessage += " <=> " + result[1][1] + " | "
+
+      if '=' in resultsMessage:
+        if irc_available and ircData:
+          watchMessages.append(resultsMessage)
+        else:
+          Log.Info(resultsMessage)
+
+      Log.Notice("\n\n")
 
   if irc_available and ircData and len(watchMessages) > 0:
     ircBOT.send_messages(watchMessages)
@@ -459,7 +1072,7 @@ if __name__ == '__main__':
   parser = argparse.ArgumentParser(description="""Perform the benchmark with the
       given config.""")
   parser.add_argument('-c','--config', help='Configuration file name.',
-      required=True)
+      required=False)
   parser.add_argument('-b','--blocks', help='Run only the specified blocks.',
       required=False)
   parser.add_argument('-l','--log', help='Save the results in the logfile.',
@@ -472,14 +1085,35 @@ if __name__ == '__main__':
       specified files.""", required=False)
   parser.add_argument('-n','--new', help="""Copy the database before
       performing the benchmark.""", required=False)
+  parser.add_argument('-j','--jobs', help="""The number of cells to run
+      concurrently.""", required=False, type=int, default=1)
+  parser.add_argument('--cores-per-cell', help="""The number of cores
+      reserved for every concurrently running cell.""", required=False,
+      type=int, default=1)
+  parser.add_argument('-r','--resume', help="""Continue the latest unfinished
+      build of every library.""", required=False)
+  parser.add_argument('--force', help="""Measure all cells, even if there is
+      a cached result.""", required=False)
+  parser.add_argument('--coordinator', help="""Serve the cells on the given
+      address (host:port) and run them on the connected workers.""",
+      required=False)
+  parser.add_argument('--worker', help="""Run the cells of the coordinator
+      with the given address (host:port).""", required=False)
 
   args = parser.parse_args()
 
-  if args:
+  if args and args.worker:
+    SystemInformation()
+    Work(args.worker)
+  elif args and not args.config:
+    parser.error("the following arguments are required: -c/--config")
+  elif args:
     SystemInformation()
     log = True if args.log == "True" else False
     update = True if args.update == "True" else False
     args.files = "" if args.files == None else args.files
     new = True if args.new == "True" else False
+    resume = True if args.resume == "True" else False
+    force = True if args.force == "True" else False
     Main(args.config, args.blocks, log, args.methodBlocks, update, args.files,
-        new)
+        new, args.jobs, args.cores_per_cell, resume, force, args.coordinator)
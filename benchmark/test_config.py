@@ -26,9 +26,14 @@ if __name__ == '__main__':
       configuration.""")
   parser.add_argument('-c','--config', help='Configuration file name.',
       required=True)
+  parser.add_argument('-j','--jobs', help="""The number of datasets and
+      scripts to check concurrently.""", required=False, type=int, default=8)
+  parser.add_argument('-s','--skip-checksums', help="""Don't compute the
+      content hash of the datasets.""", required=False)
 
   args = parser.parse_args()
 
   if args:
+    checksums = False if args.skip_checksums == "True" else True
     config = Parser(args.config)
-    config.CheckConfig()
+    config.CheckConfig(args.jobs, checksums)
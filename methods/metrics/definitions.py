@@ -5,7 +5,19 @@
 Implementation of various metrics common to all classifiers.
 '''
 
+import os
 import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "../../util")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from misc import LoadDataset
+
 import numpy as np
 import math
 
@@ -295,7 +307,7 @@ class Metrics(object):
     #l : Number of classes
     l=len(CM)
     #trueVec : Vector/list with trueVec[index]=1 for the true class, 0 otherwise
-    Vec = np.genfromtxt(truelabelFile,delimiter=',')
+    Vec = LoadDataset(truelabelFile)
     instances=len(Vec)
     trueVec=[]
     for i in range(instances):
@@ -310,7 +322,7 @@ class Metrics(object):
     print("True Vec : ",trueArray)
     #probVec : 2D numpy array with trueVec[index]=probability for the instance
     #to be in that class.
-    probVec = np.genfromtxt(probabilities,delimiter=',')
+    probVec = LoadDataset(probabilities)
     print("probVec : ", probVec)
     diffArray = trueArray - probVec
     print("diffArray : ",diffArray)
@@ -344,8 +356,8 @@ class Metrics(object):
   '''
   @staticmethod
   def MeanPredictiveInformationClass(class_i, truelabels, predictedlabels):
-    predicted=np.genfromtxt(predictedlabels, delimiter=',')
-    actual=np.genfromtxt(truelabels, delimiter=',')
+    predicted=LoadDataset(predictedlabels)
+    actual=LoadDataset(truelabels)
     instances=len(actual)
     predictiveSum=0
     count=0
@@ -424,8 +436,8 @@ class Metrics(object):
   '''
   @staticmethod
   def AvgMeanPredictiveInformation(CM, truelabels, predictedlabels):
-    predicted=np.genfromtxt(predictedlabels, delimiter=',')
-    actual=np.genfromtxt(truelabels, delimiter=',')
+    predicted=LoadDataset(predictedlabels)
+    actual=LoadDataset(truelabels)
     mpi=0
     all_labels = Metrics.GetActualLabels(actual)
     for i in range(len(CM)):
@@ -18,6 +18,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 import mlpy
@@ -52,7 +53,7 @@ class KPCA(object):
 
       # Load input dataset.
       Log.Info("Loading dataset", self.verbose)
-      data = np.genfromtxt(self.dataset, delimiter=',')
+      data = LoadDataset(self.dataset)
 
       try:
         with totalTimer:
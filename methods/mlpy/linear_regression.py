@@ -76,7 +76,7 @@ class LinearRegression(object):
       # If the dataset contains two files then the second file is the test file.
       Log.Info("Loading dataset", self.verbose)
       if len(self.dataset) >= 2:
-        test_data = np.genfromtxt(self.dataset[1], delimiter=',')
+        test_data = LoadDataset(self.dataset[1])
 
       # Use the last row of the training set as the responses.
       X, y = SplitTrainData(self.dataset[0])
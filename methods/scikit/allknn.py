@@ -18,6 +18,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from sklearn.neighbors import NearestNeighbors
@@ -55,10 +56,10 @@ class ALLKNN(object):
       # In this case we add this to the command line.
       Log.Info("Loading dataset", self.verbose)
       if len(self.dataset) == 2:
-        referenceData = np.genfromtxt(self.dataset[0], delimiter=',')
-        queryData = np.genfromtxt(self.dataset[1], delimiter=',')
+        referenceData = LoadDataset(self.dataset[0])
+        queryData = LoadDataset(self.dataset[1])
       else:
-        referenceData = np.genfromtxt(self.dataset, delimiter=',')
+        referenceData = LoadDataset(self.dataset)
 
       with totalTimer:
         # Get all the parameters.
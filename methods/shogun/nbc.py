@@ -24,6 +24,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 from definitions import *
 
 import numpy as np
@@ -60,8 +61,8 @@ class NBC(object):
       Log.Info("Loading dataset", self.verbose)
       try:
         # Load train and test dataset.
-        trainData = np.genfromtxt(self.dataset[0], delimiter=',')
-        testData = np.genfromtxt(self.dataset[1], delimiter=',')
+        trainData = LoadDataset(self.dataset[0])
+        testData = LoadDataset(self.dataset[1])
 
         # Labels are the last row of the training set.
         labels = MulticlassLabels(trainData[:, (trainData.shape[1] - 1)])
@@ -1,6 +1,9 @@
-// Load benchmark.db.  Later, we will do something cool with it, once I figure
-// out how.  If this is file:///, suggest that the user start a server since
-// XMLHttpRequests may not work.
+// The views load the gzip compressed JSON shards which are exported by
+// make_reports.py from data/.  If this is file:///, suggest that the user start
+// a server since XMLHttpRequests may not work.
+var shardIndex = null;
+var shards = {};
+
 if(window.location.protocol == "file:")
 {
   var holder = document.getElementById("selectholder");
@@ -8,19 +11,84 @@ if(window.location.protocol == "file:")
 }
 else
 {
+  loadShard("index", function(data) {
+    shardIndex = data;
+
+    createColorMapping();
+  });
+}
+
+/**
+ * Load the given shard from data/ and call the callback with the parsed data.
+ * The shards are cached, so every shard is only loaded once.  If the server
+ * already decoded the gzip compressed file, the content is used as it is.  If
+ * the shard can't be loaded, the error is shown instead of calling the
+ * callback.
+ */
+function loadShard(name, callback)
+{
+  if (name in shards)
+  {
+    callback(shards[name]);
+    return;
+  }
+
   var xhr = new XMLHttpRequest();
-  xhr.open('GET', 'benchmark.db', true);
+  xhr.open('GET', 'data/' + name + '.json.gz', true);
   xhr.responseType = 'arraybuffer';
-  var db = new SQL.Database();
 
   xhr.onload = function(e) {
+    if (this.status < 200 || this.status >= 300)
+    {
+      shardError(name, "HTTP " + this.status + " " + this.statusText);
+      return;
+    }
+
     var uInt8Array = new Uint8Array(this.response);
-    db = new SQL.Database(uInt8Array);
+    var stream = new Blob([uInt8Array]).stream();
+    if (uInt8Array[0] == 0x1f && uInt8Array[1] == 0x8b)
+    {
+      stream = stream.pipeThrough(new DecompressionStream('gzip'));
+    }
 
-    createColorMapping();
+    new Response(stream).json().then(function(data) {
+      shards[name] = data;
+      callback(data);
+    }).catch(function(error) { shardError(name, error); });
   };
 
-  xhr.send(); // Load the dataset.
+  xhr.onerror = function(e) { shardError(name, "network error"); };
+
+  xhr.send();
+}
+
+/**
+ * Show the error of a shard which couldn't be loaded.
+ */
+function shardError(name, error)
+{
+  console.error("Could not load data/" + name + ".json.gz: " + error);
+  d3.select(".selectholder").append("label")
+      .attr("class", "shard-error")
+      .text("Could not load data/" + name + ".json.gz: " + error);
+}
+
+/**
+ * Load the shard of the given dataset with the latest results and metrics of
+ * all methods.
+ */
+function loadDatasetShard(dataset, callback)
+{
+  loadShard("dataset/" + shardIndex.datasets[dataset][0], callback);
+}
+
+/**
+ * Load the shard of the given view ("runtime", "historical" or "metric") and
+ * method.
+ */
+function loadMethodShard(view, method, callback)
+{
+  loadShard(view + "/" + shardIndex.shards[method], callback);
 }
 
 // "Global" variables.
@@ -72,9 +140,7 @@ function buildChart()
 // colors for use by the graphs.
 function createColorMapping()
 {
-  var librarylist = db.exec("SELECT libraries.name FROM libraries;");
-
-  libraries = librarylist[0].values.map(function(d) { return d[0]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
+  libraries = shardIndex.libraries.reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
   color.domain(libraries);
 }
 
@@ -100,6 +166,7 @@ function chartTypeSelect()
   selectHolder.selectAll('label').remove();
   selectHolder.selectAll('select').remove();
   selectHolder.selectAll('br').remove();
+  selectHolder.selectAll('.shard-error').remove();
 
   if (chartType == "algorithm-parameter-comparison") { activeChartType = rc; }
   else if (chartType == "historical-comparison") { activeChartType = hc; }
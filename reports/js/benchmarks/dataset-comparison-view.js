@@ -5,6 +5,7 @@ dc.dataset_name = "";
 dc.control_list_length = 0;
 dc.results = [];
 dc.methods = [];
+dc.shard = null;
 
 // The chart type has been selected.
 dc.onTypeSelect = function()
@@ -24,15 +25,14 @@ dc.onTypeSelect = function()
 // List the datasets.
 dc.listDatasets = function()
 {
-  var sqlstr = "SELECT datasets.name FROM datasets;";
-  var results = db.exec(sqlstr);
+  var datasets = Object.keys(shardIndex.datasets);
 
   var dataset_select_box = document.getElementById("main_dataset_select");
   clearSelectBox(dataset_select_box);
-  for (i = 0; i < results[0].values.length; i++)
+  for (i = 0; i < datasets.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = results[0].values[i][0];
+    new_option.text = datasets[i];
     dataset_select_box.add(new_option);
   }
   dataset_select_box.selectedIndex = -1;
@@ -72,9 +72,17 @@ dc.datasetSelect = function()
 
   dc.control_list_length = 0;
 
-  // Collect the results for lists of methods.
-  var sqlstr = "SELECT DISTINCT methods.name, methods.parameters, libraries.name FROM methods, results, datasets, libraries WHERE results.dataset_id == datasets.id AND results.method_id == methods.id AND datasets.name == '" + dc.dataset_name + "' AND libraries.id == results.libary_id ORDER BY methods.name;";
-  dc.methods = db.exec(sqlstr);
+  // Collect the results for lists of methods; the shard rows are (method,
+  // parameters, library, time, var) ordered by the method.
+  dc.methods = [{ values: [] }];
+  dc.shard = null;
+  var dataset_name = dc.dataset_name;
+  loadDatasetShard(dataset_name, function(data) {
+    if (dc.dataset_name != dataset_name) { return; }
+
+    dc.shard = data;
+    dc.methods = [{ values: data.runtime.map(function(d) { return [d[0], d[1], d[2]]; }) }];
+  });
 }
 
 // The user has requested to add a new thing.
@@ -170,8 +178,8 @@ dc.clickClearMethods = function()
 // The user wants a plot of everything we have.
 dc.clickRedrawMethods = function()
 {
-  // We need to generate a big SQL query.
-  var sqlstr = "";
+  // Collect the selected results from the shard of the dataset.
+  dc.results = [{ values: [] }];
   for (i = 0; i < dc.control_list_length; i++)
   {
     var methodbox = document.getElementById("method_select_" + String(i));
@@ -182,15 +190,15 @@ dc.clickRedrawMethods = function()
     var librarybox = document.getElementById("library_select_" + String(i));
     var library_name = librarybox.options[librarybox.selectedIndex].text;
 
-    sqlstr = sqlstr + "SELECT DISTINCT results.time, results.var, methods.name, methods.parameters, libraries.name, " + String(i) + " AS sort FROM results, methods, libraries, datasets WHERE results.libary_id == libraries.id AND libraries.name == '" + library_name + "' AND results.dataset_id == datasets.id AND datasets.name == '" + dc.dataset_name + "' AND results.method_id == methods.id AND methods.name == '" + method_name + "' AND methods.parameters == '" + param_name + "' GROUP BY libraries.name";
-
-    if (i < dc.control_list_length - 1)
+    for (j = 0; j < dc.shard.runtime.length; j++)
     {
-      sqlstr = sqlstr + " UNION ";
+      var d = dc.shard.runtime[j];
+      if (d[0] == method_name && d[1] == param_name && d[2] == library_name)
+      {
+        dc.results[0].values.push([d[3], d[4], d[0], d[1], d[2], i]);
+      }
     }
   }
-  sqlstr = sqlstr + " ORDER BY sort ASC;";
-  dc.results = db.exec(sqlstr);
 
   dc.clearChart();
   dc.buildChart();
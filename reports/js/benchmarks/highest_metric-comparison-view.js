@@ -65,15 +65,15 @@ hmc.orderSelect = function()
 // List the datasets.
 hmc.listDatasets = function()
 { 
-  var sqlstr = "SELECT DISTINCT datasets.name FROM datasets, metrics WHERE datasets.id=metrics.dataset_id ORDER BY datasets.name;";
-  var results = db.exec(sqlstr);
+  // Only the datasets with metrics.
+  var datasets = Object.keys(shardIndex.datasets).filter(function(d) { return shardIndex.datasets[d][1]; });
 
   var dataset_select_box = document.getElementById("main_dataset_select");
   clearSelectBox(dataset_select_box);
-  for (i = 0; i < results[0].values.length; i++)
+  for (i = 0; i < datasets.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = results[0].values[i][0];
+    new_option.text = datasets[i];
     dataset_select_box.add(new_option);
   }
   dataset_select_box.selectedIndex = -1;
@@ -87,21 +87,19 @@ hmc.datasetSelect = function()
   // Create an empty chart.
   hmc.clear();
 
+  var dataset_name = hmc.dataset_name;
+  loadDatasetShard(dataset_name, function(data) {
+    if (hmc.dataset_name == dataset_name) { hmc.showMetrics(data); }
+  });
+}
 
-
-  var sqlstr = "SELECT DISTINCT libary_id from builds"
-  var params = db.exec(sqlstr);
-  sqlstr = "SELECT DISTINCT methods.name, methods.parameters, libraries.name, metrics.metric FROM methods, metrics, datasets, libraries, builds WHERE metrics.dataset_id == datasets.id AND metrics.method_id == methods.id AND datasets.name == '" + hmc.dataset_name + "' AND libraries.id == metrics.libary_id AND ("
-  for(i = 0; i < params[0].values.length; i++)
-  {
-    var libsqlstr = "SELECT id FROM builds WHERE libary_id = " + params[0].values[i] + " ORDER BY id DESC LIMIT 1;"
-    var libid = db.exec(libsqlstr)
-
-    sqlstr += " metrics.build_id = "  + libid[0].values[0] + " OR "
-  }
-  sqlstr += " metrics.build_id = 0) ORDER BY methods.name;";
-
-  hmc.results = db.exec(sqlstr)[0].values;
+// Show the latest metrics of every method and library from the shard of the
+// selected dataset.
+hmc.showMetrics = function(data)
+{
+  // The rows are (method, parameters, library, metric); copy them, since the
+  // metric is replaced by the parsed list.
+  hmc.results = data.metric.map(function(d) { return d.slice(); });
 
   // Obtain unique list of metric names.
   hmc.metric_names = ["Library", "Method"]
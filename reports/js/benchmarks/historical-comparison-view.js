@@ -42,16 +42,16 @@ hc.onTypeSelect = function()
 // List the available methods.
 hc.listMethods = function()
 {
-  var methods = db.exec("SELECT DISTINCT methods.name FROM methods, results WHERE methods.id=results.method_id ORDER BY name;");
+  var methods = Object.keys(shardIndex.runtime).sort();
 
   var method_select_box = document.getElementById("method_select");
 
   // Put new things in the list box.
   clearSelectBox(method_select_box);
-  for(i = 0; i < methods[0].values.length; i++)
+  for(i = 0; i < methods.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = methods[0].values[i];
+    new_option.text = methods[i];
     method_select_box.add(new_option);
   }
   method_select_box.selectedIndex = -1;
@@ -67,25 +67,23 @@ hc.methodSelect = function()
   var method_select_box = document.getElementById("method_select");
   hc.method_name = method_select_box.options[method_select_box.selectedIndex].text; // At higher scope.
 
-  var sqlstr = "SELECT DISTINCT methods.parameters, results.libary_id, COUNT(DISTINCT results.libary_id) FROM methods, results WHERE methods.name == '" + hc.method_name + "' AND methods.id == results.method_id GROUP BY methods.parameters;";
-
-  var params = db.exec(sqlstr);
+  var params = shardIndex.runtime[hc.method_name];
   
   // Loop through results and fill the second list box.
   var param_select_box = document.getElementById("param_select");
   
   // Put in the new options.
   clearSelectBox(param_select_box);
-  for (i = 0; i < params[0].values.length; i++)
+  for (i = 0; i < params.length; i++)
   {
     var new_option = document.createElement("option");
-    if (params[0].values[i][0])
+    if (params[i][0])
     { 
-      new_option.text = params[0].values[i][0] + " (" + params[0].values[i][2] + " libraries)";
+      new_option.text = params[i][0] + " (" + params[i][1] + " libraries)";
     }
     else
     { 
-      new_option.text = "[no parameters] (" + params[0].values[i][2] + " libraries)";
+      new_option.text = "[no parameters] (" + params[i][1] + " libraries)";
     }
     param_select_box.add(new_option);
   }
@@ -103,10 +101,15 @@ hc.paramSelect = function()
   hc.param_name = param_name_full.split("(")[0].replace(/^\s+|\s+$/g, ''); // At higher scope.
   if (hc.param_name == "[no parameters]") { hc.param_name = ""; }
 
-  // Given a method name and parameters, query the SQLite database for all of
-  // the runs.
-  var sqlstr = "SELECT DISTINCT results.time, results.var, libraries.id, libraries.name, datasets.name, datasets.id " +  "FROM results, datasets, methods, libraries WHERE results.dataset_id == datasets.id AND results.method_id == methods.id " +     "AND methods.name == '" + hc.method_name + "' AND methods.parameters == '" + hc.param_name + "' AND libraries.id == results.libary_id " + "GROUP BY datasets.id, libraries.id;";
-  hc.results = db.exec(sqlstr);
+  // Given a method name and parameters, load the latest runs from the runtime
+  // shard of the method.
+  loadMethodShard("runtime", hc.method_name, hc.resultsLoaded);
+}
+
+// Called when the runtime shard of the selected method is loaded.
+hc.resultsLoaded = function(data)
+{
+  hc.results = [{ values: data[hc.param_name] || [] }];
 
   // Obtain unique list of datasets.
   hc.datasets = hc.results[0].values.map(function(d) { return d[4]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
@@ -133,10 +136,15 @@ hc.datasetSelect = function()
   var dataset_select_box = document.getElementById("main_dataset_select");
   hc.dataset_name = dataset_select_box.options[dataset_select_box.selectedIndex].text;
 
-  // Okay, now get the results of the query for that method, parameters, and
-  // dataset.
-  var sqlstr = "SELECT results.time, results.var, results.build_id, builds.build, libraries.name from results, methods, libraries, builds, datasets WHERE methods.id == results.method_id AND methods.name == '" + hc.method_name + "' AND methods.parameters == '" + hc.param_name + "' AND results.libary_id == libraries.id AND builds.id == results.build_id AND datasets.id == results.dataset_id AND datasets.name == '" + hc.dataset_name + "' GROUP BY results.build_id;";
-  hc.results = db.exec(sqlstr);
+  // Okay, now get the runs of all builds for that method, parameters, and
+  // dataset from the historical shard of the method.
+  loadMethodShard("historical", hc.method_name, hc.historyLoaded);
+}
+
+// Called when the historical shard of the selected method is loaded.
+hc.historyLoaded = function(data)
+{
+  hc.results = [{ values: (data[hc.param_name] || {})[hc.dataset_name] || [] }];
 
   hc.active_libraries = {};
   for(i = 0; i < hc.libraries.length; i++)
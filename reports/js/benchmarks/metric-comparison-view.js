@@ -12,6 +12,7 @@ mc.active_libraries = [];
 mc.metric_names = [];
 mc.results = 
 mc.active_library_list = [];
+mc.shard = null;
 
 // The chart type has been selected.
 mc.onTypeSelect = function()
@@ -31,114 +32,20 @@ mc.onTypeSelect = function()
 // List the datasets.
 mc.listDatasets = function()
 { 
-  var sqlstr = "SELECT DISTINCT datasets.name FROM datasets, metrics WHERE datasets.id=metrics.dataset_id ORDER BY datasets.name;";
-  var results = db.exec(sqlstr);
+  // Only the datasets with metrics.
+  var datasets = Object.keys(shardIndex.datasets).filter(function(d) { return shardIndex.datasets[d][1]; });
 
   var dataset_select_box = document.getElementById("main_dataset_select");
   clearSelectBox(dataset_select_box);
-  for (i = 0; i < results[0].values.length; i++)
+  for (i = 0; i < datasets.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = results[0].values[i][0];
+    new_option.text = datasets[i];
     dataset_select_box.add(new_option);
   }
   dataset_select_box.selectedIndex = -1;
 }
 
-mc.listMethods = function()
-{
-  var methods = db.exec("SELECT DISTINCT methods.name FROM methods, metrics WHERE methods.id=metrics.method_id AND metrics.metric<>'{}' ORDER BY name;");
-
-  var method_select_box = document.getElementById("method_select");
-  clearSelectBox(method_select_box);
-  // Put new things in the list box.
-  for(i = 0; i < methods[0].values.length; i++)
-  {
-    var new_option = document.createElement("option");
-    new_option.text = methods[0].values[i];
-    method_select_box.add(new_option);
-  }
-  method_select_box.selectedIndex = -1;
-
-  // Clear parameters box.
-  clearSelectBox(document.getElementById("param_select"));
-}
-
-// The user has selected a method.
-mc.methodSelect = function()
-{
-  // Extract the name of the method we selected.
-  var method_select_box = document.getElementById("method_select");
-  mc.method_name = method_select_box.options[method_select_box.selectedIndex].text; // At higher scope.
-
-  var sqlstr = "SELECT DISTINCT methods.parameters, metrics.libary_id, COUNT(DISTINCT metrics.libary_id) FROM methods, metrics WHERE methods.name == '" + mc.method_name + "' AND methods.id == metrics.method_id GROUP BY methods.parameters;";
-
-  var params = db.exec(sqlstr);
-
-  // Loop through results and fill the second list box.
-  var param_select_box = document.getElementById("param_select");
-  clearSelectBox(param_select_box);
-
-  // Put in the new options.
-  for (i = 0; i < params[0].values.length; i++)
-  {
-    var new_option = document.createElement("option");
-    if (params[0].values[i][0])
-    {
-      new_option.text = params[0].values[i][0] + " (" + params[0].values[i][2] + " libraries)";
-    }
-    else
-    {
-      new_option.text = "[no parameters] (" + params[0].values[i][2] + " libraries)";
-    }
-    param_select_box.add(new_option);
-  }
-  param_select_box.selectedIndex = -1;
-}
-
-// The user has selected parameters.
-mc.paramSelect = function()
-{
-  // The user has selected a library and parameters.  Now we need to
-  // generate
-  // a chart for all applicable datasets.
-  var method_select_box = document.getElementById("method_select");
-  mc.method_name = method_select_box.options[method_select_box.selectedIndex].text;
-  var param_select_box = document.getElementById("param_select");
-  var param_name_full = param_select_box.options[param_select_box.selectedIndex].text;
-  // Parse out actual parameters.
-  mc.param_name = param_name_full.split("(")[0].replace(/^\s+|\s+$/g, ''); // At higher scope.
-  if (mc.param_name == "[no parameters]") { mc.param_name = ""; }
-
-  // Given a method name and parameters, query the SQLite database for all of
-  // the runs.
-  var sqlstr = "SELECT DISTINCT metrics.metric, libraries.id, libraries.name, datasets.name, datasets.id " +
-    "FROM metrics, datasets, methods, libraries WHERE metrics.dataset_id == datasets.id AND metrics.method_id == methods.id " +
-    "AND methods.name == '" + mc.method_name + "' AND methods.parameters == '" + mc.param_name + "' AND libraries.id == metrics.libary_id " +
-    "AND metrics.metric<>'{}' GROUP BY datasets.id, libraries.id;";
-  mc.results = db.exec(sqlstr);
-
-  // Obtain unique list of datasets.
-  mc.datasets = mc.results[0].values.map(function(d) { return d[3]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
-  // Obtain unique list of libraries.
-  mc.libraries = mc.results[0].values.map(function(d) { return d[2]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
-
-  var dataset_select_box = document.getElementById("main_dataset_select");
-
-  // Remove old things.
-  for (i = dataset_select_box.options.length - 1; i >= 0; i--)
-  {
-    dataset_select_box.options[i] = null;
-  }
-
-  for (i = 0; i < mc.datasets.length; i++)
-  {
-    var new_option = document.createElement("option");
-    new_option.text = mc.datasets[i];
-    dataset_select_box.add(new_option);
-  }
-}
-
 mc.datasetSelect = function()
 {
   var dataset_select_box = document.getElementById("main_dataset_select");
@@ -169,9 +76,17 @@ mc.datasetSelect = function()
 
   mc.control_list_length = 0;
 
-  // Collect the results for lists of methods.
-  var sqlstr = "SELECT DISTINCT methods.name, methods.parameters, libraries.name FROM methods, metrics, datasets, libraries WHERE metrics.dataset_id == datasets.id AND metrics.method_id == methods.id AND datasets.name == '" + mc.dataset_name + "' AND libraries.id == metrics.libary_id ORDER BY methods.name;";
-  mc.methods = db.exec(sqlstr);
+  // Collect the results for lists of methods; the shard rows are (method,
+  // parameters, library, metric) ordered by the method.
+  mc.methods = [{ values: [] }];
+  mc.shard = null;
+  var dataset_name = mc.dataset_name;
+  loadDatasetShard(dataset_name, function(data) {
+    if (mc.dataset_name != dataset_name) { return; }
+
+    mc.shard = data;
+    mc.methods = [{ values: data.metric.map(function(d) { return [d[0], d[1], d[2]]; }) }];
+  });
 }
 
 // The user has requested to add a new thing.
@@ -270,8 +185,8 @@ mc.clickRedrawMethods = function()
 {
   mc.active_library_list = [];
 
-  // We need to generate a big SQL query.
-  var sqlstr = "";
+  // Collect the selected metrics from the shard of the dataset.
+  mc.results = [{ values: [] }];
   for (i = 0; i < mc.control_list_length; i++)
   {
     var methodbox = document.getElementById("method_select_" + String(i));
@@ -286,21 +201,18 @@ mc.clickRedrawMethods = function()
 
     mc.active_library_list.push(library_name + method_name + param_name)
 
-    // Given a method name and parameters, query the SQLite database for all of
-    // the runs.
-    sqlstr = sqlstr + "SELECT DISTINCT metrics.metric, libraries.id, libraries.name, datasets.name, datasets.id, methods.name, methods.parameters " +
-            "FROM metrics, datasets, methods, libraries WHERE metrics.dataset_id == datasets.id AND metrics.method_id == methods.id AND datasets.name == '" + mc.dataset_name + "' AND " +
-            "methods.name == '" + method_name + "' AND methods.parameters == '" + param_name + "' AND libraries.name == '" + library_name + "' AND metrics.metric<>'{}' GROUP BY datasets.id, libraries.id";
-
-    if (i < mc.control_list_length - 1)
+    // The rows are (metric, library id, library, dataset, dataset id, method,
+    // parameters); the ids aren't part of the shard.
+    for (j = 0; j < mc.shard.metric.length; j++)
     {
-      sqlstr = sqlstr + " UNION ";
+      var d = mc.shard.metric[j];
+      if (d[0] == method_name && d[1] == param_name && d[2] == library_name)
+      {
+        mc.results[0].values.push([d[3], null, d[2], mc.dataset_name, null, d[0], d[1]]);
+      }
     }
   }
 
-  sqlstr = sqlstr + ";";
-  mc.results = db.exec(sqlstr);
-
   // Obtain unique list of metric names.
   mc.metric_names = []
   for(i = 0; i < mc.results[0].values.length; i++)
@@ -43,15 +43,15 @@ mpc.onTypeSelect = function()
 
 mpc.listMethods = function()
 {
-  var methods = db.exec("SELECT DISTINCT methods.name FROM methods, metrics WHERE methods.id=metrics.method_id AND metrics.metric<>'{}' ORDER BY name;");
+  var methods = Object.keys(shardIndex.metric).sort();
 
   var method_select_box = document.getElementById("method_select");
   clearSelectBox(method_select_box);
   // Put new things in the list box.
-  for(i = 0; i < methods[0].values.length; i++)
+  for(i = 0; i < methods.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = methods[0].values[i];
+    new_option.text = methods[i];
     method_select_box.add(new_option);
   }
   method_select_box.selectedIndex = -1;
@@ -67,25 +67,23 @@ mpc.methodSelect = function()
   var method_select_box = document.getElementById("method_select");
   mpc.method_name = method_select_box.options[method_select_box.selectedIndex].text; // At higher scope.
 
-  var sqlstr = "SELECT DISTINCT methods.parameters, metrics.libary_id, COUNT(DISTINCT metrics.libary_id) FROM methods, metrics WHERE methods.name == '" + mpc.method_name + "' AND methods.id == metrics.method_id GROUP BY methods.parameters;";
-
-  var params = db.exec(sqlstr);
+  var params = shardIndex.metric[mpc.method_name];
 
   // Loop through results and fill the second list box.
   var param_select_box = document.getElementById("param_select");
   clearSelectBox(param_select_box);
 
   // Put in the new options.
-  for (i = 0; i < params[0].values.length; i++)
+  for (i = 0; i < params.length; i++)
   {
     var new_option = document.createElement("option");
-    if (params[0].values[i][0])
+    if (params[i][0])
     {
-      new_option.text = params[0].values[i][0] + " (" + params[0].values[i][2] + " libraries)";
+      new_option.text = params[i][0] + " (" + params[i][1] + " libraries)";
     }
     else
     {
-      new_option.text = "[no parameters] (" + params[0].values[i][2] + " libraries)";
+      new_option.text = "[no parameters] (" + params[i][1] + " libraries)";
     }
     param_select_box.add(new_option);
   }
@@ -106,13 +104,15 @@ mpc.paramSelect = function()
   mpc.param_name = param_name_full.split("(")[0].replace(/^\s+|\s+$/g, ''); // At higher scope.
   if (mpc.param_name == "[no parameters]") { mpc.param_name = ""; }
 
-  // Given a method name and parameters, query the SQLite database for all of
-  // the runs.
-  var sqlstr = "SELECT DISTINCT metrics.metric, libraries.id, libraries.name, datasets.name, datasets.id " +
-    "FROM metrics, datasets, methods, libraries WHERE metrics.dataset_id == datasets.id AND metrics.method_id == methods.id " +
-    "AND methods.name == '" + mpc.method_name + "' AND methods.parameters == '" + mpc.param_name + "' AND libraries.id == metrics.libary_id " +
-    "AND metrics.metric<>'{}' GROUP BY datasets.id, libraries.id;";
-  mpc.results = db.exec(sqlstr);
+  // Given a method name and parameters, load the latest metrics from the
+  // metric shard of the method.
+  loadMethodShard("metric", mpc.method_name, mpc.resultsLoaded);
+}
+
+// Called when the metric shard of the selected method is loaded.
+mpc.resultsLoaded = function(data)
+{
+  mpc.results = [{ values: (data[mpc.param_name] || {}).latest || [] }];
 
   // Obtain unique list of datasets.
   mpc.datasets = mpc.results[0].values.map(function(d) { return d[3]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
@@ -141,9 +141,15 @@ mpc.datasetSelect = function()
   var dataset_select_box = document.getElementById("main_dataset_select");
   mpc.dataset_name = dataset_select_box.options[dataset_select_box.selectedIndex].text;
 
-  // Okay, now get the results of the query for that method, parameters, and dataset.
-  var sqlstr = "SELECT metrics.metric, metrics.build_id, builds.build, libraries.name from metrics, methods, libraries, builds, datasets WHERE methods.id == metrics.method_id AND methods.name == '" + mpc.method_name + "' AND methods.parameters == '" + mpc.param_name + "' AND metrics.libary_id == libraries.id AND builds.id == metrics.build_id AND datasets.id == metrics.dataset_id AND datasets.name == '" + mpc.dataset_name + "' GROUP BY metrics.build_id;";
-  mpc.results = db.exec(sqlstr);
+  // Okay, now get the metrics of all builds for that method, parameters, and
+  // dataset from the metric shard of the method.
+  loadMethodShard("metric", mpc.method_name, mpc.historyLoaded);
+}
+
+// Called when the metric shard of the selected method is loaded.
+mpc.historyLoaded = function(data)
+{
+  mpc.results = [{ values: ((data[mpc.param_name] || {}).historical || {})[mpc.dataset_name] || [] }];
 
   // Obtain unique list of metric names.
   mpc.metric_names = []
@@ -8,7 +8,7 @@ rc.libraries = [];
 rc.active_datasets = [];
 rc.active_libraries = [];
 rc.results = [];
-rc.groupBy = "datasets.instances"
+rc.groupBy = "instances"
 
 // This chart type has been selected.  What do we do now?
 rc.onTypeSelect = function()
@@ -67,17 +67,17 @@ rc.listOrder = function()
 // List methods.
 rc.listMethods = function()
 {
-  var methods = db.exec("SELECT DISTINCT methods.name FROM methods, results WHERE methods.id == results.method_id ORDER BY name;");
+  var methods = Object.keys(shardIndex.runtime).sort();
   var method_select_box = document.getElementById("method_select");
 
   // Remove old things.
   clearSelectBox(method_select_box);
 
   // Add new things.
-  for (i = 0; i < methods[0].values.length; i++)
+  for (i = 0; i < methods.length; i++)
   {
     var new_option = document.createElement("option");
-    new_option.text = methods[0].values[i];
+    new_option.text = methods[i];
     method_select_box.add(new_option);
   }
   method_select_box.selectedIndex = -1;
@@ -93,22 +93,21 @@ rc.methodSelect = function()
   var method_select_box = document.getElementById("method_select");
   rc.method_name = method_select_box.options[method_select_box.selectedIndex].text; // At higher scope.
 
-  var sqlstr = "SELECT DISTINCT methods.parameters, results.libary_id, count(DISTINCT results.libary_id) FROM methods, results WHERE methods.name == '" + rc.method_name + "' AND methods.id == results.method_id GROUP BY methods.parameters;";
-  var params = db.exec(sqlstr);
+  var params = shardIndex.runtime[rc.method_name];
 
   // Loop through results and fill the second list box.
   var param_select_box = document.getElementById("param_select");
   clearSelectBox(param_select_box);
-  for (i = 0; i < params[0].values.length; i++)
+  for (i = 0; i < params.length; i++)
   {
     var new_option = document.createElement("option");
-    if (params[0].values[i][0])
+    if (params[i][0])
     {
-      new_option.text = params[0].values[i][0] + " (" + params[0].values[i][2] + " libraries)";
+      new_option.text = params[i][0] + " (" + params[i][1] + " libraries)";
     }
     else
     {
-      new_option.text = "[no parameters] (" + params[0].values[i][2] + " libraries)";
+      new_option.text = "[no parameters] (" + params[i][1] + " libraries)";
     }
     param_select_box.add(new_option);
   }
@@ -132,13 +131,15 @@ rc.paramSelect = function()
     rc.param_name = "";
   }
 
-  // Given a method name and parameters, query the SQLite database for all of
-  // the runs.
-  var sqlstr = "SELECT DISTINCT results.time, results.var, libraries.id, libraries.name, datasets.name, datasets.id " +
-    "FROM results, datasets, methods, libraries WHERE results.dataset_id == datasets.id AND results.method_id == methods.id " +
-    "AND methods.name == '" + rc.method_name + "' AND methods.parameters == '" + rc.param_name + "' AND libraries.id == results.libary_id " +
-    "GROUP BY datasets.id, libraries.id, " + rc.groupBy + ";";
-  rc.results = db.exec(sqlstr);
+  // Given a method name and parameters, load the latest runs from the runtime
+  // shard of the method.
+  loadMethodShard("runtime", rc.method_name, rc.resultsLoaded);
+}
+
+// Called when the runtime shard of the selected method is loaded.
+rc.resultsLoaded = function(data)
+{
+  rc.results = [{ values: rc.sortResults(data[rc.param_name] || []) }];
 
   // Obtain unique list of datasets.
   rc.datasets = rc.results[0].values.map(function(d) { return d[4]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
@@ -162,38 +163,23 @@ rc.paramSelect = function()
   buildChart();
 }
 
+// Sort the runs by the selected dataset property and the dataset.
+rc.sortResults = function(results)
+{
+  var column = { "instances": 6, "attributes": 7, "size": 8 }[rc.groupBy];
+  return results.slice().sort(function(a, b) { return (a[column] - b[column]) || (a[5] - b[5]); });
+}
+
 rc.orderSelect = function()
 {
   // Extract the name of the method we selected.
   var order_select_box = document.getElementById("main_dataset_select");
-  rc.groupBy = "datasets." + order_select_box.options[order_select_box.selectedIndex].text; // At higher scope.
+  rc.groupBy = order_select_box.options[order_select_box.selectedIndex].text; // At higher scope.
 
-  var sqlstr = "SELECT DISTINCT results.time, results.var, libraries.id, libraries.name, datasets.name, datasets.id " +
-    "FROM results, datasets, methods, libraries WHERE results.dataset_id == datasets.id AND results.method_id == methods.id " +
-    "AND methods.name == '" + rc.method_name + "' AND methods.parameters == '" + rc.param_name + "' AND libraries.id == results.libary_id " +
-    "GROUP BY libraries.id, " + rc.groupBy + ";";
-  rc.results = db.exec(sqlstr);
-
-   // Obtain unique list of datasets.
-  rc.datasets = rc.results[0].values.map(function(d) { return d[4]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
-  // Obtain unique list of libraries.
-  rc.libraries = rc.results[0].values.map(function(d) { return d[3]; }).reduce(function(p, c) { if(p.indexOf(c) < 0) p.push(c); return p; }, []);
-
-  // By default, everything is active.
-  rc.active_datasets = {};
-  for (i = 0; i < rc.datasets.length; i++)
+  if (rc.method_name in shardIndex.shards)
   {
-    rc.active_datasets[rc.datasets[i]] = true;
+    loadMethodShard("runtime", rc.method_name, rc.resultsLoaded);
   }
-
-  rc.active_libraries = {};
-  for (i = 0; i < rc.libraries.length; i++)
-  {
-    rc.active_libraries[rc.libraries[i]] = true;
-  }
-
-  rc.clearChart();
-  rc.buildChart();
 }
 
 // Remove everything on the page that belongs to us.
@@ -0,0 +1,134 @@
+'''
+  @file broker_unit_test.py
+  @author Marcus Edel
+
+  Test for the dataset broker which shares the datasets in shared memory.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, subprocess, multiprocessing
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from broker import *
+
+import numpy as np
+
+'''
+Acquire the dataset in a child process and release it once the test asks for.
+
+@param dataset - The location of the dataset file.
+@param acquired - Event which is set after the dataset was acquired.
+@param release - Event which is set by the test to release the dataset.
+'''
+def AcquireDataset(dataset, acquired, release):
+  name = DatasetBroker.Acquire(dataset)
+  acquired.set()
+  release.wait(30)
+  DatasetBroker.Release(name)
+
+class DatasetBroker_Test(unittest.TestCase):
+
+  '''
+  Create the test dataset and a private shared memory directory.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.brokerPath = DatasetBroker.path
+    self.environ = dict(os.environ)
+    os.environ["DATASET_CACHE"] = ""
+    DatasetBroker.path = os.path.join(self.path, "shm")
+    os.mkdir(DatasetBroker.path)
+
+    self.dataset = os.path.join(self.path, "test.csv")
+    self.data = np.arange(12, dtype=float).reshape(4, 3)
+    np.savetxt(self.dataset, self.data, delimiter=",")
+    self.dataFile, self.ownersFile = DatasetBroker.Files(
+        DatasetBroker.Name(self.dataset))
+
+  def tearDown(self):
+    DatasetBroker.path = self.brokerPath
+    os.environ.clear()
+    os.environ.update(self.environ)
+    shutil.rmtree(self.path)
+
+  '''
+  Get the process id of a process which already exited.
+
+  @return The process id.
+  '''
+  def DeadPid(self):
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+  '''
+  Test that the dataset is published once and removed with the last owner.
+  '''
+  def test_AcquireRelease(self):
+    acquired, release = multiprocessing.Event(), multiprocessing.Event()
+    child = multiprocessing.Process(target=AcquireDataset,
+        args=(self.dataset, acquired, release))
+    child.start()
+    self.assertTrue(acquired.wait(30))
+
+    name = DatasetBroker.Acquire(self.dataset)
+    self.assertEqual(DatasetBroker.ReadOwners(self.ownersFile),
+        set([os.getpid(), child.pid]))
+    self.assertTrue(np.array_equal(DatasetBroker.View(name), self.data))
+
+    # The child still owns the dataset.
+    DatasetBroker.Release(name)
+    self.assertTrue(os.path.isfile(self.dataFile))
+    self.assertEqual(DatasetBroker.ReadOwners(self.ownersFile),
+        set([child.pid]))
+
+    release.set()
+    child.join(30)
+    self.assertFalse(os.path.exists(self.dataFile))
+    self.assertFalse(os.path.exists(self.ownersFile))
+    self.assertIsNone(DatasetBroker.View(name))
+
+  '''
+  Test that the broker operations wait for the lock.
+  '''
+  def test_Lock(self):
+    acquired, release = multiprocessing.Event(), multiprocessing.Event()
+    child = multiprocessing.Process(target=AcquireDataset,
+        args=(self.dataset, acquired, release))
+
+    with DatasetBroker.Lock():
+      child.start()
+      self.assertFalse(acquired.wait(1))
+    self.assertTrue(acquired.wait(30))
+
+    release.set()
+    child.join(30)
+
+  '''
+  Test that the shared datasets of dead owners are removed.
+  '''
+  def test_Cleanup(self):
+    np.save(self.dataFile, self.data)
+    with open(self.ownersFile, "w") as fid:
+      fid.write(str(self.DeadPid()) + "\n")
+
+    liveData, liveOwners = DatasetBroker.Files("benchmark_live")
+    np.save(liveData, self.data)
+    with open(liveOwners, "w") as fid:
+      fid.write(str(self.DeadPid()) + "\n" + str(os.getpid()) + "\n")
+
+    DatasetBroker.Cleanup()
+    self.assertFalse(os.path.exists(self.dataFile))
+    self.assertFalse(os.path.exists(self.ownersFile))
+    self.assertTrue(os.path.isfile(liveData))
+    self.assertEqual(DatasetBroker.ReadOwners(liveOwners), set([os.getpid()]))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,212 @@
+'''
+  @file cache_unit_test.py
+  @author Marcus Edel
+
+  Test for the binary dataset cache, the converted dataset cache and the
+  dataset loading.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, stat
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from misc import *
+from cache import *
+from broker import *
+
+import numpy as np
+
+class DatasetCache_Test(unittest.TestCase):
+
+  '''
+  Create the test dataset in the datasets directory of a benchmark root.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.cwd = os.getcwd()
+    self.environ = dict(os.environ)
+    self.brokerPath = DatasetBroker.path
+    os.chdir(self.path)
+
+    os.mkdir("datasets")
+    self.dataset = os.path.join(self.path, "datasets", "test.csv")
+    self.data = np.arange(30000, dtype=float).reshape(-1, 3)
+    np.savetxt(self.dataset, self.data, delimiter=",")
+
+    self.cachePath = os.path.join(self.path, "cache")
+    os.environ["DATASET_CACHE"] = self.cachePath
+    DatasetBroker.path = os.path.join(self.path, "shm")
+    os.mkdir(DatasetBroker.path)
+
+  def tearDown(self):
+    os.chdir(self.cwd)
+    os.environ.clear()
+    os.environ.update(self.environ)
+    DatasetBroker.path = self.brokerPath
+    shutil.rmtree(self.path)
+
+  '''
+  Get the cached arrays.
+
+  @return List of the .npy files of the cache.
+  '''
+  def CachedArrays(self):
+    if not os.path.isdir(self.cachePath):
+      return []
+    return [f for f in os.listdir(self.cachePath) if f.endswith(".npy")]
+
+  '''
+  Test that the parsed dataset is stored and loaded as memory mapped array.
+  '''
+  def test_RoundTrip(self):
+    cache = DatasetCache(self.cachePath)
+    data = cache.Load(self.dataset)
+    self.assertTrue(np.array_equal(data, self.data))
+    self.assertEqual(len(self.CachedArrays()), 1)
+
+    data = cache.Load(self.dataset)
+    self.assertIsInstance(data.base, np.memmap)
+    self.assertTrue(np.array_equal(data, self.data))
+
+    # The mapped array is copy-on-write, changes aren't written to the cache.
+    data[0, 0] = -1
+    self.assertEqual(cache.Load(self.dataset)[0, 0], self.data[0, 0])
+
+  '''
+  Test that a changed dataset file is parsed again.
+  '''
+  def test_Invalidation(self):
+    cache = DatasetCache(self.cachePath)
+    cache.Load(self.dataset)
+    stat = os.stat(self.dataset)
+    self.assertFalse(IsDatasetInfoOutdated(self.dataset, stat.st_size,
+        stat.st_mtime))
+
+    np.savetxt(self.dataset, self.data * 2, delimiter=",")
+    os.utime(self.dataset, (stat.st_atime, stat.st_mtime + 10))
+    self.assertTrue(IsDatasetInfoOutdated(self.dataset, stat.st_size,
+        stat.st_mtime))
+
+    self.assertTrue(np.array_equal(cache.Load(self.dataset), self.data * 2))
+    self.assertEqual(len(self.CachedArrays()), 2)
+
+  '''
+  Test that only the input datasets which are large enough are cached.
+  '''
+  def test_Accepts(self):
+    cache = DatasetCache.Default()
+    self.assertTrue(cache.Accepts(self.dataset))
+
+    output = os.path.join(self.path, "output.csv")
+    shutil.copy(self.dataset, output)
+    self.assertFalse(cache.Accepts(output))
+    self.assertTrue(np.array_equal(cache.Load(output), self.data))
+    self.assertEqual(self.CachedArrays(), [])
+
+    small = os.path.join(self.path, "datasets", "small.csv")
+    np.savetxt(small, self.data[:2], delimiter=",")
+    self.assertFalse(cache.Accepts(small))
+
+  '''
+  Test that LoadDataset uses the shared dataset of the broker first, then the
+  dataset cache and parses the file otherwise.
+  '''
+  def test_LoadDatasetOrder(self):
+    # Without the cache the file is parsed.
+    os.environ["DATASET_CACHE"] = ""
+    self.assertTrue(np.array_equal(LoadDataset(self.dataset), self.data))
+    self.assertEqual(self.CachedArrays(), [])
+
+    # The parsed array is stored in the cache and taken from the cache.
+    os.environ["DATASET_CACHE"] = self.cachePath
+    self.assertTrue(np.array_equal(LoadDataset(self.dataset), self.data))
+    self.assertEqual(len(self.CachedArrays()), 1)
+
+    cached = np.zeros((2, 2))
+    np.save(os.path.join(self.cachePath, self.CachedArrays()[0]), cached)
+    self.assertTrue(np.array_equal(LoadDataset(self.dataset), cached))
+
+    # The published dataset of the broker is used before the cache.
+    shared = np.ones((2, 2))
+    np.save(DatasetBroker.Files(DatasetBroker.Name(self.dataset))[0], shared)
+    self.assertTrue(np.array_equal(LoadDataset(self.dataset), shared))
+
+class ConversionCache_Test(unittest.TestCase):
+
+  '''
+  Create the test datasets.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.cachePath = os.path.join(self.path, "converted")
+    self.datasets = []
+    for i in range(4):
+      dataset = os.path.join(self.path, "test" + str(i) + ".csv")
+      np.savetxt(dataset, np.full((100, 3), i, dtype=float), delimiter=",")
+      self.datasets.append(dataset)
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  '''
+  Get the converted files of the cache.
+
+  @return Dictionary with the size of every converted file.
+  '''
+  def CachedFiles(self):
+    files = {}
+    for directory in os.listdir(self.cachePath):
+      directory = os.path.join(self.cachePath, directory)
+      if os.path.isdir(directory):
+        for f in os.listdir(directory):
+          files[f] = os.path.getsize(os.path.join(directory, f))
+    return files
+
+  '''
+  Test that the least recently used files are removed, so the cache stays
+  under the disk budget, and that the files of the current run are kept.
+  '''
+  def test_Evict(self):
+    size = os.path.getsize(ConversionCache(self.cachePath).Get(
+        self.datasets[0], "arff"))
+    budget = int(size * 2.5)
+
+    for i, dataset in enumerate(self.datasets):
+      # Every run has its own cache instance.
+      cache = ConversionCache(self.cachePath, budget)
+      fileName = cache.Get(dataset, "arff")
+      os.utime(fileName, (1000 + i, 1000 + i))
+
+      self.assertTrue(os.path.isfile(fileName))
+      self.assertLessEqual(sum(self.CachedFiles().values()), budget)
+
+    self.assertEqual(sorted(self.CachedFiles().keys()), ["test2.arff",
+        "test3.arff"])
+
+    # The empty directories of the removed files are removed as well.
+    self.assertEqual(len([d for d in os.listdir(self.cachePath) if
+        os.path.isdir(os.path.join(self.cachePath, d))]), 2)
+
+    # The files used by the run aren't removed, even over the budget.
+    cache = ConversionCache(self.cachePath, 1)
+    fileName = cache.Get(self.datasets[0], "arff")
+    self.assertEqual(list(self.CachedFiles().keys()), ["test0.arff"])
+    self.assertTrue(os.path.isfile(fileName))
+
+  '''
+  Test that the converted files get the default mode of new files.
+  '''
+  def test_FileMode(self):
+    fileName = ConversionCache(self.cachePath).Get(self.datasets[0], "arff")
+    self.assertEqual(stat.S_IMODE(os.stat(fileName).st_mode),
+        0o666 & ~AtomicFile.umask)
+
+if __name__ == '__main__':
+  unittest.main()
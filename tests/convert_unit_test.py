@@ -0,0 +1,83 @@
+'''
+  @file convert_unit_test.py
+  @author Marcus Edel
+
+  Test for the dataset conversions.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from convert import *
+
+import numpy as np
+
+class Convert_Test(unittest.TestCase):
+
+  '''
+  Create the test dataset.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.dataset = os.path.join(self.path, "test_train.csv")
+    self.data = np.arange(30, dtype=float).reshape(10, 3) / 7.0
+    np.savetxt(self.dataset, self.data, delimiter=",", fmt="%.17g")
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  '''
+  Test the arff conversion.
+  '''
+  def test_ConvertArff(self):
+    convert = Convert(self.dataset, "arff")
+    self.assertEqual(convert.modifiedDataset, os.path.join(self.path,
+        "test_train.arff"))
+    with open(convert.modifiedDataset, "r") as fid:
+      self.assertEqual(fid.read().count("@attribute"), 3)
+
+  '''
+  Test the npy and Armadillo binary conversions, the chunks are smaller than
+  the dataset.
+  '''
+  def test_ConvertBinary(self):
+    chunks = Convert.TextChunks
+    Convert.TextChunks = staticmethod(lambda data: chunks(data, 4))
+    try:
+      for format in ["npy", "arma_binary"]:
+        convert = Convert(self.dataset, format)
+        self.assertTrue(convert.modifiedDataset.endswith("." +
+            FormatExtension(format)))
+        self.assertTrue((LoadDataset(convert.modifiedDataset) ==
+            self.data).all())
+    finally:
+      Convert.TextChunks = chunks
+
+  '''
+  Test that a failed conversion doesn't leave a file behind.
+  '''
+  def test_ConvertFailure(self):
+    with open(self.dataset, "a") as fid:
+      fid.write("1,2\n")
+
+    self.assertEqual(Convert(self.dataset, "npy").modifiedDataset, "")
+    self.assertEqual(sorted(os.listdir(self.path)), ["test_train.csv"])
+
+  '''
+  Test the file extensions of the formats.
+  '''
+  def test_CheckFileExtension(self):
+    self.assertEqual(CheckFileExtension("d.csv", ["arma_binary", "csv"]),
+        "d.csv")
+    self.assertEqual(CheckFileExtension("d.csv", ["arma_binary"]), "d.bin")
+
+if __name__ == '__main__':
+  unittest.main()
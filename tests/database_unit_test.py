@@ -0,0 +1,657 @@
+'''
+  @file database_unit_test.py
+  @author Marcus Edel
+
+  Test for the latest builds and latest results tables, which are kept up to
+  date by the triggers of the database, for the machine of the builds, for
+  the retention of the builds and for the merge of databases.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, gzip, json
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from database import *
+
+class Database_Test(unittest.TestCase):
+
+  '''
+  Create a database with two builds of a library.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    self.libraryId = self.db.NewLibrary("mlpack")
+    self.datasetId = self.db.NewDataset("iris", 1, 4, 150, "csv")
+    self.methodId = self.db.NewMethod("KMEANS", "-c 3", "")
+    self.buildIds = [self.db.NewBuild(self.libraryId) for i in range(2)]
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Get the latest build of the library.
+
+  @return The build id or None if the library has no build.
+  '''
+  def LatestBuild(self):
+    builds = [build[2] for build in self.db.GetLatestBuilds()
+        if build[0] == self.libraryId]
+    return builds[0] if builds else None
+
+  '''
+  Get the latest result of the cell.
+
+  @return Tuple with the build id and the time or None if there is no result.
+  '''
+  def LatestResult(self):
+    self.db.Flush()
+    self.db.cur.execute("SELECT build_id, time FROM latest_results WHERE "
+        + "method_id=? AND dataset_id=? AND libary_id=?",
+        (self.methodId, self.datasetId, self.libraryId))
+    results = self.db.cur.fetchall()
+    return results[0] if results else None
+
+  '''
+  Test that a new build becomes the latest build of the library.
+  '''
+  def test_LatestBuildsInsert(self):
+    self.assertEqual(self.LatestBuild(), self.buildIds[1])
+
+    buildId = self.db.NewBuild(self.libraryId)
+    self.assertEqual(self.LatestBuild(), buildId)
+
+  '''
+  Test that the previous build becomes the latest build once the latest build
+  is removed.
+  '''
+  def test_LatestBuildsDelete(self):
+    self.db.DeleteBuilds([self.buildIds[1]])
+    self.assertEqual(self.LatestBuild(), self.buildIds[0])
+
+    self.db.DeleteBuilds([self.buildIds[0]])
+    self.assertIsNone(self.LatestBuild())
+
+  '''
+  Test that the result of the latest build is the latest result, also if the
+  result of an older build is inserted afterwards.
+  '''
+  def test_LatestResultsInsert(self):
+    self.db.NewResult(self.buildIds[1], self.libraryId, 2.0, 0.0,
+        self.datasetId, self.methodId)
+    self.assertEqual(self.LatestResult(), (self.buildIds[1], 2.0))
+
+    self.db.NewResult(self.buildIds[0], self.libraryId, 1.0, 0.0,
+        self.datasetId, self.methodId)
+    self.assertEqual(self.LatestResult(), (self.buildIds[1], 2.0))
+
+  '''
+  Test that an updated result replaces the latest result.
+  '''
+  def test_LatestResultsUpdate(self):
+    self.db.NewResult(self.buildIds[1], self.libraryId, 2.0, 0.0,
+        self.datasetId, self.methodId)
+    self.db.UpdateResult(self.buildIds[1], self.libraryId, 3.0, 0.0,
+        self.datasetId, self.methodId)
+    self.assertEqual(self.LatestResult(), (self.buildIds[1], 3.0))
+
+  '''
+  Test that the results which are removed with their builds are replaced by
+  the result of the previous build.
+  '''
+  def test_LatestResultsDeleteBuilds(self):
+    for buildId, time in zip(self.buildIds, [1.0, 2.0]):
+      self.db.NewResult(buildId, self.libraryId, time, 0.0, self.datasetId,
+          self.methodId)
+    self.assertEqual(self.LatestResult(), (self.buildIds[1], 2.0))
+
+    self.db.DeleteBuilds([self.buildIds[1]])
+    self.assertEqual(self.LatestResult(), (self.buildIds[0], 1.0))
+
+    self.db.DeleteBuilds([self.buildIds[0]])
+    self.assertIsNone(self.LatestResult())
+
+  '''
+  Test that the tables are filled from the existing records when they are
+  created for an older database.
+  '''
+  def test_LatestTablesCreate(self):
+    self.db.NewResult(self.buildIds[1], self.libraryId, 2.0, 0.0,
+        self.datasetId, self.methodId)
+    self.db.Flush()
+    self.db.con.executescript("DROP TABLE latest_builds; "
+        + "DROP TABLE latest_results;")
+
+    self.db.CreateLatestBuildsTable()
+    self.db.CreateLatestResultsTable()
+    self.assertEqual(self.LatestBuild(), self.buildIds[1])
+    self.assertEqual(self.LatestResult(), (self.buildIds[1], 2.0))
+
+  '''
+  Test that an upgrade of the packages keeps the fingerprint of the machine and
+  that every build keeps the package versions it ran with.
+  '''
+  def test_BuildMachineEnvironment(self):
+    getPackageVersions = SystemInfo.GetPackageVersions
+    try:
+      buildIds = []
+      for version in ["1.0", "2.0"]:
+        SystemInfo.fingerprint = None
+        SystemInfo.GetPackageVersions = staticmethod(lambda: {"numpy": version})
+        buildIds.append(self.db.NewBuild(self.libraryId))
+    finally:
+      SystemInfo.fingerprint = None
+      SystemInfo.GetPackageVersions = getPackageVersions
+
+    machines = [self.db.GetBuildMachine(buildId) for buildId in buildIds]
+    self.assertEqual(machines[0]["id"], machines[1]["id"])
+    self.assertEqual(machines[0]["packages"], {"numpy": "1.0"})
+    self.assertEqual(machines[1]["packages"], {"numpy": "2.0"})
+
+  '''
+  Test that the build of a worker on another machine is stored with the
+  fingerprint of the worker and isn't resumed on this machine.
+  '''
+  def test_WorkerBuild(self):
+    fingerprint = dict(SystemInfo.GetFingerprint(), id="worker",
+        packages={"numpy": "2.0"})
+    buildId = self.db.NewBuild(self.libraryId, False, fingerprint, "node1")
+
+    machine = self.db.GetBuildMachine(buildId)
+    self.assertEqual(machine["id"], "worker")
+    self.assertEqual(machine["packages"], {"numpy": "2.0"})
+    self.assertEqual(self.db.GetUnfinishedBuild(self.libraryId), buildId)
+    self.assertIsNone(self.db.GetUnfinishedBuild(self.libraryId,
+        SystemInfo.GetFingerprint()["id"]))
+
+  '''
+  Get the records of the given query with a separate connection, so only the
+  committed records are returned.
+
+  @param query - The SQL query.
+  @return List with the records.
+  '''
+  def Committed(self, query):
+    con = Database.Connect(os.path.join(self.path, "benchmark.db"))
+    try:
+      return con.execute(query).fetchall()
+    finally:
+      con.close()
+
+  '''
+  Test that the writer commits the queued statements in order on flush and on
+  close.
+  '''
+  def test_WriterFlushClose(self):
+    self.db.StartWriter(1000)
+    for time in [1.0, 2.0, 3.0]:
+      self.db.NewResult(self.buildIds[0], self.libraryId, time, 0.0,
+          self.datasetId, self.methodId)
+    self.db.NewCachedResult("key", "1", 0)
+    self.db.NewCachedResult("key", "2", 0)
+    self.assertEqual(self.Committed("SELECT time FROM results"), [])
+
+    self.db.Flush()
+    self.assertEqual(self.Committed("SELECT time FROM results ORDER BY id"),
+        [(1.0,), (2.0,), (3.0,)])
+    self.assertEqual(self.Committed("SELECT result FROM result_cache"),
+        [("2",)])
+
+    self.db.NewCachedResult("key", "3", 0)
+    self.db.NewResult(self.buildIds[1], self.libraryId, 4.0, 0.0,
+        self.datasetId, self.methodId)
+    self.db.Close()
+    self.assertEqual(self.Committed("SELECT time FROM results ORDER BY id"),
+        [(1.0,), (2.0,), (3.0,), (4.0,)])
+    self.assertEqual(self.Committed("SELECT result FROM result_cache"),
+        [("3",)])
+
+  '''
+  Test that an updated method alias is committed.
+  '''
+  def test_UpdateMethod(self):
+    self.db.UpdateMethod(self.methodId, "kmeans")
+    self.assertEqual(self.Committed("SELECT alias FROM methods"),
+        [("kmeans",)])
+
+  '''
+  Test that the sums of all methods equal the sums of every single method.
+  '''
+  def test_ResultsMethodSums(self):
+    methodIds = [self.methodId, self.db.NewMethod("PCA", "", ""),
+        self.db.NewMethod("KMEANS", "-c 5", "")]
+    otherId = self.db.NewLibrary("shogun")
+    buildIds = self.buildIds + [self.db.NewBuild(self.libraryId),
+        self.db.NewBuild(otherId)]
+
+    # The builds of the same second are ordered by the build time.
+    for i, buildId in enumerate(buildIds):
+      self.db.con.execute("UPDATE builds SET build=? WHERE id=?",
+          ("2020-01-0" + str(i + 1) + " 00:00:00", buildId))
+
+    for i, buildId in enumerate(buildIds[:2]):
+      self.db.NewResult(buildId, self.libraryId, 1.0 + i, 0.0, self.datasetId,
+          methodIds[0])
+      self.db.NewResult(buildId, self.libraryId, 0.5, 0.0, self.datasetId,
+          methodIds[0])
+    self.db.NewResult(buildIds[2], self.libraryId, 3.0, 0.0, self.datasetId,
+        methodIds[1])
+    self.db.NewResult(buildIds[3], otherId, 4.0, 0.0, self.datasetId,
+        methodIds[2])
+
+    for name in ["mlpack", "shogun", "weka"]:
+      sums = self.db.GetResultsMethodSums(name)
+      for methodId in methodIds:
+        self.assertEqual(sums.get(methodId), self.db.GetResultsMethodSum(name,
+            methodId))
+
+    self.assertEqual(self.db.GetResultsMethodSums("mlpack")[methodIds[0]],
+        (buildIds[2], [1.5, 2.5, None]))
+    self.assertEqual(self.db.GetResultsMethodSums("weka"), {})
+
+  '''
+  Test that the builds of a run which was distributed over two machines are
+  reported together.
+  '''
+  def test_RunBuilds(self):
+    datasetId = self.db.NewDataset("wine", 1, 13, 178, "csv")
+    fingerprint = dict(SystemInfo.GetFingerprint(), id="worker")
+    buildIds = [self.db.NewBuild(self.libraryId, run="run"),
+        self.db.NewBuild(self.libraryId, False, fingerprint, "node1", "run")]
+    self.db.NewResult(buildIds[0], self.libraryId, 1.0, 0.0, self.datasetId,
+        self.methodId)
+    self.db.NewResult(buildIds[1], self.libraryId, 2.0, 0.0, datasetId,
+        self.methodId)
+
+    self.assertEqual(self.LatestBuild(), buildIds[1])
+    self.assertEqual(self.db.GetBuildRun(buildIds[0]), "run")
+    for buildId in buildIds:
+      self.assertEqual([(r[1], r[3]) for r in
+          self.db.GetMethodResultsForLibary(buildId, self.methodId)],
+          [(buildIds[0], 1.0), (buildIds[1], 2.0)])
+
+    # The builds without a run only select themselves.
+    self.db.NewResult(self.buildIds[0], self.libraryId, 3.0, 0.0,
+        self.datasetId, self.methodId)
+    self.assertEqual([r[3] for r in self.db.GetMethodResultsForLibary(
+        self.buildIds[0], self.methodId)], [3.0])
+
+    # The run is a single point of the sums and the history contains the
+    # builds of both machines.
+    self.assertEqual(self.db.GetResultsSum("mlpack"), (buildIds[1],
+        [3.0, None, 3.0]))
+    self.assertEqual(self.db.GetResultsMethodSum("mlpack", self.methodId),
+        (buildIds[1], [3.0, None, 3.0]))
+    self.assertEqual(sorted(r[3] for r in self.db.GetResultsHistory()),
+        [1.0, 2.0, 3.0])
+
+  '''
+  Test the latest builds and results of a coordinated run whose cells ran on
+  the coordinator and on a worker with another fingerprint.
+  '''
+  def test_CoordinatedRun(self):
+    datasetId = self.db.NewDataset("wine", 1, 13, 178, "csv")
+    otherId = self.db.NewLibrary("shogun")
+    worker = dict(SystemInfo.GetFingerprint(), id="worker")
+    other = dict(SystemInfo.GetFingerprint(), id="other")
+
+    # An older build of a third machine.
+    buildId = self.db.NewBuild(self.libraryId, True, other, "node2")
+    self.db.NewResult(buildId, self.libraryId, 5.0, 0.0, datasetId,
+        self.methodId)
+
+    # The cells of mlpack ran on both machines, the cells of shogun only on
+    # the worker, so shogun has only the build of the worker.
+    buildIds = [self.db.NewBuild(self.libraryId, run="run"),
+        self.db.NewBuild(self.libraryId, True, worker, "node1", "run"),
+        self.db.NewBuild(otherId, True, worker, "node1", "run")]
+    self.db.NewResult(buildIds[0], self.libraryId, 1.0, 0.0, self.datasetId,
+        self.methodId)
+    self.db.NewResult(buildIds[1], self.libraryId, 2.0, 0.0, datasetId,
+        self.methodId)
+    self.db.NewResult(buildIds[2], otherId, 3.0, 0.0, datasetId,
+        self.methodId)
+
+    # A single latest build for every library, which selects the run.
+    latest = self.db.GetLatestBuilds()
+    self.assertEqual(latest, [(self.libraryId, "mlpack", buildIds[1]),
+        (otherId, "shogun", buildIds[2])])
+    self.assertEqual([r[3] for r in self.db.GetMethodResultsForLibary(
+        latest[0][2], self.methodId)], [1.0, 2.0])
+
+    # Every cell is in the latest results once, with the time of the machine
+    # which ran it in the run.
+    self.assertEqual(sorted((r[5], r[6], r[2]) for r in
+        self.db.GetLatestResults()), [("mlpack", "iris", 1.0),
+        ("mlpack", "wine", 2.0), ("shogun", "wine", 3.0)])
+
+    # The history contains the machines of the run, not the older machine.
+    self.assertEqual(sorted((r[7], r[3]) for r in
+        self.db.GetResultsHistory()), [("mlpack", 1.0), ("mlpack", 2.0),
+        ("shogun", 3.0)])
+
+class Retention_Test(unittest.TestCase):
+
+  # The dates of the builds, the latest build first.
+  dates = ["2020-03-10", "2020-03-05", "2020-02-20", "2020-02-11",
+      "2020-02-10", "2020-02-03", "2020-01-15", "2020-01-02"]
+
+  '''
+  Create a database with the builds of two libraries, every build has a result,
+  the trial results and a metric.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    self.libraryId = self.db.NewLibrary("mlpack")
+    self.otherId = self.db.NewLibrary("shogun")
+    self.datasetId = self.db.NewDataset("iris", 1, 4, 150, "csv")
+    self.methodId = self.db.NewMethod("KMEANS", "-c 3", "")
+
+    # The builds are created in order, the latest build has the highest id.
+    self.buildIds = {}
+    for date in reversed(Retention_Test.dates):
+      self.buildIds[date] = self.NewBuild(self.libraryId, date)
+    self.otherBuildId = self.NewBuild(self.otherId, "2019-12-01")
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Create a build with the records of a cell.
+
+  @param libraryId - The id of the library.
+  @param date - The date of the build.
+  @return The build id.
+  '''
+  def NewBuild(self, libraryId, date):
+    buildId = self.db.NewBuild(libraryId)
+    self.db.con.execute("UPDATE builds SET build=? WHERE id=?",
+        (date + " 12:00:00", buildId))
+    self.db.NewResult(buildId, libraryId, float(buildId), 0.0, self.datasetId,
+        self.methodId)
+    self.db.NewTrialResults(buildId, libraryId, self.datasetId,
+        self.methodId, [1.0, 2.0], [])
+    self.db.NewMetricResult(buildId, libraryId, {"ACC": 1.0}, self.datasetId,
+        self.methodId)
+    return buildId
+
+  '''
+  Get the ids of the builds of the given dates.
+
+  @param dates - The dates of the builds.
+  @return The sorted list of the build ids.
+  '''
+  def Builds(self, dates):
+    return sorted(self.buildIds[date] for date in dates)
+
+  '''
+  Get the number of records of the given builds in every child table.
+
+  @param buildIds - The ids of the builds.
+  @return Dictionary with the table name and the number of records.
+  '''
+  def Records(self, buildIds):
+    counts = {}
+    for table in ["results", "trial_results", "metrics", "build_summary"]:
+      self.db.cur.execute("SELECT COUNT(*) FROM " + table + " WHERE build_id "
+          + "IN (" + ",".join("?" * len(buildIds)) + ")", buildIds)
+      counts[table] = self.db.cur.fetchall()[0][0]
+    return counts
+
+  '''
+  Test that the latest builds of every library are kept.
+  '''
+  def test_Keep(self):
+    self.assertEqual(self.db.GetExpiredBuilds(2, None),
+        self.Builds(Retention_Test.dates[2:]))
+    self.assertEqual(self.db.GetExpiredBuilds(8, None), [])
+    self.assertEqual(self.db.GetExpiredBuilds(0, None),
+        sorted(list(self.buildIds.values()) + [self.otherBuildId]))
+
+  '''
+  Test that the latest build of every month is kept.
+  '''
+  def test_Month(self):
+    # 2020-02-20 and 2020-01-15 are the latest builds of their months.
+    self.assertEqual(self.db.GetExpiredBuilds(2, "month"), self.Builds(
+        ["2020-02-11", "2020-02-10", "2020-02-03", "2020-01-02"]))
+
+  '''
+  Test that the latest build of every week is kept.
+  '''
+  def test_Week(self):
+    # 2020-02-11 and 2020-02-10 are the only builds of the same week.
+    self.assertEqual(self.db.GetExpiredBuilds(2, "week"), self.Builds(
+        ["2020-02-10"]))
+
+  '''
+  Test that the archive contains the records of the builds and the referenced
+  library, dataset and method.
+  '''
+  def test_ArchiveBuilds(self):
+    expired = self.db.GetExpiredBuilds(2, "month")
+    fileName = os.path.join(self.path, "archive.jsonl.gz")
+    self.db.ArchiveBuilds(expired, fileName)
+
+    with gzip.open(fileName, "rt") as fid:
+      lines = [json.loads(line) for line in fid]
+
+    records = {}
+    for line in lines:
+      records.setdefault(line["table"], []).append(line["record"])
+
+    self.assertEqual(sorted(r["id"] for r in records["builds"]), expired)
+    self.assertEqual(len(records["results"]), len(expired))
+    self.assertEqual(len(records["trial_results"]), 2 * len(expired))
+    self.assertEqual(len(records["metrics"]), len(expired))
+    for table in ["results", "trial_results", "metrics"]:
+      self.assertEqual(set(r["build_id"] for r in records[table]),
+          set(expired))
+
+    self.assertEqual([r["name"] for r in records["libraries"]], ["mlpack"])
+    self.assertEqual([r["name"] for r in records["datasets"]], ["iris"])
+    self.assertEqual([r["name"] for r in records["methods"]], ["KMEANS"])
+    self.assertFalse(os.path.exists(fileName + ".tmp"))
+
+  '''
+  Test that the records of the removed builds are removed from the child
+  tables and the latest tables.
+  '''
+  def test_DeleteBuilds(self):
+    expired = self.db.GetExpiredBuilds(2, "month")
+    kept = sorted(set(self.buildIds.values()) - set(expired))
+    self.assertEqual(self.Records(expired), {"results": 4,
+        "trial_results": 8, "metrics": 4, "build_summary": 4})
+
+    self.db.DeleteBuilds(expired)
+    self.assertEqual(self.Records(expired), {"results": 0,
+        "trial_results": 0, "metrics": 0, "build_summary": 0})
+    self.assertEqual(self.Records(kept), {"results": 4, "trial_results": 8,
+        "metrics": 4, "build_summary": 4})
+    self.assertEqual(self.db.GetLatestBuilds(), [(self.libraryId, "mlpack",
+        self.buildIds["2020-03-10"]), (self.otherId, "shogun",
+        self.otherBuildId)])
+    self.assertEqual([(r[4], r[2]) for r in self.db.GetLatestResults()],
+        [(self.libraryId, float(self.buildIds["2020-03-10"])),
+        (self.otherId, float(self.otherBuildId))])
+
+    # The latest tables are empty once all builds of the library are removed.
+    self.db.DeleteBuilds(kept)
+    self.assertEqual(self.db.GetLatestBuilds(), [(self.otherId, "shogun",
+        self.otherBuildId)])
+    self.assertEqual([r[4] for r in self.db.GetLatestResults()],
+        [self.otherId])
+
+class Merge_Test(unittest.TestCase):
+
+  '''
+  Create the target database with a build of a library.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    libraryId = self.db.NewLibrary("mlpack")
+    datasetId = self.db.NewDataset("iris", 1, 4, 150, "csv")
+    methodId = self.db.NewMethod("KMEANS", "-c 3", "")
+    buildId = self.db.NewBuild(libraryId)
+    self.db.NewResult(buildId, libraryId, 1.0, 0.0, datasetId, methodId)
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Get the number of records of every table.
+
+  @return Dictionary with the table name and the number of records.
+  '''
+  def Counts(self):
+    counts = {}
+    for table in ["libraries", "datasets", "methods", "builds", "results",
+        "trial_results", "metrics"]:
+      self.db.cur.execute("SELECT COUNT(*) FROM " + table)
+      counts[table] = self.db.cur.fetchall()[0][0]
+    return counts
+
+  '''
+  Get the results with the names of the referenced records.
+
+  @return Sorted list with the records (library, dataset, method, parameters,
+  machine, time).
+  '''
+  def Results(self):
+    self.db.cur.execute("SELECT libraries.name, datasets.name, methods.name, "
+        + "methods.parameters, builds.machine, results.time FROM results JOIN "
+        + "builds ON results.build_id = builds.id JOIN libraries ON "
+        + "results.libary_id = libraries.id JOIN datasets ON "
+        + "results.dataset_id = datasets.id JOIN methods ON "
+        + "results.method_id = methods.id")
+    return sorted(self.db.cur.fetchall())
+
+  '''
+  Test that the shared libraries, datasets and methods are matched, the new
+  ones are added and that a second merge doesn't add records.
+  '''
+  def test_MergeDatabase(self):
+    source = Database(os.path.join(self.path, "source.db"))
+    source.CreateTables()
+
+    # The ids of the source differ from the ids of the target.
+    libraryIds = [source.NewLibrary("shogun"), source.NewLibrary("mlpack")]
+    datasetIds = [source.NewDataset("wine", 1, 13, 178, "csv"),
+        source.NewDataset("iris", 1, 4, 150, "csv")]
+    methodIds = [source.NewMethod("PCA", "", ""),
+        source.NewMethod("KMEANS", "-c 3", "")]
+    for libraryId in libraryIds:
+      buildId = source.NewBuild(libraryId, machine="node1")
+      for datasetId, methodId in zip(datasetIds, methodIds):
+        source.NewResult(buildId, libraryId, 2.0, 0.0, datasetId, methodId)
+        source.NewTrialResults(buildId, libraryId, datasetId, methodId,
+            [2.0, -2], [])
+      source.NewMetricResult(buildId, libraryId, {"ACC": 1.0}, datasetIds[1],
+          methodIds[1])
+    source.Close()
+
+    counts = self.db.MergeDatabase(os.path.join(self.path, "source.db"),
+        "source")
+    self.assertEqual(dict((table, counts[table]) for table in ["libraries",
+        "datasets", "methods", "builds", "results", "trial_results",
+        "metrics"]), {"libraries": 1, "datasets": 1, "methods": 1,
+        "builds": 2, "results": 4, "trial_results": 8, "metrics": 2})
+    self.assertEqual(self.Counts(), {"libraries": 2, "datasets": 2,
+        "methods": 2, "builds": 3, "results": 5, "trial_results": 8,
+        "metrics": 2})
+
+    host = socket.gethostname()
+    self.assertEqual(self.Results(), sorted([
+        ("mlpack", "iris", "KMEANS", "-c 3", host, 1.0),
+        ("mlpack", "iris", "KMEANS", "-c 3", "node1", 2.0),
+        ("mlpack", "wine", "PCA", "", "node1", 2.0),
+        ("shogun", "iris", "KMEANS", "-c 3", "node1", 2.0),
+        ("shogun", "wine", "PCA", "", "node1", 2.0)]))
+
+    self.db.cur.execute("SELECT status, COUNT(*) FROM trial_results GROUP BY "
+        + "status ORDER BY status")
+    self.assertEqual(self.db.cur.fetchall(), [("ok", 4), ("timeout", 4)])
+
+    # The builds are already imported.
+    counts = self.db.MergeDatabase(os.path.join(self.path, "source.db"),
+        "source")
+    self.assertEqual(sum(counts.values()), 0)
+    self.assertEqual(self.Counts()["builds"], 3)
+    self.assertEqual(len(self.Results()), 5)
+
+  '''
+  Test the merge of a database of an older schema, which doesn't have the
+  finished, machine and status columns.
+  '''
+  def test_MergeOldSchema(self):
+    con = sqlite3.connect(os.path.join(self.path, "old.db"))
+    con.executescript("""
+        CREATE TABLE libraries (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL);
+        CREATE TABLE datasets (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE, size INTEGER NOT NULL,
+            attributes INTEGER NOT NULL, instances INTEGER NOT NULL,
+            type TEXT NOT NULL);
+        CREATE TABLE methods (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL, parameters TEXT NOT NULL, alias TEXT NOT NULL);
+        CREATE TABLE builds (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            build TIMESTAMP NOT NULL, libary_id INTEGER NOT NULL);
+        CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            build_id INTEGER NOT NULL, libary_id INTEGER NOT NULL,
+            time REAL NOT NULL, var REAL NOT NULL, dataset_id INTEGER NOT NULL,
+            method_id INTEGER NOT NULL);
+        CREATE TABLE trial_results (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            build_id INTEGER NOT NULL, libary_id INTEGER NOT NULL,
+            dataset_id INTEGER NOT NULL, method_id INTEGER NOT NULL,
+            trial INTEGER NOT NULL, time REAL NOT NULL);
+
+        INSERT INTO libraries VALUES (1, 'mlpack');
+        INSERT INTO datasets VALUES (1, 'iris', 1, 4, 150, 'real');
+        INSERT INTO methods VALUES (1, 'KMEANS', '-c 3', '');
+        INSERT INTO builds VALUES (1, '2015-01-01 12:00:00', 1);
+        INSERT INTO results VALUES (1, 1, 1, 3.0, 0.0, 1, 1);
+        INSERT INTO trial_results VALUES (1, 1, 1, 1, 1, 0, 3.0);
+        INSERT INTO trial_results VALUES (2, 1, 1, 1, 1, 1, -2);
+        INSERT INTO trial_results VALUES (3, 1, 1, 1, 1, 2, -1);
+        """)
+    con.commit()
+    con.close()
+
+    counts = self.db.MergeDatabase(os.path.join(self.path, "old.db"), "old")
+    self.assertEqual((counts["libraries"], counts["builds"], counts["results"],
+        counts["trial_results"]), (0, 1, 1, 3))
+
+    self.db.cur.execute("SELECT finished, machine, fingerprint FROM builds "
+        + "WHERE build='2015-01-01 12:00:00'")
+    self.assertEqual(self.db.cur.fetchall(), [(1, "old", None)])
+    self.db.cur.execute("SELECT trial, status FROM trial_results ORDER BY "
+        + "trial")
+    self.assertEqual(self.db.cur.fetchall(), [(0, "ok"), (1, "timeout"),
+        (2, "failure")])
+    self.assertIn(("mlpack", "iris", "KMEANS", "-c 3", "old", 3.0),
+        self.Results())
+
+    counts = self.db.MergeDatabase(os.path.join(self.path, "old.db"), "old")
+    self.assertEqual(sum(counts.values()), 0)
+    self.assertEqual(self.Counts()["builds"], 2)
+
+if __name__ == '__main__':
+  unittest.main()
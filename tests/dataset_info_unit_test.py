@@ -0,0 +1,112 @@
+'''
+  @file dataset_info_unit_test.py
+  @author Marcus Edel
+
+  Test for the dataset informations stored in the datasets table.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from misc import *
+from database import *
+
+class DatasetInfo_Test(unittest.TestCase):
+
+  '''
+  Create the test datasets.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.csv = os.path.join(self.path, "test_train.csv")
+    with open(self.csv, "w") as fid:
+      fid.write("1,0,3\n0,0.0,2\n4,5,6")
+
+    self.arff = os.path.join(self.path, "test.arff")
+    with open(self.arff, "w") as fid:
+      fid.write("@relation test\n@attribute a numeric\n@attribute b numeric\n"
+          + "@data\n1,0\n2,3\n")
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  '''
+  Test the informations of a csv file without a trailing newline.
+  '''
+  def test_DatasetInfoCsv(self):
+    name, size, attributes, instances, datasetType, fileSize, fileHash, \
+        sparsity, mtime = DatasetInfo(self.csv)
+
+    self.assertEqual(name, "test")
+    self.assertEqual(attributes, 3)
+    self.assertEqual(instances, 3)
+    self.assertEqual(datasetType, "real")
+    self.assertEqual(fileSize, os.path.getsize(self.csv))
+    self.assertEqual(fileHash, FileHash(self.csv))
+    self.assertAlmostEqual(sparsity, 3 / 9.0)
+
+  '''
+  Test that the header of an arff file isn't counted.
+  '''
+  def test_DatasetInfoArff(self):
+    info = DatasetInfo(self.arff)
+    self.assertEqual(info[2:5], (2, 2, "real"))
+    self.assertAlmostEqual(info[7], 0.25)
+
+  '''
+  Test that the type is always 'real', independent of the values.
+  '''
+  def test_DatasetInfoType(self):
+    strings = os.path.join(self.path, "strings.csv")
+    with open(strings, "w") as fid:
+      fid.write("a,b\nc,d\n")
+
+    self.assertEqual(DatasetInfo(self.arff)[4], "real")
+    self.assertEqual(DatasetInfo(strings)[4], "real")
+
+  '''
+  Test that the informations are only collected again if the file changed.
+  '''
+  def test_GetDatasetId(self):
+    db = Database(os.path.join(self.path, "benchmark.db"))
+    db.CreateTables()
+
+    datasetId = GetDatasetId(db, self.csv)
+    self.assertEqual(GetDatasetId(db, [self.csv]), datasetId)
+
+    with open(self.csv, "a") as fid:
+      fid.write("\n7,8,9\n")
+
+    self.assertEqual(GetDatasetId(db, self.csv), datasetId)
+    db.cur.execute("SELECT instances FROM datasets WHERE id=?", (datasetId,))
+    self.assertEqual(db.cur.fetchall()[0][0], 4)
+
+  '''
+  Test that the files which share the name of a dataset don't overwrite the
+  record of the dataset.
+  '''
+  def test_GetDatasetIdSharedName(self):
+    db = Database(os.path.join(self.path, "benchmark.db"))
+    db.CreateTables()
+
+    other = os.path.join(self.path, "test_test.csv")
+    with open(other, "w") as fid:
+      fid.write("1,2\n3,4\n5,6\n7,8\n9,10\n")
+
+    datasetId = GetDatasetId(db, self.csv)
+    for dataset in [other, self.csv, other, self.csv]:
+      self.assertEqual(GetDatasetId(db, dataset), datasetId)
+      db.cur.execute("SELECT instances, path FROM datasets WHERE id=?",
+          (datasetId,))
+      self.assertEqual(db.cur.fetchall()[0], (3, os.path.realpath(self.csv)))
+
+if __name__ == '__main__':
+  unittest.main()
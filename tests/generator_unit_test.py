@@ -0,0 +1,79 @@
+'''
+  @file generator_unit_test.py
+  @author Marcus Edel
+
+  Test for the synthetic dataset generator.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from generator import *
+
+import numpy as np
+
+class DatasetGenerator_Test(unittest.TestCase):
+
+  '''
+  Use a temporary directory for the generated datasets.
+  '''
+  def setUp(self):
+    self.path = DatasetGenerator.path
+    self.chunkSize = DatasetGenerator.chunkSize
+    DatasetGenerator.path = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(DatasetGenerator.path)
+    DatasetGenerator.path = self.path
+    DatasetGenerator.chunkSize = self.chunkSize
+
+  '''
+  Test the geometric range of the dataset sizes.
+  '''
+  def test_Sizes(self):
+    self.assertEqual(DatasetGenerator.Sizes({"start": "1e3", "stop": "1e5",
+        "num": 3}), [1000, 10000, 100000])
+    self.assertEqual(DatasetGenerator.Sizes([20, "1e1", 10]), [10, 20])
+
+  '''
+  Test the check of invalid generate blocks.
+  '''
+  def test_Check(self):
+    self.assertEqual(DatasetGenerator.Check({"kind": "uniform", "n": 10}), None)
+    self.assertNotEqual(DatasetGenerator.Check({"kind": "moons", "n": 10}),
+        None)
+    self.assertNotEqual(DatasetGenerator.Check({"kind": "uniform"}), None)
+
+  '''
+  Test that the datasets are reproducible and that the smaller dataset is the
+  first part of the larger dataset, also across the chunk boundary.
+  '''
+  def test_Files(self):
+    DatasetGenerator.chunkSize = 16
+    spec = {"kind": "gaussian_blobs", "n": [10, 40], "d": 3, "seed": 42,
+        "labels": True}
+
+    small, large = DatasetGenerator.Files(spec)
+    a = np.loadtxt(small, delimiter=",")
+    b = np.loadtxt(large, delimiter=",")
+    self.assertEqual(b.shape, (40, 4))
+    self.assertTrue((a == b[:10]).all())
+
+    os.remove(large)
+    DatasetGenerator.Files(spec)
+    self.assertTrue((np.loadtxt(large, delimiter=",") == b).all())
+
+    spec["format"] = "npy"
+    data = np.load(DatasetGenerator.Files(spec)[1])
+    self.assertTrue(np.allclose(data, b, rtol=1e-7))
+
+if __name__ == '__main__':
+  unittest.main()
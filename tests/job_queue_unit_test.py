@@ -0,0 +1,86 @@
+'''
+  @file job_queue_unit_test.py
+  @author Marcus Edel
+
+  Test for the job queue of the coordinator.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from job_queue import *
+
+class JobQueue_Test(unittest.TestCase):
+
+  '''
+  Create the queue file and the cells.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.queueFile = os.path.join(self.path, "queue.db")
+    self.cells = [{"method": "KMEANS", "library": "mlpack", "row": i}
+        for i in range(3)]
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  '''
+  Test that the results of the workers are returned once by the job key.
+  '''
+  def test_Results(self):
+    queue = JobQueue(self.queueFile)
+    keys = queue.Put(self.cells)
+    self.assertEqual(len(set(keys)), 3)
+
+    jobId, cell = queue.Claim("worker")
+    self.assertEqual(cell, self.cells[0])
+    self.assertTrue(queue.Complete(jobId, "worker", {"time": [1.0]}))
+    self.assertEqual(queue.Results(), [(keys[0], {"time": [1.0]})])
+    self.assertEqual(queue.Results(), [])
+
+  '''
+  Test that a restarted coordinator keeps the leased jobs and the results
+  which weren't delivered, and that the delivered jobs are queued again.
+  '''
+  def test_Restart(self):
+    queue = JobQueue(self.queueFile)
+    keys = queue.Put(self.cells)
+
+    jobs = [queue.Claim("worker") for i in range(3)]
+    queue.Complete(jobs[0][0], "worker", {"time": [1.0]})
+    self.assertEqual(queue.Results(), [(keys[0], {"time": [1.0]})])
+    queue.Complete(jobs[1][0], "worker", {"time": [2.0]})
+
+    # The coordinator restarts while the third job runs.
+    queue = JobQueue(self.queueFile)
+    self.assertEqual(queue.Put(self.cells), keys)
+    self.assertEqual(queue.Status(), {"pending": 1, "done": 1, "leased": 1})
+    self.assertEqual(queue.Results(), [(keys[1], {"time": [2.0]})])
+    self.assertTrue(queue.Complete(jobs[2][0], "worker", {"time": [3.0]}))
+    self.assertEqual(queue.Results(), [(keys[2], {"time": [3.0]})])
+
+    # The delivered job runs again.
+    self.assertEqual(queue.Claim("worker")[1], self.cells[0])
+
+  '''
+  Test that the explicit reset removes the jobs, a changed cell is a new job.
+  '''
+  def test_Reset(self):
+    queue = JobQueue(self.queueFile)
+    queue.Put(self.cells)
+    queue.Put([dict(self.cells[0], trials=5)])
+    self.assertEqual(queue.Status(), {"pending": 4})
+
+    queue.Reset()
+    self.assertEqual(queue.Status(), {})
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,204 @@
+'''
+  @file make_reports_unit_test.py
+  @author Marcus Edel
+
+  Test for the retention policy and the data shards of the reports.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, gzip, json
+
+# Import the util and the benchmark path, this method even works if the path
+# contains symlinks to modules.
+for folder in ['../util', '../benchmark']:
+  cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+    os.path.split(inspect.getfile(inspect.currentframe()))[0], folder)))
+  if cmd_subfolder not in sys.path:
+    sys.path.insert(0, cmd_subfolder)
+
+from database import *
+from make_reports import ApplyRetention, ExportShards
+
+class ApplyRetention_Test(unittest.TestCase):
+
+  '''
+  Create a database with a build of every month of a library, every build has
+  a result.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.archive = os.path.join(self.path, "archive")
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    self.libraryId = self.db.NewLibrary("mlpack")
+    datasetId = self.db.NewDataset("iris", 1, 4, 150, "csv")
+    methodId = self.db.NewMethod("KMEANS", "-c 3", "")
+
+    self.buildIds = []
+    for date in ["2020-01-10", "2020-01-20", "2020-02-10", "2020-03-10",
+        "2020-03-20"]:
+      buildId = self.db.NewBuild(self.libraryId)
+      self.db.con.execute("UPDATE builds SET build=? WHERE id=?",
+          (date + " 12:00:00", buildId))
+      self.db.NewResult(buildId, self.libraryId, 1.0, 0.0, datasetId,
+          methodId)
+      self.buildIds.append(buildId)
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Get the ids of the builds in the database.
+
+  @return The sorted list of the build ids.
+  '''
+  def Builds(self):
+    self.db.cur.execute("SELECT id FROM builds ORDER BY id")
+    return [row[0] for row in self.db.cur.fetchall()]
+
+  '''
+  Test that the dropped builds are archived and removed.
+  '''
+  def test_ApplyRetention(self):
+    ApplyRetention(self.db, {"keep": 1, "period": "month",
+        "archive": self.archive})
+
+    # The latest build and the latest older build of every month are kept.
+    self.assertEqual(self.Builds(), self.buildIds[1:])
+
+    archives = os.listdir(self.archive)
+    self.assertEqual(len(archives), 1)
+    with gzip.open(os.path.join(self.archive, archives[0]), "rt") as fid:
+      lines = [json.loads(line) for line in fid]
+    self.assertEqual(sorted(l["record"]["id"] for l in lines
+        if l["table"] == "builds"), [self.buildIds[0]])
+    self.assertEqual(len([l for l in lines if l["table"] == "results"]), 1)
+
+    # The policy is stable, a second run doesn't drop more builds.
+    ApplyRetention(self.db, {"keep": 1, "period": "month",
+        "archive": self.archive})
+    self.assertEqual(self.Builds(), self.buildIds[1:])
+    self.assertEqual(len(os.listdir(self.archive)), 1)
+
+  '''
+  Test that the builds are removed without an archive and that the policy
+  without a period keeps only the latest builds.
+  '''
+  def test_ApplyRetentionNoArchive(self):
+    ApplyRetention(self.db, {"keep": 2, "period": "None", "archive": None})
+    self.assertEqual(self.Builds(), self.buildIds[3:])
+    self.assertFalse(os.path.exists(self.archive))
+
+  '''
+  Test that an unknown period doesn't remove any build.
+  '''
+  def test_ApplyRetentionUnknownPeriod(self):
+    ApplyRetention(self.db, {"keep": 1, "period": "year",
+        "archive": self.archive})
+    self.assertEqual(self.Builds(), self.buildIds)
+
+class ExportShards_Test(unittest.TestCase):
+
+  '''
+  Create a database with the results and metrics of two methods, the names
+  contain characters which aren't safe in a file name.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    libraryIds = [self.db.NewLibrary("mlpack"), self.db.NewLibrary("shogun")]
+    datasetIds = [self.db.NewDataset("iris", 1, 4, 150, "csv"),
+        self.db.NewDataset("wine data/1", 1, 13, 178, "csv")]
+    methodIds = [self.db.NewMethod("KMEANS", "-c 3", ""),
+        self.db.NewMethod("ALL KNN", "-k 3", "")]
+
+    for libraryId in libraryIds:
+      buildId = self.db.NewBuild(libraryId)
+      for datasetId in datasetIds:
+        for methodId in methodIds:
+          self.db.NewResult(buildId, libraryId, 1.0, 0.0, datasetId, methodId)
+        self.db.NewMetricResult(buildId, libraryId, {"ACC": 1.0}, datasetId,
+            methodIds[0])
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Load the shard which the reports request with the given name (see loadShard
+  in benchmarks.js). The reports are served from the parent directory of the
+  data directory.
+
+  @param name - The name of the shard.
+  @return The data of the shard.
+  '''
+  def LoadShard(self, name):
+    fileName = os.path.join(self.path, "reports", "data/" + name + ".json.gz")
+    with open(fileName, "rb") as fid:
+      self.assertEqual(fid.read(2), b"\x1f\x8b")
+    with gzip.open(fileName, "rt") as fid:
+      return json.load(fid)
+
+  '''
+  Test that the request paths of benchmarks.js are the ones the test uses.
+  '''
+  def test_ShardRequests(self):
+    js = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+        "../reports/js/benchmarks.js")
+    with open(js, "r") as fid:
+      source = fid.read()
+
+    self.assertIn("xhr.open('GET', 'data/' + name + '.json.gz', true);",
+        source)
+    self.assertIn('loadShard("index", ', source)
+    self.assertIn('loadShard("dataset/" + shardIndex.datasets[dataset][0], '
+        + "callback);", source)
+    self.assertIn('loadShard(view + "/" + shardIndex.shards[method], '
+        + "callback);", source)
+
+  '''
+  Test that every shard requested by the reports is valid gzip JSON and that
+  every written shard is requested.
+  '''
+  def test_ExportShards(self):
+    ExportShards(self.db, os.path.join(self.path, "reports", "data/"))
+
+    index = self.LoadShard("index")
+    self.assertEqual(index["libraries"], ["mlpack", "shogun"])
+    self.assertEqual(sorted(index["shards"].keys()), ["ALL KNN", "KMEANS"])
+    self.assertEqual(sorted(index["datasets"].keys()), ["iris", "wine data/1"])
+
+    requested = set(["index"])
+    for dataset, (name, hasMetric) in index["datasets"].items():
+      shard = self.LoadShard("dataset/" + name)
+      requested.add("dataset/" + name)
+      self.assertTrue(hasMetric)
+      self.assertEqual(len(shard["runtime"]), 4)
+      self.assertEqual(len(shard["metric"]), 2)
+
+    for method in index["shards"]:
+      views = ["runtime", "historical"] + (["metric"] if method in
+          index["metric"] else [])
+      for view in views:
+        shard = self.LoadShard(view + "/" + index["shards"][method])
+        requested.add(view + "/" + index["shards"][method])
+        self.assertEqual(list(shard.keys()), [p for p, count in
+            index["runtime"][method]])
+
+    # The names are safe file names, no shard is written outside of its view.
+    written = set()
+    for root, dirs, files in os.walk(os.path.join(self.path, "reports",
+        "data")):
+      for f in files:
+        name = os.path.relpath(os.path.join(root, f), os.path.join(self.path,
+            "reports", "data"))
+        written.add(name[:-len(".json.gz")])
+    self.assertEqual(written, requested)
+
+if __name__ == '__main__':
+  unittest.main()
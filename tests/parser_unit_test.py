@@ -0,0 +1,132 @@
+'''
+  @file parser_unit_test.py
+  @author Marcus Edel
+
+  Test for the config file check.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from parser import *
+
+class CheckConfig_Test(unittest.TestCase):
+
+  '''
+  Create the datasets, the scripts and the config streams.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.manifest = os.environ.get("DATASET_MANIFEST")
+    os.environ["DATASET_MANIFEST"] = os.path.join(self.path, "manifest.json")
+
+    self.datasets = []
+    for i in range(3):
+      dataset = os.path.join(self.path, "test" + str(i) + ".csv")
+      with open(dataset, "w") as fid:
+        fid.write(str(i) + ",1,2\n3,4,5\n")
+      self.datasets.append(dataset)
+    self.missing = os.path.join(self.path, "missing.csv")
+
+    self.script = os.path.join(self.path, "test.py")
+    with open(self.script, "w") as fid:
+      fid.write("class TEST(object):\n  def RunTiming(self, options):\n" +
+          "    return 1\n\nclass NORUN(object):\n  pass\n")
+
+    methods = {
+        "TEST": {"script": self.script, "format": ["csv"],
+            "datasets": [{"files": self.datasets[:2], "options": ""},
+                         {"files": [self.datasets[0]], "options": "-k 1"}]},
+        "NORUN": {"script": self.script, "format": ["csv"],
+            "datasets": [{"files": [self.datasets[2]], "options": ""}]},
+        "MISSING": {"script": os.path.join(self.path, "missing.py"),
+            "format": ["csv"],
+            "datasets": [{"files": [self.missing], "options": ""}]}}
+    self.streams = [{"library": "test", "methods": methods}]
+
+  def tearDown(self):
+    if self.manifest is None:
+      del os.environ["DATASET_MANIFEST"]
+    else:
+      os.environ["DATASET_MANIFEST"] = self.manifest
+    shutil.rmtree(self.path)
+
+  '''
+  Run the config check.
+
+  @param jobs - The number of datasets and scripts to check concurrently.
+  @param checksums - If True compute the content hash of the datasets.
+  @return Tuple with the verdict and the set of scripts which aren't callable.
+  '''
+  def Check(self, jobs, checksums=True):
+    # The streams are set directly, the config file isn't loaded.
+    config = Parser(os.path.join(self.path, "config.yaml"), verbose=False)
+    config.streams = self.streams
+
+    notCallable = set()
+    config.CallableMethodWarnMsg = lambda name, script, streamNum: \
+        notCallable.add((name, script))
+    return (config.CheckConfig(jobs, checksums), notCallable)
+
+  '''
+  Run the serial checks of every dataset and script.
+
+  @return Tuple with the verdict and the set of scripts which aren't callable.
+  '''
+  def CheckSerial(self):
+    config = Parser(os.path.join(self.path, "config.yaml"), verbose=False)
+
+    available = True
+    notCallable = set()
+    for name, method in self.streams[0]["methods"].items():
+      for dataset in method["datasets"]:
+        available = config.CheckIfAvailable(dataset["files"]) and available
+      if not config.CheckIfCallable(name, method["script"]):
+        notCallable.add((name, method["script"]))
+    return (available, notCallable)
+
+  '''
+  Test that the concurrent check gives the verdicts of the serial check, with
+  and without the checksums.
+  '''
+  def test_CheckConfig(self):
+    serial = self.CheckSerial()
+    self.assertEqual(serial, (False, set([("NORUN", self.script),
+        ("MISSING", os.path.join(self.path, "missing.py"))])))
+
+    for jobs in (1, 4):
+      for checksums in (True, False):
+        self.assertEqual(self.Check(jobs, checksums), serial)
+
+    # All datasets are available without the missing dataset.
+    del self.streams[0]["methods"]["MISSING"]
+    self.assertTrue(self.CheckSerial()[0])
+    self.assertTrue(self.Check(4, False)[0])
+    self.assertTrue(self.Check(4, True)[0])
+
+  '''
+  Test that the manifest only contains the checksums if they are computed.
+  '''
+  def test_SkipChecksums(self):
+    self.Check(4, False)
+    entries = DatasetManifest.Default().entries
+    self.assertEqual(sorted(entries.keys()), sorted(os.path.realpath(d) for d
+        in self.datasets))
+    self.assertTrue(all(e["hash"] is None for e in entries.values()))
+
+    self.Check(4, True)
+    entries = DatasetManifest.Default().entries
+    for dataset in self.datasets:
+      self.assertEqual(entries[os.path.realpath(dataset)]["hash"],
+          FileHash(dataset))
+
+if __name__ == '__main__':
+  unittest.main()
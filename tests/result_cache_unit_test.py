@@ -0,0 +1,77 @@
+'''
+  @file result_cache_unit_test.py
+  @author Marcus Edel
+
+  Test for the result cache.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from database import *
+from result_cache import *
+
+class ResultCache_Test(unittest.TestCase):
+
+  '''
+  Create the database, the script and the dataset of the test cell.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+    self.cache = ResultCache(self.db)
+
+    script = os.path.join(self.path, "kmeans.py")
+    dataset = os.path.join(self.path, "iris.csv")
+    for f in [script, dataset]:
+      with open(f, "w") as fid:
+        fid.write(f)
+
+    self.cell = {"method": "KMEANS", "options": "-c 3", "library": "mlpack",
+        "tasks": ["timing"], "trials": 3, "bootstrap": None,
+        "adaptive": None, "threads": None, "timeout": 10, "script": script,
+        "dataset": dataset}
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Test that the result of an unchanged cell is reused.
+  '''
+  def test_Hit(self):
+    key = self.cache.Key(self.cell)
+    self.cache.Put(key, {"time": [1.0, 1.0, 1.0]})
+    self.assertEqual(self.cache.Key(dict(self.cell)), key)
+    self.assertEqual(self.cache.Get(key), {"time": [1.0, 1.0, 1.0]})
+
+  '''
+  Test that a failed cell isn't cached.
+  '''
+  def test_Failure(self):
+    key = self.cache.Key(self.cell)
+    self.cache.Put(key, {"time": [-1]})
+    self.assertIsNone(self.cache.Get(key))
+
+  '''
+  Test that a cached timeout is only reused with the same timeout.
+  '''
+  def test_Timeout(self):
+    key = self.cache.Key(self.cell)
+    self.cache.Put(key, {"time": [-2]})
+    self.assertEqual(self.cache.Get(key), {"time": [-2]})
+
+    key = self.cache.Key(dict(self.cell, timeout=100))
+    self.assertIsNone(self.cache.Get(key))
+
+if __name__ == '__main__':
+  unittest.main()
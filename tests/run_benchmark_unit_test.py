@@ -0,0 +1,220 @@
+'''
+  @file run_benchmark_unit_test.py
+  @author Marcus Edel
+
+  Test for the update path, the resume and the trials of the benchmark runner.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, multiprocessing
+
+# Import the util and the benchmark path, this method even works if the path
+# contains symlinks to modules.
+for folder in ['../util', '../benchmark']:
+  cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+    os.path.split(inspect.getfile(inspect.currentframe()))[0], folder)))
+  if cmd_subfolder not in sys.path:
+    sys.path.insert(0, cmd_subfolder)
+
+from database import *
+from cache import ConversionCache
+from run_benchmark import GetUpdateBuild, ResumeCell, RunTrials, RunRemoteCell
+
+import run_benchmark
+
+import timer
+
+class RunBenchmark_Test(unittest.TestCase):
+
+  '''
+  Create a database with a build of a single cell.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.db = Database(os.path.join(self.path, "benchmark.db"))
+    self.db.CreateTables()
+
+    self.libraryId = self.db.NewLibrary("mlpack")
+    self.datasetId = self.db.NewDataset("iris", 1, 4, 150, "csv")
+    self.methodId = self.db.NewMethod("KMEANS", "-c 3", "")
+    self.buildId = self.db.NewBuild(self.libraryId)
+    self.db.NewResult(self.buildId, self.libraryId, 1.0, 0.0, self.datasetId,
+        self.methodId, 2)
+    self.db.NewTrialResults(self.buildId, self.libraryId, self.datasetId,
+        self.methodId, [1.0, 1.0], [])
+
+  def tearDown(self):
+    self.db.Close()
+    shutil.rmtree(self.path)
+
+  '''
+  Update the result of a cell the same way the runner does with UPDATE=True.
+
+  @param buildId - The id of the updated build.
+  '''
+  def Update(self, buildId):
+    self.db.UpdateResult(buildId, self.libraryId, 2.0, 0.0, self.datasetId,
+        self.methodId, 3)
+    self.db.DeleteTrialResults(buildId, self.libraryId, self.datasetId,
+        self.methodId)
+    self.db.DeleteThreadResults(buildId, self.libraryId, self.datasetId,
+        self.methodId)
+    self.db.NewTrialResults(buildId, self.libraryId, self.datasetId,
+        self.methodId, [2.0, 2.0, 2.0], [])
+    self.db.DeleteComplexityResults(buildId, self.libraryId, self.datasetId,
+        self.methodId)
+
+  '''
+  Test that the latest build is updated in place.
+  '''
+  def test_UpdateLatestBuild(self):
+    buildId = GetUpdateBuild(self.db, self.libraryId, False)
+    self.assertEqual(buildId, self.buildId)
+
+    self.Update(buildId)
+    result = self.db.GetResult(buildId, self.libraryId, self.datasetId,
+        self.methodId)
+    self.assertEqual(len(result), 1)
+    self.assertEqual(result[0][3], 2.0)
+    self.assertEqual(len(self.db.GetTrialResults(buildId, self.libraryId,
+        self.datasetId, self.methodId)), 3)
+
+  '''
+  Test that the latest build is copied into a new build before the update.
+  '''
+  def test_UpdateNewBuild(self):
+    buildId = GetUpdateBuild(self.db, self.libraryId, True)
+    self.assertNotEqual(buildId, self.buildId)
+
+    self.Update(buildId)
+    self.assertEqual(self.db.GetResult(buildId, self.libraryId,
+        self.datasetId, self.methodId)[0][3], 2.0)
+    self.assertEqual(self.db.GetResult(self.buildId, self.libraryId,
+        self.datasetId, self.methodId)[0][3], 1.0)
+
+  '''
+  Test that there is nothing to update without a build.
+  '''
+  def test_UpdateWithoutBuild(self):
+    libraryId = self.db.NewLibrary("scikit")
+    self.assertIsNone(GetUpdateBuild(self.db, libraryId, False))
+    self.assertIsNone(GetUpdateBuild(self.db, libraryId, True))
+
+  '''
+  Test that the trials don't report the resource usage of an earlier cell.
+  '''
+  def test_RunTrialsUsage(self):
+    class Method(object):
+      def RunTiming(self, options):
+        return 1.0
+
+    timer.lastUsage = {"maxrss": -1}
+    time, usage = RunTrials({"adaptive": None, "trials": 2,
+        "options": {}}, Method(), False)
+    self.assertEqual(time, [1.0, 1.0])
+    self.assertEqual(len(usage), 2)
+    self.assertTrue(all(trial != {"maxrss": -1} for trial in usage))
+
+  '''
+  Run a build of the given cells in a child process which is killed while the
+  last cell runs: the timing of the last cell is written, the metric isn't.
+
+  @param datasetIds - The datasets of the cells.
+  '''
+  def KilledRun(self, datasetIds):
+    db = Database(os.path.join(self.path, "benchmark.db"))
+    db.StartWriter()
+    buildId = db.NewBuild(self.libraryId, finished=False)
+    for datasetId in datasetIds:
+      db.NewResult(buildId, self.libraryId, 1.0, 0.0, datasetId,
+          self.methodId, 2)
+      db.NewTrialResults(buildId, self.libraryId, datasetId, self.methodId,
+          [1.0, 1.0], [])
+      db.Flush()
+      if datasetId == datasetIds[-1]:
+        db.NewMetricResult(buildId, self.libraryId, "{}", datasetId,
+            self.methodId)
+        os._exit(1)
+
+      db.NewMetricResult(buildId, self.libraryId, "{}", datasetId,
+          self.methodId)
+      db.NewJournalEntry(buildId, self.libraryId, datasetId, self.methodId)
+      db.Flush()
+
+  '''
+  Test that a killed run resumes into the same build, skips the finished cells
+  and runs the partially written and the remaining cells again.
+  '''
+  def test_ResumeKilledRun(self):
+    datasetIds = [self.datasetId] + [self.db.NewDataset(name, 1, 4, 150,
+        "csv") for name in ["wine", "cloud"]]
+
+    process = multiprocessing.Process(target=self.KilledRun,
+        args=(datasetIds[:2],))
+    process.start()
+    process.join(60)
+    self.assertEqual(process.exitcode, 1)
+
+    buildId = self.db.GetUnfinishedBuild(self.libraryId)
+    self.assertIsNotNone(buildId)
+    self.assertNotEqual(buildId, self.buildId)
+
+    tasks = ["timing", "metric"]
+    self.assertFalse(ResumeCell(self.db, buildId, self.libraryId,
+        datasetIds[0], self.methodId, tasks))
+    self.assertEqual(len(self.db.GetResult(buildId, self.libraryId,
+        datasetIds[0], self.methodId)), 1)
+
+    self.assertTrue(ResumeCell(self.db, buildId, self.libraryId,
+        datasetIds[1], self.methodId, tasks))
+    self.assertEqual(self.db.GetResult(buildId, self.libraryId,
+        datasetIds[1], self.methodId), [])
+    self.assertEqual(self.db.GetTrialResults(buildId, self.libraryId,
+        datasetIds[1], self.methodId), [])
+
+    self.assertTrue(ResumeCell(self.db, buildId, self.libraryId,
+        datasetIds[2], self.methodId, tasks))
+
+    # The finished build isn't resumed again.
+    self.db.FinishBuild(buildId)
+    self.assertIsNone(self.db.GetUnfinishedBuild(self.libraryId))
+
+  '''
+  Test that a worker converts the missing dataset of a cell with the conversion
+  cache budget of the coordinator.
+  '''
+  def test_RunRemoteCellConversionBudget(self):
+    dataset = os.path.join(self.path, "iris.csv")
+    with open(dataset, "w") as fid:
+      fid.write("1,2,3\n4,5,6\n")
+
+    cell = {"dataset": dataset, "format": ["arff"],
+        "modifiedDataset": os.path.join(self.path, "missing", "iris.arff"),
+        "conversionCacheSize": 0.5}
+
+    budgets = []
+    default, runCell = ConversionCache.Default, run_benchmark.RunCell
+    conversionCache = os.environ.get("CONVERSION_CACHE")
+    try:
+      os.environ["CONVERSION_CACHE"] = os.path.join(self.path, "converted")
+      ConversionCache.Default = staticmethod(lambda budget=0:
+          budgets.append(budget) or default(budget))
+      run_benchmark.RunCell = lambda cell: {"dataset": cell["modifiedDataset"]}
+      result = RunRemoteCell(cell)
+    finally:
+      ConversionCache.Default = staticmethod(default)
+      run_benchmark.RunCell = runCell
+      if conversionCache is None:
+        del os.environ["CONVERSION_CACHE"]
+      else:
+        os.environ["CONVERSION_CACHE"] = conversionCache
+
+    self.assertEqual(budgets, [0.5])
+    self.assertTrue(result["dataset"].startswith(os.path.join(self.path,
+        "converted")))
+    self.assertTrue(os.path.isfile(result["dataset"]))
+    self.assertEqual(result["fingerprint"], SystemInfo.GetFingerprint())
+
+if __name__ == '__main__':
+  unittest.main()
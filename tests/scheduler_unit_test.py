@@ -0,0 +1,133 @@
+'''
+  @file scheduler_unit_test.py
+  @author Marcus Edel
+
+  Test for the cell scheduler.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile, time
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from scheduler import *
+
+'''
+Run a test cell in the child process of the scheduler.
+
+@param cell - The cell, the cell index.
+@return Tuple with the cell index, the working directory, the cores and the
+start and end time of the cell.
+'''
+def RunTestCell(cell):
+  start = time.time()
+  time.sleep(0.2)
+  return (cell, os.getcwd(), sorted(os.sched_getaffinity(0)), start,
+      time.time())
+
+class Scheduler_Test(unittest.TestCase):
+
+  '''
+  Create the benchmark root of the sandboxes.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    os.mkdir(os.path.join(self.path, "datasets"))
+    with open(os.path.join(self.path, "config.yaml"), "w") as fid:
+      fid.write("library: test\n")
+
+    self.cwd = os.getcwd()
+    self.affinity = os.sched_getaffinity(0)
+    self.environ = dict(os.environ)
+
+  def tearDown(self):
+    os.chdir(self.cwd)
+    os.sched_setaffinity(0, self.affinity)
+    os.environ.clear()
+    os.environ.update(self.environ)
+    shutil.rmtree(self.path)
+
+  '''
+  Test that the cores are split into disjoint sets of the requested size.
+  '''
+  def test_ReserveCores(self):
+    getaffinity = os.sched_getaffinity
+    try:
+      os.sched_getaffinity = lambda pid: set(range(7))
+      self.assertEqual(Scheduler.ReserveCores(2, 2), [[0, 1], [2, 3]])
+      self.assertEqual(Scheduler.ReserveCores(5, 2), [[0, 1], [2, 3], [4, 5]])
+      self.assertEqual(Scheduler.ReserveCores(2, 8), [])
+
+      scheduler = Scheduler(5, 3)
+      self.assertEqual(scheduler.jobs, 2)
+      self.assertEqual(scheduler.slots, [[0, 1, 2], [3, 4, 5]])
+    finally:
+      os.sched_getaffinity = getaffinity
+
+  '''
+  Test that the sandbox mirrors the benchmark root.
+  '''
+  def test_CreateSandbox(self):
+    sandbox = Scheduler.CreateSandbox(self.path)
+    try:
+      self.assertEqual(sorted(os.listdir(sandbox)), ["config.yaml",
+          "datasets"])
+      self.assertTrue(os.path.islink(os.path.join(sandbox, "datasets")))
+      self.assertEqual(os.path.realpath(os.path.join(sandbox, "datasets")),
+          os.path.realpath(os.path.join(self.path, "datasets")))
+    finally:
+      shutil.rmtree(sandbox)
+
+  '''
+  Test that the cells run on the reserved cores in their own sandbox, that a
+  finished cell releases its cores for the next cell and that the sandboxes
+  are removed.
+  '''
+  def test_Run(self):
+    os.chdir(self.path)
+    cores = sorted(os.sched_getaffinity(0))
+    scheduler = Scheduler()
+    scheduler.slots = [cores[:1], cores[-1:]]
+    scheduler.jobs = 2
+
+    results = []
+    scheduler.Run(list(range(5)), RunTestCell,
+        lambda cell, result: results.append(result))
+
+    self.assertEqual(sorted(result[0] for result in results), list(range(5)))
+    for cell, sandbox, affinity, start, end in results:
+      self.assertIn(affinity, scheduler.slots)
+      self.assertTrue(os.path.basename(sandbox).startswith("benchmark_cell_"))
+      self.assertFalse(os.path.exists(sandbox))
+
+    # No more cells than slots run at the same time.
+    for result in results:
+      running = [r for r in results if r[3] <= result[3] < r[4]]
+      self.assertLessEqual(len(running), 2)
+
+  '''
+  Test that the thread settings are set for the cell and restored afterwards.
+  '''
+  def test_SetThreads(self):
+    os.environ["OMP_NUM_THREADS"] = "8"
+    os.environ.pop("MKL_NUM_THREADS", None)
+    cores = sorted(os.sched_getaffinity(0))
+
+    previous = Scheduler.SetThreads(1, cores)
+    for variable in Scheduler.threadVariables:
+      self.assertEqual(os.environ[variable], "1")
+    self.assertEqual(sorted(os.sched_getaffinity(0)), cores[:1])
+
+    Scheduler.ResetThreads(previous, cores)
+    self.assertEqual(os.environ["OMP_NUM_THREADS"], "8")
+    self.assertNotIn("MKL_NUM_THREADS", os.environ)
+    self.assertEqual(sorted(os.sched_getaffinity(0)), cores)
+
+if __name__ == '__main__':
+  unittest.main()
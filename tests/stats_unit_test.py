@@ -0,0 +1,91 @@
+'''
+  @file stats_unit_test.py
+  @author Marcus Edel
+
+  Test for the statistic functions used to summarize the trials.
+'''
+
+import unittest
+
+import os, sys, inspect
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from stats import *
+
+class Stats_Test(unittest.TestCase):
+
+  '''
+  Test the median of an odd and an even number of values.
+  '''
+  def test_Median(self):
+    self.assertEqual(Median([3, 1, 2]), 2)
+    self.assertEqual(Median([4, 1, 3, 2]), 2.5)
+    self.assertEqual(Median([]), None)
+
+  '''
+  Test the nearest-rank percentile and the median absolute deviation; the
+  outlier doesn't change the deviation.
+  '''
+  def test_PercentileMedianAbsoluteDeviation(self):
+    values = [float(i) for i in range(1, 11)]
+    self.assertEqual(Percentile(values, 90), 9.0)
+    self.assertEqual(Percentile(values, 100), 10.0)
+    self.assertEqual(Percentile([3.0], 90), 3.0)
+    self.assertEqual(Percentile([], 90), None)
+    self.assertEqual(MedianAbsoluteDeviation([1, 2, 3, 4, 100]), 1)
+    self.assertEqual(MedianAbsoluteDeviation([]), None)
+
+  '''
+  Test the confidence interval of the median. Five values can't reach the 95%
+  level, six values give the full range (coverage 1 - 2/64).
+  '''
+  def test_MedianConfidenceInterval(self):
+    self.assertEqual(MedianConfidenceInterval([1, 2, 3, 4, 5]), None)
+    self.assertEqual(MedianConfidenceInterval([6, 1, 5, 2, 4, 3]), (1, 6))
+    self.assertEqual(MedianConfidenceInterval(list(range(100))), (39, 60))
+
+  '''
+  Test the relative width check.
+  '''
+  def test_IsMedianStable(self):
+    self.assertTrue(IsMedianStable([1.0, 1.01, 0.99, 1.0, 1.02, 0.98], 0.05))
+    self.assertFalse(IsMedianStable([1.0, 2.0, 0.5, 1.0, 3.0, 0.2], 0.05))
+    self.assertFalse(IsMedianStable([1.0, 1.0], 0.05))
+
+  '''
+  Test the speedup and the efficiency curve, the second dataset only has one
+  thread count and a failed measurement.
+  '''
+  def test_ScalingCurve(self):
+    curve = ScalingCurve({"a": {1: 8.0, 2: 4.0, 4: 4.0},
+                          "b": {1: 2.0, 2: 2.0, 4: "failure"}})
+    self.assertEqual([n for n, s, e in curve], [1, 2, 4])
+    self.assertAlmostEqual(curve[0][1], 1.0)
+    self.assertAlmostEqual(curve[1][1], 2 ** 0.5)
+    self.assertAlmostEqual(curve[1][2], 2 ** 0.5 / 2)
+    self.assertAlmostEqual(curve[2][1], 2.0)
+    self.assertAlmostEqual(curve[2][2], 0.5)
+
+  '''
+  Test the log-log fit of the scaling exponent; the quadratic times give the
+  exponent two, the noisy times a confidence interval around the exponent.
+  '''
+  def test_LogLogFit(self):
+    exponent, low, high, intercept = LogLogFit([(10, 1.0), (20, 4.0),
+        (40, 16.0), (80, 64.0)])
+    self.assertAlmostEqual(exponent, 2.0)
+    self.assertAlmostEqual(Extrapolate(exponent, intercept, 160), 256.0)
+
+    exponent, low, high, intercept = LogLogFit([(10, 1.1), (20, 1.9),
+        (40, 4.2), (80, 7.8)])
+    self.assertTrue(low < exponent < high)
+    self.assertTrue(low < 1.0 < high)
+
+    self.assertEqual(LogLogFit([(10, 1.0), (20, 2.0)])[1:3], (None, None))
+    self.assertEqual(LogLogFit([(10, 1.0), (20, -1)]), None)
@@ -27,7 +27,21 @@ modules = [
 #'benchmark_pca',
 'benchmark_range_search',
 'benchmark_sparse_coding',
-#'metrics_unit_test'
+#'metrics_unit_test',
+'stats_unit_test',
+'dataset_info_unit_test',
+'generator_unit_test',
+'convert_unit_test',
+'run_benchmark_unit_test',
+'database_unit_test',
+'scheduler_unit_test',
+'worker_unit_test',
+'cache_unit_test',
+'broker_unit_test',
+'result_cache_unit_test',
+'parser_unit_test',
+'make_reports_unit_test',
+'job_queue_unit_test'
 ]
 
 def load_tests(loader, tests, pattern):
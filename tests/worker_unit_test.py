@@ -0,0 +1,102 @@
+'''
+  @file worker_unit_test.py
+  @author Marcus Edel
+
+  Test for the warm worker pool.
+'''
+
+import unittest
+
+import os, sys, inspect, shutil, tempfile
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+import worker
+from worker import *
+
+class WorkerPool_Test(unittest.TestCase):
+
+  '''
+  Create the test script, the method returns the process id of the worker.
+  '''
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.script = os.path.join(self.path, "worker_test_script.py")
+    with open(self.script, "w") as fid:
+      fid.write("import os\n\n"
+          + "class TEST(object):\n"
+          + "  def __init__(self, dataset, timeout=0, verbose=False):\n"
+          + "    pass\n\n"
+          + "  def RunTiming(self, options):\n"
+          + "    return float(os.getpid())\n\n"
+          + "  def RunCrash(self, options):\n"
+          + "    os._exit(1)\n")
+
+    # Record the start method of the new workers.
+    self.spawn = []
+    test = self
+    class RecordWorker(Worker):
+      def __init__(self, spawn=False):
+        test.spawn.append(spawn)
+        Worker.__init__(self, spawn)
+    worker.Worker = RecordWorker
+
+  def tearDown(self):
+    worker.Worker = Worker
+    WorkerPool.Shutdown()
+    shutil.rmtree(self.path)
+
+  '''
+  Run a function of the test script in the pool.
+
+  @param library - The name of the library.
+  @param threads - The thread count of the worker.
+  @param function - The name of the function.
+  @return The return value of the function.
+  '''
+  def Call(self, library, threads=None, function="RunTiming"):
+    return WorkerPool.Call(library, self.script, "TEST", "iris.csv", function,
+        "", 60, threads)
+
+  '''
+  Test that the worker is reused for the same library and thread count.
+  '''
+  def test_Reuse(self):
+    pid = self.Call("mlpack")
+    self.assertNotEqual(pid, os.getpid())
+    self.assertEqual(self.Call("mlpack"), pid)
+    self.assertNotEqual(self.Call("scikit"), pid)
+    self.assertNotEqual(self.Call("mlpack", 2), pid)
+    self.assertEqual(sorted(WorkerPool.workers.keys(), key=str),
+        [("mlpack", 2), ("mlpack", None), ("scikit", None)])
+
+  '''
+  Test that the worker of a thread count starts a new interpreter.
+  '''
+  def test_Spawn(self):
+    self.Call("mlpack")
+    self.Call("mlpack", 2)
+    self.assertEqual(self.spawn, [False, True])
+
+  '''
+  Test that a dead worker is replaced on the next call.
+  '''
+  def test_DeadWorker(self):
+    pid = self.Call("mlpack")
+    self.assertEqual(self.Call("mlpack", function="RunCrash"), -1)
+
+    newPid = self.Call("mlpack")
+    self.assertNotEqual(newPid, pid)
+
+    WorkerPool.workers[("mlpack", None)].process.terminate()
+    WorkerPool.workers[("mlpack", None)].process.join()
+    self.assertNotEqual(self.Call("mlpack"), newPid)
+    self.assertEqual(len(self.spawn), 3)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,202 @@
+'''
+  @file broker.py
+  @author Marcus Edel
+
+  Implementation of the dataset broker which shares loaded datasets between the
+  benchmark processes.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import glob
+import errno
+import fcntl
+import hashlib
+import tempfile
+
+'''
+This class implements a broker that publishes a loaded dataset once as .npy
+file in shared memory (/dev/shm). The processes which run the timed scripts
+map the published file instead of loading the dataset into private memory.
+Every process that acquires a dataset is registered as owner; the published
+file is removed when the last owner releases the dataset or has died.
+'''
+class DatasetBroker(object):
+
+  # The shared memory directory.
+  path = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+  '''
+  Get the name of the shared dataset. The name depends on the path, the
+  modification time and the size of the dataset file.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter of the dataset file.
+  @return The name of the shared dataset.
+  '''
+  @staticmethod
+  def Name(dataset, delimiter=','):
+    stat = os.stat(dataset)
+    key = repr((os.path.realpath(dataset), delimiter, stat.st_mtime,
+        stat.st_size))
+    return "benchmark_" + hashlib.sha1(key.encode()).hexdigest()[:20]
+
+  '''
+  Get the file names of the shared dataset and the owner list.
+
+  @param name - The name of the shared dataset.
+  @return Tuple with the data file name and the owners file name.
+  '''
+  @staticmethod
+  def Files(name):
+    return (os.path.join(DatasetBroker.path, name + ".npy"),
+            os.path.join(DatasetBroker.path, name + ".owners"))
+
+  '''
+  Check if the process with the given id is running.
+
+  @param pid - The process id.
+  @return True if the process is running otherwise False.
+  '''
+  @staticmethod
+  def IsRunning(pid):
+    try:
+      os.kill(pid, 0)
+    except OSError as e:
+      return e.errno == errno.EPERM
+    return True
+
+  '''
+  Read the running owners of the shared dataset.
+
+  @param ownersFile - The owners file name.
+  @return Set of process ids.
+  '''
+  @staticmethod
+  def ReadOwners(ownersFile):
+    owners = set()
+    try:
+      with open(ownersFile, "r") as fid:
+        for line in fid:
+          if line.strip():
+            owners.add(int(line))
+    except (IOError, OSError, ValueError):
+      pass
+    return set(pid for pid in owners if DatasetBroker.IsRunning(pid))
+
+  '''
+  Write the owners of the shared dataset or remove the shared dataset if there
+  is no owner left.
+
+  @param name - The name of the shared dataset.
+  @param owners - Set of process ids.
+  '''
+  @staticmethod
+  def WriteOwners(name, owners):
+    dataFile, ownersFile = DatasetBroker.Files(name)
+    if owners:
+      with open(ownersFile, "w") as fid:
+        fid.write("\n".join(str(pid) for pid in owners) + "\n")
+    else:
+      for f in (dataFile, ownersFile):
+        if os.path.isfile(f):
+          os.remove(f)
+
+  '''
+  All broker operations hold a single lock file, so the owner lists of
+  concurrently running cells stay consistent.
+  '''
+  class Lock(object):
+    def __enter__(self):
+      self.fid = open(os.path.join(DatasetBroker.path, "benchmark_broker.lock"),
+          "a")
+      fcntl.flock(self.fid, fcntl.LOCK_EX)
+
+    def __exit__(self, type, value, traceback):
+      fcntl.flock(self.fid, fcntl.LOCK_UN)
+      self.fid.close()
+
+  '''
+  Acquire the given dataset for the calling process. The dataset is loaded
+  and published if no other process published it yet.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter of the dataset file.
+  @return The name of the shared dataset.
+  '''
+  @staticmethod
+  def Acquire(dataset, delimiter=','):
+    import numpy as np
+    from misc import LoadDataset
+    from misc import AtomicFile
+
+    name = DatasetBroker.Name(dataset, delimiter)
+    dataFile, ownersFile = DatasetBroker.Files(name)
+
+    with DatasetBroker.Lock():
+      owners = DatasetBroker.ReadOwners(ownersFile)
+      if not owners or not os.path.isfile(dataFile):
+        Log.Info("Publish dataset: " + dataset)
+        data = LoadDataset(dataset, delimiter)
+        with AtomicFile(dataFile, "wb") as fid:
+          np.save(fid, data)
+
+      owners.add(os.getpid())
+      DatasetBroker.WriteOwners(name, owners)
+
+    return name
+
+  '''
+  Release the given shared dataset for the calling process. The shared dataset
+  is removed if this was the last owner.
+
+  @param name - The name of the shared dataset.
+  '''
+  @staticmethod
+  def Release(name):
+    dataFile, ownersFile = DatasetBroker.Files(name)
+
+    with DatasetBroker.Lock():
+      owners = DatasetBroker.ReadOwners(ownersFile)
+      owners.discard(os.getpid())
+      DatasetBroker.WriteOwners(name, owners)
+
+  '''
+  Get a view of the shared dataset.
+
+  @param name - The name of the shared dataset.
+  @param readOnly - If False the view is copy-on-write, so changes stay private
+  to the calling process.
+  @return The NumPy view or None if the dataset isn't published.
+  '''
+  @staticmethod
+  def View(name, readOnly=True):
+    import numpy as np
+
+    dataFile, ownersFile = DatasetBroker.Files(name)
+    try:
+      return np.asarray(np.load(dataFile, mmap_mode="r" if readOnly else "c"))
+    except (IOError, OSError, ValueError):
+      return None
+
+  '''
+  Remove the shared datasets whose owners have all died (e.g. killed cells).
+  '''
+  @staticmethod
+  def Cleanup():
+    with DatasetBroker.Lock():
+      for ownersFile in glob.glob(os.path.join(DatasetBroker.path,
+          "benchmark_*.owners")):
+        name = os.path.splitext(os.path.basename(ownersFile))[0]
+        DatasetBroker.WriteOwners(name, DatasetBroker.ReadOwners(ownersFile))
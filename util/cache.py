@@ -0,0 +1,400 @@
+'''
+  @file cache.py
+  @author Marcus Edel
+
+  Implementation of the binary dataset cache, the converted dataset cache and
+  the dataset manifest.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+from convert import *
+
+import json
+import fcntl
+import hashlib
+import threading
+
+'''
+This class implements a cache for parsed datasets. The parsed arrays are
+stored as .npy files named by the content hash of the text file and opened
+with memory mapping, so the processes that load the same dataset share the
+pages through the page cache. A small index file per dataset path remembers
+the modification time and size of the text file, so the content hash is only
+computed if the text file changed. Only the input datasets are cached, the
+least recently used arrays are removed if the cache exceeds the disk budget.
+'''
+class DatasetCache(object):
+
+  '''
+  Create the dataset cache instance.
+
+  @param path - The cache directory.
+  @param minSize - Files smaller than this size (in bytes) are parsed directly.
+  @param budget - The disk budget in bytes, zero means no limit.
+  @param roots - The directories of the input datasets, files outside of these
+  directories (e.g. the predictions of a run) are parsed directly. None
+  caches every file.
+  '''
+  def __init__(self, path, minSize=65536, budget=0, roots=None):
+    self.path = path
+    self.minSize = minSize
+    self.budget = budget
+    self.roots = None if roots is None else [os.path.realpath(root)
+        for root in roots if root]
+    self.used = set()
+
+  '''
+  Get the dataset cache specified by the DATASET_CACHE environment variable.
+  If the variable is set to an empty string the cache is disabled. The disk
+  budget in gigabytes is taken from the DATASET_CACHE_SIZE variable; the
+  datasets directory, the generated datasets and the converted datasets are
+  the input directories.
+
+  @return The dataset cache or None if the cache is disabled.
+  '''
+  @staticmethod
+  def Default():
+    path = os.environ.get("DATASET_CACHE", "reports/cache/datasets/")
+    if not path:
+      return None
+
+    budget = float(os.environ.get("DATASET_CACHE_SIZE", 20))
+    roots = ["datasets", os.environ.get("GENERATED_DATASETS",
+        "reports/cache/generated/"), os.environ.get("CONVERSION_CACHE",
+        "reports/cache/converted/")]
+    return DatasetCache(path, budget=int(budget * 1024 ** 3), roots=roots)
+
+  '''
+  Check if the given dataset is cached: the file is large enough and is an
+  input dataset.
+
+  @param dataset - The location of the dataset file.
+  @return True if the dataset is cached.
+  '''
+  def Accepts(self, dataset):
+    if os.path.getsize(dataset) < self.minSize:
+      return False
+
+    if self.roots is None:
+      return True
+
+    realPath = os.path.realpath(dataset)
+    return any(realPath.startswith(os.path.join(root, "")) for root in
+        self.roots)
+
+  '''
+  Load the given dataset. Parse the text file on the first call and store the
+  parsed array in the cache.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter of the dataset file.
+  @return The loaded dataset as copy-on-write memory mapped array.
+  '''
+  def Load(self, dataset, delimiter=','):
+    import numpy as np
+
+    stat = os.stat(dataset)
+    if not self.Accepts(dataset):
+      return np.genfromtxt(dataset, delimiter=delimiter)
+
+    CreateDirectoryStructure([self.path])
+
+    # Look for a cached array of the unchanged file.
+    realPath = os.path.realpath(dataset)
+    key = hashlib.sha1((realPath + repr(delimiter)).encode()).hexdigest()
+    indexFile = os.path.join(self.path, key + ".json")
+
+    fileName = None
+    created = False
+    try:
+      with open(indexFile, "r") as fid:
+        entry = json.load(fid)
+      if (entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size
+          and os.path.isfile(entry["file"])):
+        fileName = entry["file"]
+    except (IOError, OSError, ValueError, KeyError):
+      pass
+
+    if not fileName:
+      # The name of the array depends on the content only, so touched or
+      # copied datasets share the array.
+      contentHash = FileHash(dataset)
+      delimiterHash = hashlib.sha1(repr(delimiter).encode()).hexdigest()[:8]
+      fileName = os.path.join(self.path, contentHash + "_" + delimiterHash +
+          ".npy")
+
+      if not os.path.isfile(fileName):
+        Log.Info("Parse dataset: " + dataset)
+        data = np.genfromtxt(dataset, delimiter=delimiter)
+        with AtomicFile(fileName, "wb") as fid:
+          np.save(fid, data)
+        created = True
+
+      entry = {"path": realPath, "mtime": stat.st_mtime,
+          "size": stat.st_size, "file": fileName}
+      with AtomicFile(indexFile, "w") as fid:
+        json.dump(entry, fid)
+
+    # Mark the array as recently used; a removed array stays valid for the
+    # processes which already mapped it.
+    data = np.asarray(np.load(fileName, mmap_mode="c"))
+    os.utime(fileName, None)
+    self.used.add(os.path.realpath(fileName))
+    if created:
+      self.Evict()
+    return data
+
+  '''
+  Remove the least recently used arrays until the cache fits into the disk
+  budget. The arrays used by this process are never removed.
+  '''
+  def Evict(self):
+    if not self.budget:
+      return
+
+    with ConversionCache.Lock(self.path):
+      files = []
+      for f in os.listdir(self.path):
+        f = os.path.join(self.path, f)
+        if f.endswith(".npy"):
+          stat = os.stat(f)
+          files.append((stat.st_mtime, stat.st_size, f))
+
+      total = sum(size for mtime, size, f in files)
+      for mtime, size, f in sorted(files):
+        if total <= self.budget:
+          break
+        if os.path.realpath(f) in self.used:
+          continue
+
+        Log.Info("Remove cached dataset: " + f)
+        os.remove(f)
+        total -= size
+
+'''
+This class implements a persistent cache for converted datasets (e.g. csv to
+arff). The converted files are stored in a directory named by the content
+hash of the source file, so an unchanged dataset is converted only once. The
+least recently used files are removed if the cache exceeds the disk budget.
+'''
+class ConversionCache(object):
+
+  '''
+  Create the conversion cache instance.
+
+  @param path - The cache directory.
+  @param budget - The disk budget in bytes, zero means no limit.
+  '''
+  def __init__(self, path, budget=0):
+    self.path = path
+    self.budget = budget
+    self.used = set()
+
+  '''
+  Get the conversion cache specified by the CONVERSION_CACHE environment
+  variable. If the variable is set to an empty string the cache is disabled.
+
+  @param budget - The disk budget in gigabytes, zero means no limit.
+  @return The conversion cache or None if the cache is disabled.
+  '''
+  @staticmethod
+  def Default(budget=0):
+    path = os.environ.get("CONVERSION_CACHE", "reports/cache/converted/")
+    return ConversionCache(path, int(budget * 1024 ** 3)) if path else None
+
+  '''
+  All cache operations hold a lock file, so concurrent benchmark runs don't
+  remove the files of each other.
+  '''
+  class Lock(object):
+    def __init__(self, path):
+      self.path = path
+
+    def __enter__(self):
+      CreateDirectoryStructure([self.path])
+      self.fid = open(os.path.join(self.path, ".lock"), "a")
+      fcntl.flock(self.fid, fcntl.LOCK_EX)
+
+    def __exit__(self, type, value, traceback):
+      fcntl.flock(self.fid, fcntl.LOCK_UN)
+      self.fid.close()
+
+  '''
+  Get the content hash of the given file. The hash is stored in an index file
+  and only computed again if the modification time or the size changed.
+
+  @param dataset - The location of the dataset file.
+  @return The content hash.
+  '''
+  def ContentHash(self, dataset):
+    stat = os.stat(dataset)
+    realPath = os.path.realpath(dataset)
+    indexFile = os.path.join(self.path, hashlib.sha1(
+        realPath.encode()).hexdigest() + ".json")
+
+    try:
+      with open(indexFile, "r") as fid:
+        entry = json.load(fid)
+      if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+        return entry["hash"]
+    except (IOError, OSError, ValueError, KeyError):
+      pass
+
+    entry = {"path": realPath, "mtime": stat.st_mtime, "size": stat.st_size,
+        "hash": FileHash(dataset)}
+    with AtomicFile(indexFile, "w") as fid:
+      json.dump(entry, fid)
+    return entry["hash"]
+
+  '''
+  Get the converted dataset, convert the dataset if there is no cached file.
+
+  @param dataset - The location of the dataset file.
+  @param extension - The extension of the converted file.
+  @return The location of the converted file or an empty string if the
+  conversion isn't possible.
+  '''
+  def Get(self, dataset, extension):
+    extension = FormatExtension(extension)
+    with ConversionCache.Lock(self.path):
+      # Keep the name of the dataset, the scripts derive names from the path.
+      name = os.path.splitext(os.path.basename(dataset))[0] + "." + extension
+      directory = os.path.join(self.path, self.ContentHash(dataset))
+      fileName = os.path.join(directory, name)
+
+      if os.path.isfile(fileName):
+        # Mark the file as recently used.
+        os.utime(fileName, None)
+      else:
+        Log.Info("Convert dataset: " + dataset)
+        CreateDirectoryStructure([directory])
+        if not Convert(dataset, extension, fileName).modifiedDataset:
+          if not os.listdir(directory):
+            os.rmdir(directory)
+          return ""
+
+      self.used.add(os.path.realpath(fileName))
+      self.Evict()
+
+    return fileName
+
+  '''
+  Remove the least recently used files until the cache fits into the disk
+  budget. The files used by this run are never removed.
+  '''
+  def Evict(self):
+    if not self.budget:
+      return
+
+    files = []
+    for directory in os.listdir(self.path):
+      directory = os.path.join(self.path, directory)
+      if os.path.isdir(directory):
+        for f in os.listdir(directory):
+          f = os.path.join(directory, f)
+          stat = os.stat(f)
+          files.append((stat.st_mtime, stat.st_size, f))
+
+    total = sum(size for mtime, size, f in files)
+    for mtime, size, f in sorted(files):
+      if total <= self.budget:
+        break
+      if os.path.realpath(f) in self.used:
+        continue
+
+      Log.Info("Remove cached dataset: " + f)
+      os.remove(f)
+      total -= size
+
+      # Remove the empty directory.
+      directory = os.path.dirname(f)
+      if not os.listdir(directory):
+        os.rmdir(directory)
+
+'''
+This class implements the manifest of the checked datasets. The manifest
+stores the size, modification time and content hash of every dataset, so the
+config check only hashes the datasets which changed since the last check. The
+methods can be called from several threads.
+'''
+class DatasetManifest(object):
+
+  '''
+  Create the manifest instance and load the stored entries.
+
+  @param fileName - The location of the manifest file.
+  '''
+  def __init__(self, fileName):
+    self.fileName = fileName
+    self.lock = threading.Lock()
+    self.entries = {}
+
+    try:
+      with open(fileName, "r") as fid:
+        self.entries = json.load(fid)
+    except (IOError, OSError, ValueError):
+      pass
+
+  '''
+  Get the default manifest, the location is set with the DATASET_MANIFEST
+  environment variable.
+
+  @return The manifest instance.
+  '''
+  @staticmethod
+  def Default():
+    return DatasetManifest(os.environ.get("DATASET_MANIFEST",
+        "reports/cache/manifest.json"))
+
+  '''
+  Check the given dataset. The content hash is only computed if the size or
+  the modification time differs from the stored entry.
+
+  @param dataset - The location of the dataset file.
+  @param checksum - If False the content hash isn't computed.
+  @return Tuple with the entry (path, size, mtime, hash), the number of bytes
+  read to compute the hash and True if the content changed since the last
+  check. Raises OSError if the dataset isn't available.
+  '''
+  def Check(self, dataset, checksum=True):
+    stat = os.stat(dataset)
+    realPath = os.path.realpath(dataset)
+
+    with self.lock:
+      entry = self.entries.get(realPath)
+
+    if (entry and entry["size"] == stat.st_size and entry["mtime"] ==
+        stat.st_mtime and (entry["hash"] or not checksum)):
+      return (entry, 0, False)
+
+    fileHash = FileHash(dataset) if checksum else None
+    changed = bool(entry and entry["hash"] and fileHash and entry["hash"] !=
+        fileHash)
+
+    newEntry = {"path": realPath, "size": stat.st_size,
+        "mtime": stat.st_mtime, "hash": fileHash}
+    with self.lock:
+      self.entries[realPath] = newEntry
+
+    return (newEntry, stat.st_size if checksum else 0, changed)
+
+  '''
+  Write the manifest file.
+  '''
+  def Save(self):
+    CreateDirectoryStructure([os.path.dirname(self.fileName) or "."])
+    with self.lock:
+      with AtomicFile(self.fileName, "w") as fid:
+        json.dump(self.entries, fid)
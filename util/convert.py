@@ -15,6 +15,7 @@ if cmd_subfolder not in sys.path:
   sys.path.insert(0, cmd_subfolder)
 
 from log import *
+from misc import *
 
 import os.path
 
@@ -29,12 +30,15 @@ class Convert(object):
   @param dataset - Convert the specified dataset.
   @param extension - Convert the dataset to a new file with the specified
   extension.
+  @param newDataset - The name of the new file. Default the dataset name with
+  the new extension.
   '''
-  def __init__(self, dataset, extension):
+  def __init__(self, dataset, extension, newDataset=None):
+    extension = FormatExtension(extension)
     self.extension = extension
     self.modifiedDataset = ""
 
-    self.ModifyDataset(dataset, extension)
+    self.ModifyDataset(dataset, extension, newDataset)
 
   '''
   Decide which method we have to call to modify the dataset.
@@ -42,16 +46,27 @@ class Convert(object):
   @param dataset - Convert the specified dataset.
   @param extension - Convert the dataset to a new file with the specified
   extension.
+  @param newDataset - The name of the new file.
   '''
-  def ModifyDataset(self, dataset, extension):
+  def ModifyDataset(self, dataset, extension, newDataset=None):
     dataExtension = os.path.splitext(dataset)[1][1:]
-    newDataset = dataset[0:len(dataset) - len(dataExtension)] + extension
+    if not newDataset:
+      newDataset = dataset[0:len(dataset) - len(dataExtension)] + extension
 
     # Currently the following conversions are implemented:
     # csv -> arff
     # txt -> arff
+    # csv, txt, arff -> npy
+    # csv, txt, arff -> bin (Armadillo binary)
     if extension == "arff" and (dataExtension == "csv" or dataExtension == "txt"):
       self.AddArffHeader(dataset, newDataset)
+    elif extension in ["npy", "bin"] and dataExtension in ["csv", "txt",
+        "arff"]:
+      try:
+        self.WriteBinary(dataset, newDataset, extension)
+      except (ValueError, IndexError) as e:
+        Log.Fatal("Could not convert the dataset: " + dataset)
+        Log.Fatal("Exception: " + str(e))
     else:
       Log.Fatal("No conversion possible.")
       pass
@@ -74,24 +89,122 @@ class Convert(object):
     # We can convert files with ' ' and ',' as seperator.
     count = max(head[0].count(","), head[0].count(" ")) + 1
 
-    # Write the arff header to the new file.
-    nfid = open(newData, "a")
-    nfid.write("@relation " + relationName + "\n\n")
-    for i in range(count):
-      nfid.write("@attribute " + data + "_dim" + str(i) + " NUMERIC\n")
-    nfid.write("\n@data\n")
-
-    # Append the data for the given file to the new arff file.
-    fid = open(data, "r")
-    while True:
-      line = fid.read(65536)
-      if line:
-        nfid.write(line)
-      else:
-        break
+    # Write the new file atomically, so an interrupted conversion never leaves
+    # a partial file behind.
+    with AtomicFile(newData, "w") as nfid:
+      # Write the arff header to the new file.
+      nfid.write("@relation " + relationName + "\n\n")
+      for i in range(count):
+        nfid.write("@attribute " + data + "_dim" + str(i) + " NUMERIC\n")
+      nfid.write("\n@data\n")
+
+      # Append the data for the given file to the new arff file.
+      with open(data, "r") as fid:
+        while True:
+          line = fid.read(65536)
+          if line:
+            nfid.write(line)
+          else:
+            break
 
-    fid.close()
-    nfid.close()
+    # Add the modified datasetname to the list.
+    self.modifiedDataset = newData
+
+  '''
+  Count the data lines of a text dataset; empty lines and the header and
+  comment lines of arff files are skipped.
+
+  @param data - The text dataset.
+  @return The number of data lines.
+  '''
+  @staticmethod
+  def CountRows(data):
+    rows = 0
+    with open(data, "rb") as fid:
+      for line in fid:
+        if line.strip() and line[:1] not in (b"@", b"%"):
+          rows += 1
+    return rows
+
+  '''
+  Parse a text dataset in chunks of rows, so the whole dataset is never held
+  in memory.
+
+  @param data - The text dataset.
+  @param rows - The number of rows of every chunk.
+  @return Generator of the parsed chunks.
+  '''
+  @staticmethod
+  def TextChunks(data, rows=65536):
+    import numpy as np
+
+    delimiter = None
+    lines = []
+    with open(data, "r") as fid:
+      for line in fid:
+        if not line.strip() or line[0] in "@%":
+          continue
+
+        # We can convert files with ',' and whitespace as seperator.
+        if not lines and delimiter is None:
+          delimiter = "," if "," in line else " "
+
+        lines.append(line)
+        if len(lines) == rows:
+          yield np.loadtxt(lines, delimiter=delimiter if delimiter == ","
+              else None, ndmin=2)
+          lines = []
+
+    if lines:
+      yield np.loadtxt(lines, delimiter=delimiter if delimiter == ","
+          else None, ndmin=2)
+
+  '''
+  Convert a text dataset to a binary dataset. The rows are counted first, then
+  the dataset is parsed and written chunk by chunk. The npy file stores the
+  rows in order; the Armadillo binary file stores the matrix in column-major
+  order, so every column of a chunk is written to its place in the file.
+
+  @param data - The text dataset.
+  @param newData - The binary dataset.
+  @param extension - The binary format ('npy' or 'bin').
+  '''
+  def WriteBinary(self, data, newData, extension):
+    import numpy as np
+
+    rows = Convert.CountRows(data)
+    cols = None
+    row = 0
+
+    with AtomicFile(newData, "wb") as fid:
+      for chunk in Convert.TextChunks(data):
+        if cols is None:
+          cols = chunk.shape[1]
+          if extension == "npy":
+            np.lib.format.write_array_header_1_0(fid, {"descr": "<f8",
+                "fortran_order": False, "shape": (rows, cols)})
+          else:
+            fid.write(("ARMA_MAT_BIN_FN8\n%d %d\n" % (rows, cols)).encode())
+          offset = fid.tell()
+          fid.truncate(offset + rows * cols * 8)
+        elif chunk.shape[1] != cols:
+          raise ValueError("Inconsistent number of columns in line " +
+              str(row + 1))
+
+        chunk = chunk.astype("<f8")
+        if extension == "npy":
+          fid.seek(offset + row * cols * 8)
+          fid.write(chunk.tobytes())
+        else:
+          for col in range(cols):
+            fid.seek(offset + (col * rows + row) * 8)
+            fid.write(chunk[:, col].tobytes())
+        row += chunk.shape[0]
+
+      if cols is None:
+        raise ValueError("The dataset is empty")
+      if row != rows:
+        raise ValueError("Could not parse all lines of the dataset")
 
     # Add the modified datasetname to the list.
     self.modifiedDataset = newData
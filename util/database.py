@@ -5,8 +5,22 @@
   Class to handle the database.
 '''
 
+import os
+import gzip
+import socket
 import sqlite3
 import datetime
+import threading
+import atexit
+import json
+import collections
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+from system import *
 
 
 '''
@@ -20,12 +34,77 @@ class Database:
   @param databasePath - Path to the database.
   '''
   def __init__(self, databasePath="benchmark.db"):
-    con = sqlite3.connect(databasePath)
-    con.execute('pragma foreign_keys = on')
+    con = Database.Connect(databasePath)
 
+    self.databasePath = databasePath
+    self.writer = None
     self.con = con
     self.cur = con.cursor()
 
+  '''
+  Open a connection to the given database. The database uses the write-ahead
+  log, so the reports can be read while a benchmark writes; with the
+  write-ahead log the commits only have to be synced at the checkpoints.
+
+  @param databasePath - Path to the database.
+  @return The connection.
+  '''
+  @staticmethod
+  def Connect(databasePath):
+    con = sqlite3.connect(databasePath, timeout=60)
+    con.execute('pragma foreign_keys = on')
+    con.execute('pragma journal_mode = wal')
+    con.execute('pragma synchronous = normal')
+    return con
+
+  '''
+  Queue the records of the result tables and write them in a background
+  thread. The queued records are committed in batches, when Flush is called and
+  when the program exits (e.g. after Ctrl-C).
+
+  @param batchSize - The number of statements committed together.
+  '''
+  def StartWriter(self, batchSize=500):
+    if not self.writer:
+      self.writer = DatabaseWriter(self.databasePath, batchSize)
+      atexit.register(self.Close)
+
+  '''
+  Commit the queued records of the writer. The methods which write with the
+  connection of this object or read the result tables flush the writer first,
+  so they see all records and don't wait for the lock of the writer.
+  '''
+  def Flush(self):
+    if self.writer:
+      self.writer.Flush()
+
+  '''
+  Commit the queued records and stop the writer.
+  '''
+  def Close(self):
+    if self.writer:
+      writer, self.writer = self.writer, None
+      writer.Close()
+
+  '''
+  Execute the given insert statement, the statement is queued if the writer
+  is running.
+
+  @param statement - The SQL statement.
+  @param parameters - The parameters of the statement or a list of parameters
+  if many is set.
+  @param many - Execute the statement for every parameter tuple.
+  '''
+  def Write(self, statement, parameters=(), many=False):
+    if self.writer:
+      self.writer.Put(statement, parameters, many)
+    else:
+      with self.con:
+        if many:
+          self.cur.executemany(statement, parameters)
+        else:
+          self.cur.execute(statement, parameters)
+
   '''
   Create a new build table.
   '''
@@ -35,11 +114,55 @@ class Database:
           id INTEGER PRIMARY KEY AUTOINCREMENT,
           build TIMESTAMP NOT NULL,
           libary_id INTEGER NOT NULL,
+          finished INTEGER NOT NULL DEFAULT 1,
+          machine TEXT,
+          fingerprint TEXT,
+          environment TEXT,
+          run TEXT,
 
           FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE
         );
         """)
 
+  '''
+  Add the finished flag, the machine, the fingerprint, the environment and the
+  run to the builds table of older databases. The existing builds are marked
+  as finished.
+  '''
+  def UpdateBuildTable(self):
+    try:
+      self.cur.execute("SELECT finished FROM builds LIMIT 1")
+      self.cur.fetchall()
+    except sqlite3.OperationalError as e:
+      self.cur.execute("ALTER TABLE builds ADD COLUMN finished INTEGER NOT "
+          + "NULL DEFAULT 1")
+      self.cur.fetchall()
+
+    self.AddMissingColumns("builds", [("machine", "TEXT"),
+        ("fingerprint", "TEXT"), ("environment", "TEXT"), ("run", "TEXT")])
+
+  '''
+  Create a new journal table. The journal contains a record for every
+  finished cell (method, library, dataset) of an unfinished build.
+  '''
+  def CreateJournalTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS journal (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          build_id INTEGER NOT NULL,
+          libary_id INTEGER NOT NULL,
+          dataset_id INTEGER NOT NULL,
+          method_id INTEGER NOT NULL,
+          finished TIMESTAMP NOT NULL,
+
+          UNIQUE(build_id, libary_id, dataset_id, method_id),
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
+          FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE,
+          FOREIGN KEY(dataset_id) REFERENCES datasets(id) ON DELETE CASCADE,
+          FOREIGN KEY(method_id) REFERENCES methods(id) ON DELETE CASCADE
+        );
+        """)
+
   '''
   Create a new libraries table.
   '''
@@ -62,10 +185,23 @@ class Database:
           size INTEGER NOT NULL,
           attributes INTEGER NOT NULL,
           instances INTEGER NOT NULL,
-          type TEXT NOT NULL
+          type TEXT NOT NULL,
+          bytes INTEGER,
+          hash TEXT,
+          sparsity REAL,
+          mtime REAL,
+          path TEXT
         );
         """)
 
+  '''
+  Add the file size, content hash, sparsity, modification time and path to
+  the datasets table of older databases.
+  '''
+  def UpdateDatasetsTable(self):
+    self.AddMissingColumns("datasets", [("bytes", "INTEGER"), ("hash", "TEXT"),
+        ("sparsity", "REAL"), ("mtime", "REAL"), ("path", "TEXT")])
+
   '''
   Create a new methods table.
   '''
@@ -99,6 +235,344 @@ class Database:
           var REAL NOT NULL,
           dataset_id INTEGER NOT NULL,
           method_id INTEGER NOT NULL,
+          trials INTEGER,
+          ci_low REAL,
+          ci_high REAL,
+
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
+          FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE,
+          FOREIGN KEY(dataset_id) REFERENCES datasets(id) ON DELETE CASCADE,
+          FOREIGN KEY(method_id) REFERENCES methods(id) ON DELETE CASCADE
+        );
+        """)
+
+  '''
+  Create a new build summary table. The table contains the sum of the time
+  column of the results of every build and method. The table is updated by
+  triggers when the results change and filled from the existing results when
+  it's created.
+  '''
+  def CreateBuildSummaryTable(self):
+    self.cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND "
+        + "name='build_summary'")
+    exists = bool(self.cur.fetchall())
+
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS build_summary (
+          build_id INTEGER NOT NULL,
+          method_id INTEGER NOT NULL,
+          time REAL NOT NULL,
+          results INTEGER NOT NULL,
+
+          PRIMARY KEY(build_id, method_id),
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
+          FOREIGN KEY(method_id) REFERENCES methods(id) ON DELETE CASCADE
+        );
+
+        CREATE TRIGGER IF NOT EXISTS build_summary_insert AFTER INSERT ON
+        results BEGIN
+          INSERT OR IGNORE INTO build_summary VALUES (NEW.build_id,
+              NEW.method_id, 0, 0);
+          UPDATE build_summary SET time = time + NEW.time,
+              results = results + 1 WHERE build_id = NEW.build_id AND
+              method_id = NEW.method_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS build_summary_delete AFTER DELETE ON
+        results BEGIN
+          DELETE FROM build_summary WHERE build_id = OLD.build_id AND
+              method_id = OLD.method_id;
+          INSERT INTO build_summary SELECT build_id, method_id, TOTAL(time),
+              COUNT(*) FROM results WHERE build_id = OLD.build_id AND
+              method_id = OLD.method_id GROUP BY build_id, method_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS build_summary_update AFTER UPDATE OF
+        build_id, method_id, time ON results BEGIN
+          DELETE FROM build_summary WHERE (build_id = OLD.build_id AND
+              method_id = OLD.method_id) OR (build_id = NEW.build_id AND
+              method_id = NEW.method_id);
+          INSERT INTO build_summary SELECT build_id, method_id, TOTAL(time),
+              COUNT(*) FROM results WHERE (build_id = OLD.build_id AND
+              method_id = OLD.method_id) OR (build_id = NEW.build_id AND
+              method_id = NEW.method_id) GROUP BY build_id, method_id;
+        END;
+        """)
+
+    if not exists:
+      with self.con:
+        self.cur.execute("INSERT INTO build_summary SELECT build_id, "
+            + "method_id, TOTAL(time), COUNT(*) FROM results GROUP BY "
+            + "build_id, method_id")
+
+  '''
+  Create a new latest builds table. The table contains the latest build of
+  every library, it's updated by triggers when the builds change and filled
+  from the existing builds when it's created.
+  '''
+  def CreateLatestBuildsTable(self):
+    self.cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND "
+        + "name='latest_builds'")
+    exists = bool(self.cur.fetchall())
+
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS latest_builds (
+          libary_id INTEGER PRIMARY KEY,
+          build_id INTEGER NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS latest_builds_insert AFTER INSERT ON
+        builds WHEN NOT EXISTS (SELECT 1 FROM latest_builds l JOIN builds b ON
+            b.id = l.build_id WHERE l.libary_id = NEW.libary_id AND
+            (b.build > NEW.build OR (b.build = NEW.build AND b.id > NEW.id)))
+        BEGIN
+          INSERT OR REPLACE INTO latest_builds VALUES (NEW.libary_id, NEW.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS latest_builds_delete AFTER DELETE ON
+        builds BEGIN
+          DELETE FROM latest_builds WHERE libary_id = OLD.libary_id;
+          INSERT INTO latest_builds SELECT libary_id, id FROM builds WHERE
+              libary_id = OLD.libary_id ORDER BY build DESC, id DESC LIMIT 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS latest_builds_update AFTER UPDATE OF
+        build, libary_id ON builds BEGIN
+          DELETE FROM latest_builds WHERE libary_id IN (OLD.libary_id,
+              NEW.libary_id);
+          INSERT OR REPLACE INTO latest_builds SELECT libary_id, id FROM
+              builds WHERE libary_id = OLD.libary_id ORDER BY build DESC,
+              id DESC LIMIT 1;
+          INSERT OR REPLACE INTO latest_builds SELECT libary_id, id FROM
+              builds WHERE libary_id = NEW.libary_id ORDER BY build DESC,
+              id DESC LIMIT 1;
+        END;
+        """)
+
+    if not exists:
+      with self.con:
+        # The bare column is taken from the row of the latest build.
+        self.cur.execute("INSERT INTO latest_builds SELECT libary_id, id FROM "
+            + "(SELECT libary_id, id, MAX(build) FROM builds GROUP BY "
+            + "libary_id)")
+
+  '''
+  Create a new latest results table. The table contains the result of the
+  latest build of every method, dataset and library; it's updated by triggers
+  when the results change and filled from the existing results when it's
+  created. The unused dataset winners view of older databases is removed.
+  '''
+  def CreateLatestResultsTable(self):
+    self.cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND "
+        + "name='latest_results'")
+    exists = bool(self.cur.fetchall())
+
+    # The statements which recompute the latest result of a cell.
+    latest = """
+          DELETE FROM latest_results WHERE method_id = %(row)s.method_id AND
+              dataset_id = %(row)s.dataset_id AND
+              libary_id = %(row)s.libary_id;
+          INSERT INTO latest_results SELECT r.method_id, r.dataset_id,
+              r.libary_id, r.build_id, r.time, r.var FROM results r JOIN
+              builds b ON b.id = r.build_id WHERE
+              r.method_id = %(row)s.method_id AND
+              r.dataset_id = %(row)s.dataset_id AND
+              r.libary_id = %(row)s.libary_id
+              ORDER BY b.build DESC, b.id DESC, r.id DESC LIMIT 1;"""
+
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS latest_results (
+          method_id INTEGER NOT NULL,
+          dataset_id INTEGER NOT NULL,
+          libary_id INTEGER NOT NULL,
+          build_id INTEGER NOT NULL,
+          time REAL NOT NULL,
+          var REAL NOT NULL,
+
+          PRIMARY KEY(method_id, dataset_id, libary_id)
+        );
+
+        CREATE TRIGGER IF NOT EXISTS latest_results_insert AFTER INSERT ON
+        results WHEN NOT EXISTS (SELECT 1 FROM latest_results l JOIN builds b
+            ON b.id = l.build_id JOIN builds n ON n.id = NEW.build_id WHERE
+            l.method_id = NEW.method_id AND l.dataset_id = NEW.dataset_id AND
+            l.libary_id = NEW.libary_id AND (b.build > n.build OR
+            (b.build = n.build AND b.id > n.id)))
+        BEGIN
+          INSERT OR REPLACE INTO latest_results VALUES (NEW.method_id,
+              NEW.dataset_id, NEW.libary_id, NEW.build_id, NEW.time, NEW.var);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS latest_results_delete AFTER DELETE ON
+        results BEGIN%(old)s
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS latest_results_update AFTER UPDATE OF
+        build_id, libary_id, dataset_id, method_id, time, var ON results
+        BEGIN%(old)s%(new)s
+        END;
+
+        DROP VIEW IF EXISTS dataset_winners;
+        """ % {"old": latest % {"row": "OLD"}, "new": latest % {"row": "NEW"}})
+
+    if not exists:
+      with self.con:
+        # The bare columns are taken from the row of the latest build.
+        self.cur.execute("INSERT INTO latest_results SELECT method_id, "
+            + "dataset_id, libary_id, build_id, time, var FROM (SELECT "
+            + "results.method_id, results.dataset_id, results.libary_id, "
+            + "results.build_id, results.time, results.var, MAX(builds.build) "
+            + "FROM results JOIN builds ON results.build_id = builds.id GROUP "
+            + "BY results.method_id, results.dataset_id, results.libary_id)")
+
+  '''
+  Add the trial count and the confidence interval bounds of the median to the
+  results table of older databases.
+  '''
+  def UpdateResultsTable(self):
+    self.AddMissingColumns("results", [("trials", "INTEGER"),
+        ("ci_low", "REAL"), ("ci_high", "REAL")])
+
+  '''
+  Add the given columns to a table if the columns don't exist.
+
+  @param table - The name of the table.
+  @param columns - List of tuples (column name, column type).
+  '''
+  def AddMissingColumns(self, table, columns):
+    for column, columnType in columns:
+      try:
+        self.cur.execute("SELECT " + column + " FROM " + table + " LIMIT 1")
+        self.cur.fetchall()
+      except sqlite3.OperationalError as e:
+        self.cur.execute("ALTER TABLE " + table + " ADD COLUMN " + column +
+            " " + columnType)
+        self.cur.fetchall()
+
+  '''
+  Create a new trial results table. The table contains the time and the
+  resource usage of every trial.
+  '''
+  def CreateTrialResultsTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS trial_results (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          build_id INTEGER NOT NULL,
+          libary_id INTEGER NOT NULL,
+          dataset_id INTEGER NOT NULL,
+          method_id INTEGER NOT NULL,
+          trial INTEGER NOT NULL,
+          time REAL NOT NULL,
+          threads INTEGER,
+          wall REAL,
+          cpu REAL,
+          children_cpu REAL,
+          maxrss INTEGER,
+          children_maxrss INTEGER,
+          majflt INTEGER,
+          minflt INTEGER,
+          nvcsw INTEGER,
+          nivcsw INTEGER,
+          status TEXT NOT NULL DEFAULT 'ok' CHECK (status IN ('ok',
+              'timeout', 'failure')),
+
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
+          FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE,
+          FOREIGN KEY(dataset_id) REFERENCES datasets(id) ON DELETE CASCADE,
+          FOREIGN KEY(method_id) REFERENCES methods(id) ON DELETE CASCADE
+        );
+        """)
+
+  '''
+  Add the thread count and the status to the trial results table of older
+  databases. The status of the existing trials is set from the time codes of
+  the scripts.
+  '''
+  def UpdateTrialResultsTable(self):
+    self.AddMissingColumns("trial_results", [("threads", "INTEGER")])
+
+    try:
+      self.cur.execute("SELECT status FROM trial_results LIMIT 1")
+      self.cur.fetchall()
+    except sqlite3.OperationalError as e:
+      with self.con:
+        self.cur.execute("ALTER TABLE trial_results ADD COLUMN status TEXT "
+            + "NOT NULL DEFAULT 'ok' CHECK (status IN ('ok', 'timeout', "
+            + "'failure'))")
+        self.cur.execute("UPDATE trial_results SET status = CASE WHEN "
+            + "time = -2 THEN 'timeout' ELSE 'failure' END WHERE time < 0")
+
+  '''
+  Create the view of the cell results computed from the trial results. The
+  view has the columns of the results table; the time is the mean and the var
+  the variance of the trials, for cells with a failed trial the time is the
+  label of the results table. With the thread axis the trials of the largest
+  thread count are used.
+  '''
+  def CreateTrialResultsView(self):
+    self.con.executescript("""
+        CREATE VIEW IF NOT EXISTS trial_results_summary AS
+          SELECT MIN(t.id) AS id, t.build_id, t.libary_id,
+              CASE WHEN SUM(t.status != 'ok') THEN (SELECT r.time FROM
+                  results r WHERE r.build_id = t.build_id AND
+                  r.libary_id = t.libary_id AND r.dataset_id = t.dataset_id
+                  AND r.method_id = t.method_id LIMIT 1)
+                  ELSE AVG(t.time) END AS time,
+              CASE WHEN SUM(t.status != 'ok') THEN 0
+                  ELSE AVG(t.time * t.time) - AVG(t.time) * AVG(t.time)
+                  END AS var,
+              t.dataset_id, t.method_id
+          FROM trial_results t
+          WHERE t.threads IS NULL OR t.threads = (SELECT MAX(m.threads) FROM
+              trial_results m WHERE m.build_id = t.build_id AND
+              m.libary_id = t.libary_id AND m.dataset_id = t.dataset_id AND
+              m.method_id = t.method_id)
+          GROUP BY t.build_id, t.libary_id, t.dataset_id, t.method_id;
+        """)
+
+  '''
+  Create a new thread results table. The table contains the result of every
+  thread count of the thread axis.
+  '''
+  def CreateThreadResultsTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS thread_results (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          build_id INTEGER NOT NULL,
+          libary_id INTEGER NOT NULL,
+          dataset_id INTEGER NOT NULL,
+          method_id INTEGER NOT NULL,
+          threads INTEGER NOT NULL,
+          time REAL NOT NULL,
+          var REAL NOT NULL,
+
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
+          FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE,
+          FOREIGN KEY(dataset_id) REFERENCES datasets(id) ON DELETE CASCADE,
+          FOREIGN KEY(method_id) REFERENCES methods(id) ON DELETE CASCADE
+        );
+        """)
+
+  '''
+  Create a new complexity table. The table contains the fitted scaling
+  exponent and the measured points of every axis (rows 'n' and columns 'd')
+  of the complexity mode.
+  '''
+  def CreateComplexityTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS complexity (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          build_id INTEGER NOT NULL,
+          libary_id INTEGER NOT NULL,
+          dataset_id INTEGER NOT NULL,
+          method_id INTEGER NOT NULL,
+          axis TEXT NOT NULL,
+          size INTEGER NOT NULL,
+          exponent REAL NOT NULL,
+          ci_low REAL,
+          ci_high REAL,
+          intercept REAL NOT NULL,
+          points TEXT NOT NULL,
 
           FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE,
           FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE,
@@ -181,33 +655,240 @@ class Database:
         );
         """)
 
+  '''
+  Create a new result cache table.
+  '''
+  def CreateResultCacheTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+          key TEXT PRIMARY KEY,
+          result TEXT NOT NULL,
+          created REAL NOT NULL
+        );
+        """)
+
+  '''
+  Create a new machines table. A machine record contains the fingerprint
+  (hardware, kernel and memory) of the builds of the machine.
+  '''
+  def CreateMachinesTable(self):
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS machines (
+          fingerprint TEXT PRIMARY KEY,
+          info TEXT NOT NULL
+        );
+        """)
+
   '''
   Create a new build, libraries, datasets and results table.
   '''
   def CreateTables(self):
     self.CreateLibrariesTable()
     self.CreateBuildTable()
+    self.UpdateBuildTable()
     self.CreateDatasetsTable()
+    self.UpdateDatasetsTable()
     self.CreateMethodsTable()
     self.CreateResultsTable()
+    self.UpdateResultsTable()
+    self.CreateBuildSummaryTable()
+    self.CreateLatestBuildsTable()
+    self.CreateLatestResultsTable()
+    self.CreateTrialResultsTable()
+    self.UpdateTrialResultsTable()
+    self.CreateTrialResultsView()
+    self.CreateThreadResultsTable()
+    self.CreateComplexityTable()
     self.CreateMetricResultsTable()
     self.CreateMemoryTable()
     self.CreateMethodInfoTable()
     self.CreateMetricBootstrapTable()
+    self.CreateJournalTable()
+    self.CreateResultCacheTable()
+    self.CreateMachinesTable()
+    self.CreateIndexes()
+
+  '''
+  Create the indexes of the lookup columns. The result tables are indexed by
+  the cell (build, library, dataset, method), the builds by the library. The
+  results are also indexed without the build for the latest results table.
+  The missing indexes are added to existing databases as well.
+  '''
+  def CreateIndexes(self):
+    indexes = [("builds", ["libary_id", "id"]),
+        ("builds", ["libary_id", "build"]),
+        ("builds", ["libary_id", "run"]),
+        ("results", ["method_id", "dataset_id", "libary_id"]),
+        ("methods", ["name", "parameters"]),
+        ("method_info", ["method_id"])]
+    for table in ["results", "trial_results", "thread_results", "complexity",
+        "metrics", "bootstrap", "memory"]:
+      indexes.append((table, ["build_id", "libary_id", "dataset_id",
+          "method_id"]))
+
+    with self.con:
+      self.cur.execute("SELECT name FROM sqlite_master WHERE type='index'")
+      existing = set(name for name, in self.cur.fetchall())
+
+      created = False
+      for table, columns in indexes:
+        name = table + "_" + "_".join(c.replace("_id", "") for c in
+            columns) + "_idx"
+        if name not in existing:
+          self.cur.execute("CREATE INDEX IF NOT EXISTS " + name + " ON "
+              + table + " (" + ", ".join(columns) + ")")
+          created = True
+
+      # Update the statistics of the query planner once the indexes of an
+      # existing database were created.
+      if created:
+        self.cur.execute("ANALYZE")
 
   '''
-  Add a new build record to the builds table.
+  Add a new build record to the builds table. The host name is stored as the
+  machine of the build, the fingerprint of the host in the machines table. The
+  remaining entries of the fingerprint (e.g. the package versions) change with
+  upgrades, so they are stored as the environment of the build.
 
   @param libaryId - The id of the library.
+  @param finished - If False the build is marked as unfinished until
+  FinishBuild is called, so an interrupted build can be resumed.
+  @param fingerprint - The fingerprint of the machine which ran the build, None
+  for this machine (see SystemInfo.GetFingerprint).
+  @param machine - The host name of the machine which ran the build, None for
+  this machine.
+  @param run - The id of the run; the builds of a run which was distributed
+  over several machines share the id (see SameRun).
   @return The new build id.
   '''
-  def NewBuild(self, libaryId):
+  def NewBuild(self, libaryId, finished=True, fingerprint=None, machine=None,
+      run=None):
+    fingerprint = fingerprint or SystemInfo.GetFingerprint()
+    info = collections.OrderedDict((key, value) for key, value in
+        fingerprint.items() if key in SystemInfo.machineKeys + ["id"])
+    environment = collections.OrderedDict((key, value) for key, value in
+        fingerprint.items() if key not in info)
+
+    self.Flush()
     with self.con:
-      self.cur.execute("INSERT INTO builds VALUES (NULL,?, ?)",
-          (datetime.datetime.now(), libaryId))
+      self.cur.execute("INSERT OR IGNORE INTO machines (fingerprint, info) "
+          + "VALUES (?,?)", (fingerprint["id"], json.dumps(info)))
+      self.cur.execute("INSERT INTO builds (build, libary_id, finished, "
+          + "machine, fingerprint, environment, run) VALUES (?,?,?,?,?,?,?)",
+          (datetime.datetime.now(), libaryId, int(finished),
+          machine or socket.gethostname(), fingerprint["id"],
+          json.dumps(environment), run))
       self.cur.execute("SELECT last_insert_rowid()")
       return self.cur.fetchall()[0][0]
 
+  '''
+  Get the run of the given build.
+
+  @param buildId - The id of the build.
+  @return The id of the run or None if the build doesn't belong to a run.
+  '''
+  def GetBuildRun(self, buildId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT run FROM builds WHERE id=?", (buildId,))
+      res = self.cur.fetchall()
+      return res[0][0] if res else None
+
+  '''
+  Mark the given build as finished and remove the journal of the build.
+
+  @param buildId - The id of the build.
+  '''
+  def FinishBuild(self, buildId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("UPDATE builds SET finished=1 WHERE id=?", (buildId,))
+      self.cur.execute("DELETE FROM journal WHERE build_id=?", (buildId,))
+
+  '''
+  Get the latest build of the given library if the build is unfinished.
+
+  @param libaryId - The id of the library.
+  @param fingerprint - If set, only the builds of the machine with the given
+  fingerprint and the builds without a fingerprint are taken into account.
+  @return The id of the unfinished build or None if the latest build is
+  finished.
+  '''
+  def GetUnfinishedBuild(self, libaryId, fingerprint=None):
+    with self.con:
+      self.cur.execute("SELECT id, finished FROM builds WHERE libary_id=? AND "
+          + "(? IS NULL OR fingerprint IS NULL OR fingerprint=?) ORDER BY "
+          + "build DESC LIMIT 1", (libaryId, fingerprint, fingerprint))
+      res = self.cur.fetchall()
+      if res and not res[0][1]:
+        return res[0][0]
+      return None
+
+  '''
+  Add a journal record for a finished cell.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  '''
+  def NewJournalEntry(self, buildId, libaryId, datasetId, methodId):
+    self.Write("INSERT OR REPLACE INTO journal (build_id, libary_id, "
+        + "dataset_id, method_id, finished) VALUES (?,?,?,?,?)", (buildId,
+        libaryId, datasetId, methodId, datetime.datetime.now()))
+
+  '''
+  Check if the given cell of a build is finished. A cell is finished if there
+  is a journal record, or if there is a record for every task of the cell
+  (builds which were started before the journal existed).
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param tasks - The tasks of the cell.
+  @return True if the cell is finished otherwise False.
+  '''
+  def IsCellFinished(self, buildId, libaryId, datasetId, methodId, tasks):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT id FROM journal WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
+      if self.cur.fetchall():
+        return True
+
+    tables = [t for task, t in [("timing", "results"), ("metric", "metrics"),
+        ("bootstrap", "bootstrap")] if task in tasks]
+    if not tables:
+      return False
+
+    with self.con:
+      for table in tables:
+        self.cur.execute("SELECT id FROM " + table + " WHERE build_id=? AND "
+            + "libary_id=? AND dataset_id=? AND method_id=? LIMIT 1",
+            (buildId, libaryId, datasetId, methodId))
+        if not self.cur.fetchall():
+          return False
+    return True
+
+  '''
+  Remove the partial records of an unfinished cell, so the cell can run again.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  '''
+  def DeleteCellResults(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
+    with self.con:
+      for table in ["results", "trial_results", "thread_results", "complexity",
+          "metrics", "bootstrap"]:
+        self.cur.execute("DELETE FROM " + table + " WHERE build_id=? AND "
+            + "libary_id=? AND dataset_id=? AND method_id=?", (buildId,
+            libaryId, datasetId, methodId))
+
   '''
   Add a new metrics result record to the metric table.
   @param buildId - The id of the build.
@@ -217,9 +898,8 @@ class Database:
   @param methodId - The id of the method.
   '''
   def NewMetricResult(self, buildId, libaryId, metric, datasetId, methodId):
-    with self.con:
-      self.cur.execute("INSERT INTO metrics VALUES (NULL,?,?,?,?,?)",
-          (buildId, libaryId, str(metric), datasetId, methodId))
+    self.Write("INSERT INTO metrics VALUES (NULL,?,?,?,?,?)", (buildId,
+        libaryId, str(metric), datasetId, methodId))
 
   '''
   Add a new metric result record to the bootstrap table.
@@ -230,43 +910,42 @@ class Database:
   @param methodId - The id of the method.
   '''
   def NewBootstrapResult(self, buildId, libaryId, metric, datasetId, methodId):
-    with self.con:
-      self.cur.execute("INSERT INTO bootstrap VALUES (NULL,?,?,?,?,?)",
-          (buildId, libaryId, str(metric), datasetId, methodId))
+    self.Write("INSERT INTO bootstrap VALUES (NULL,?,?,?,?,?)", (buildId,
+        libaryId, str(metric), datasetId, methodId))
 
 
   def UpdateMetricResult(self, buildId, libaryId, metric, datasetId, methodId):
     with self.con:
       if self.GetMetricResult(buildId, libaryId, datasetId, methodId):
-        self.cur.execute("UPDATE metrics SET metric='" + str(metric) + "'"
-            + " WHERE build_id=" + str(buildId) + " AND libary_id="
-            + str(libaryId) + " AND dataset_id=" + str(datasetId)
-            + " AND method_id=" + str(methodId))
+        self.cur.execute("UPDATE metrics SET metric=? WHERE build_id=? AND "
+            + "libary_id=? AND dataset_id=? AND method_id=?", (str(metric),
+            buildId, libaryId, datasetId, methodId))
       else:
         self.NewMetricResult(buildId, libaryId, metric, datasetId, methodId)
 
   def UpdateBootstrapResult(self, buildId, libaryId, metric, datasetId, methodId):
     with self.con:
       if self.GetBootstrapResult(buildId, libaryId, datasetId, methodId):
-        self.cur.execute("UPDATE bootstrap SET metric='" + str(metric) + "'"
-            + " WHERE build_id=" + str(buildId) + " AND libary_id="
-            + str(libaryId) + " AND dataset_id=" + str(datasetId)
-            + " AND method_id=" + str(methodId))
+        self.cur.execute("UPDATE bootstrap SET metric=? WHERE build_id=? AND "
+            + "libary_id=? AND dataset_id=? AND method_id=?", (str(metric),
+            buildId, libaryId, datasetId, methodId))
       else:
         self.NewBootstrapResult(buildId, libaryId, metric, datasetId, methodId)
 
   def GetMetricResult(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT * FROM metrics WHERE build_id=" + str(buildId)
-          + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-          + str(datasetId) + " AND method_id=" + str(methodId))
+      self.cur.execute("SELECT * FROM metrics WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
       return self.cur.fetchall()
 
   def GetBootstrapResult(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT * FROM bootstrap WHERE build_id=" + str(buildId)
-          + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-          + str(datasetId) + " AND method_id=" + str(methodId))
+      self.cur.execute("SELECT * FROM bootstrap WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
       return self.cur.fetchall()
 
   '''
@@ -277,15 +956,74 @@ class Database:
   @param attributes - Attributes count.
   @param instances - Instances count.
   @param datasetType - Type of the dataset.
+  @param fileSize - The size of the dataset file in bytes.
+  @param fileHash - The content hash of the dataset file.
+  @param sparsity - The fraction of zero values.
+  @param mtime - The modification time of the dataset file.
+  @param path - The path of the file the informations were read from.
   @return The id of the new record in the datasets table.
   '''
-  def NewDataset(self, name, size, attributes, instances, datasetType="real"):
+  def NewDataset(self, name, size, attributes, instances, datasetType="real",
+      fileSize=None, fileHash=None, sparsity=None, mtime=None, path=None):
+    self.Flush()
     with self.con:
-      self.cur.execute("INSERT INTO datasets VALUES (NULL,?,?,?,?,?)",
-          (name, size, attributes, instances, datasetType))
+      self.cur.execute("INSERT INTO datasets (name, size, attributes, "
+          + "instances, type, bytes, hash, sparsity, mtime, path) VALUES "
+          + "(?,?,?,?,?,?,?,?,?,?)", (name, size, attributes, instances,
+          datasetType, fileSize, fileHash, sparsity, mtime, path))
       self.cur.execute("SELECT last_insert_rowid()")
       return self.cur.fetchall()[0][0]
 
+  '''
+  Update the informations of the given dataset record.
+
+  @param datasetId - The id of the dataset record.
+  @param name - The name of the dataset.
+  @param size - The size of the dataset.
+  @param attributes - Attributes count.
+  @param instances - Instances count.
+  @param datasetType - Type of the dataset.
+  @param fileSize - The size of the dataset file in bytes.
+  @param fileHash - The content hash of the dataset file.
+  @param sparsity - The fraction of zero values.
+  @param mtime - The modification time of the dataset file.
+  @param path - The path of the file the informations were read from.
+  '''
+  def UpdateDataset(self, datasetId, name, size, attributes, instances,
+      datasetType="real", fileSize=None, fileHash=None, sparsity=None,
+      mtime=None, path=None):
+    self.Flush()
+    with self.con:
+      self.cur.execute("UPDATE datasets SET size=?, attributes=?, "
+          + "instances=?, type=?, bytes=?, hash=?, sparsity=?, mtime=?, "
+          + "path=? WHERE id=?", (size, attributes, instances, datasetType,
+          fileSize, fileHash, sparsity, mtime, path, datasetId))
+
+  '''
+  Set the path of the file the informations of the dataset were read from.
+
+  @param datasetId - The id of the dataset record.
+  @param path - The path of the dataset file.
+  '''
+  def UpdateDatasetPath(self, datasetId, path):
+    self.Flush()
+    with self.con:
+      self.cur.execute("UPDATE datasets SET path=? WHERE id=?", (path,
+          datasetId))
+
+  '''
+  Get the id, the stored file size, modification time and path of the given
+  dataset.
+
+  @param name - The name of the dataset.
+  @return The records.
+  '''
+  def GetDatasetIndex(self, name):
+    with self.con:
+      self.cur.execute("SELECT id, bytes, mtime, path FROM datasets WHERE "
+          + "name=?", (name,))
+      return self.cur.fetchall()
+
   '''
   Get the informations of the given dataset.
 
@@ -294,7 +1032,7 @@ class Database:
   '''
   def GetDataset(self, name):
     with self.con:
-      self.cur.execute("SELECT id FROM datasets WHERE name='" + name  + "'")
+      self.cur.execute("SELECT id FROM datasets WHERE name=?", (name,))
       return self.cur.fetchall()
 
   '''
@@ -304,10 +1042,31 @@ class Database:
   @return The records.
   '''
   def GetBuild(self, id):
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT * FROM results WHERE build_id=" + str(id))
+      self.cur.execute("SELECT * FROM results WHERE build_id=?", (id,))
       return self.cur.fetchall()
 
+  '''
+  Get the machine fingerprint of the given build.
+
+  @param buildId - The id of the build.
+  @return Dictionary with the fingerprint or None if the build has no
+  fingerprint.
+  '''
+  def GetBuildMachine(self, buildId):
+    with self.con:
+      self.cur.execute("SELECT machines.info, builds.environment FROM builds "
+          + "JOIN machines ON machines.fingerprint = builds.fingerprint WHERE "
+          + "builds.id=?", (buildId,))
+      res = self.cur.fetchall()
+      if not res:
+        return None
+
+      machine = json.loads(res[0][0])
+      machine.update(json.loads(res[0][1] or "{}"))
+      return machine
+
   '''
   Get the libary id form the libraries table with the given name.
 
@@ -316,7 +1075,7 @@ class Database:
   '''
   def GetLibrary(self, name):
     with self.con:
-      self.cur.execute("SELECT id FROM libraries WHERE name='" + name + "'")
+      self.cur.execute("SELECT id FROM libraries WHERE name=?", (name,))
       return self.cur.fetchall()
 
   '''
@@ -326,6 +1085,7 @@ class Database:
   @return The id of the new record in the libraries table.
   '''
   def NewLibrary(self, name):
+    self.Flush()
     with self.con:
       self.cur.execute("INSERT INTO libraries VALUES (NULL,?)", (name,))
       self.cur.execute("SELECT last_insert_rowid()")
@@ -340,11 +1100,16 @@ class Database:
   @param var - The variance of the build.
   @param datasetId - The id of the dataset.
   @param methodId - The id of the method.
+  @param trials - The number of measured trials.
+  @param ciLow - The lower bound of the confidence interval of the median.
+  @param ciHigh - The upper bound of the confidence interval of the median.
   '''
-  def NewResult(self, buildId, libaryId, time, var, datasetId, methodId):
-    with self.con:
-      self.cur.execute("INSERT INTO results VALUES (NULL,?,?,?,?,?,?)",
-        (buildId, libaryId, time, var, datasetId, methodId))
+  def NewResult(self, buildId, libaryId, time, var, datasetId, methodId,
+      trials=None, ciLow=None, ciHigh=None):
+    self.Write("INSERT INTO results (build_id, libary_id, time, var, "
+        + "dataset_id, method_id, trials, ci_low, ci_high) VALUES "
+        + "(?,?,?,?,?,?,?,?,?)", (buildId, libaryId, time, var, datasetId,
+        methodId, trials, ciLow, ciHigh))
 
   '''
   Get the specified result from the results table.
@@ -356,10 +1121,11 @@ class Database:
   @return The specified result record.
   '''
   def GetResult(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT * FROM results WHERE build_id=" + str(buildId)
-          + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-          + str(datasetId) + " AND method_id=" + str(methodId))
+      self.cur.execute("SELECT * FROM results WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
       return self.cur.fetchall()
 
   '''
@@ -372,16 +1138,217 @@ class Database:
   @param var - The variance of the build.
   @param datasetId - The id of the dataset.
   @param methodId - The id of the method.
+  @param trials - The number of measured trials.
+  @param ciLow - The lower bound of the confidence interval of the median.
+  @param ciHigh - The upper bound of the confidence interval of the median.
   '''
-  def UpdateResult(self, buildId, libaryId, time, var, datasetId, methodId):
+  def UpdateResult(self, buildId, libaryId, time, var, datasetId, methodId,
+      trials=None, ciLow=None, ciHigh=None):
     with self.con:
       if self.GetResult(buildId, libaryId, datasetId, methodId):
-        self.cur.execute("UPDATE results SET time=" + str(time) + ",var="
-            + str(var) + " WHERE build_id=" + str(buildId) + " AND libary_id="
-            + str(libaryId) + " AND dataset_id=" + str(datasetId)
-            + " AND method_id=" + str(methodId))
+        self.cur.execute("UPDATE results SET time=?, var=?, trials=?, "
+            + "ci_low=?, ci_high=? WHERE build_id=? AND libary_id=? AND "
+            + "dataset_id=? AND method_id=?", (time, var, trials, ciLow,
+            ciHigh, buildId, libaryId, datasetId, methodId))
       else:
-        self.NewResult(buildId, libaryId, time, var, datasetId, methodId)
+        self.NewResult(buildId, libaryId, time, var, datasetId, methodId,
+            trials, ciLow, ciHigh)
+
+  '''
+  Get the status of a trial from the measured time. The scripts return -2 if
+  the method timed out and -1 if the method failed.
+
+  @param time - The measured time of the trial.
+  @return The status ('ok', 'timeout' or 'failure').
+  '''
+  @staticmethod
+  def TrialStatus(time):
+    if time == -2:
+      return "timeout"
+    elif time < 0:
+      return "failure"
+    return "ok"
+
+  '''
+  Add the trial records of a cell to the trial_results table.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param times - The measured time of every trial.
+  @param usages - The resource usage of every trial (see timer.Usage).
+  @param threads - The thread count of the trials or None if the thread
+  settings were inherited.
+  '''
+  def NewTrialResults(self, buildId, libaryId, datasetId, methodId, times,
+      usages, threads=None):
+    columns = ["wall", "cpu", "children_cpu", "maxrss", "children_maxrss",
+        "majflt", "minflt", "nvcsw", "nivcsw"]
+
+    records = []
+    for trial, time in enumerate(times):
+      usage = usages[trial] if trial < len(usages) and usages[trial] else {}
+      records.append((buildId, libaryId, datasetId, methodId, trial, time,
+          threads, Database.TrialStatus(time)) + tuple(usage.get(column)
+          for column in columns))
+
+    self.Write("INSERT INTO trial_results (build_id, libary_id, dataset_id, "
+        + "method_id, trial, time, threads, status, " + ", ".join(columns)
+        + ") VALUES (" + ",".join(["?"] * (len(columns) + 8)) + ")", records,
+        many=True)
+
+  '''
+  Get the trial records of a cell.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @return The records ordered by the trial.
+  '''
+  def GetTrialResults(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT * FROM trial_results WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=? ORDER BY threads, "
+          + "trial", (buildId, libaryId, datasetId, methodId))
+      return self.cur.fetchall()
+
+  '''
+  Get the trial records for the specified method and build id.
+
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
+  @param methodId - The method id.
+  @return A list with the records (dataset name, thread count, status, time)
+  ordered by the dataset, the thread count and the trial.
+  '''
+  def GetMethodTrialResultsForLibrary(self, buildId, methodId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT datasets.name, threads, status, time FROM "
+          + "trial_results JOIN datasets ON trial_results.dataset_id = "
+          + "datasets.id WHERE " + self.SameRun("build_id") + " AND "
+          + "method_id=? ORDER BY datasets.name, threads, trial", (buildId,
+          methodId))
+      return self.cur.fetchall()
+
+  '''
+  Remove the trial records of a cell.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  '''
+  def DeleteTrialResults(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("DELETE FROM trial_results WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
+
+  '''
+  Add a new result record of a thread count to the thread_results table.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param threads - The thread count.
+  @param time - The mesured time.
+  @param var - The variance of the trials.
+  '''
+  def NewThreadResult(self, buildId, libaryId, datasetId, methodId, threads,
+      time, var):
+    self.Write("INSERT INTO thread_results VALUES (NULL,?,?,?,?,?,?,?)",
+        (buildId, libaryId, datasetId, methodId, threads, time, var))
+
+  '''
+  Remove the thread records of a cell.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  '''
+  def DeleteThreadResults(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("DELETE FROM thread_results WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
+
+  '''
+  Get the thread results for the specified method and build id.
+
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
+  @param methodId - The method id.
+  @return A list with the records (dataset name, thread count, time).
+  '''
+  def GetMethodThreadResultsForLibrary(self, buildId, methodId):
+    with self.con:
+      self.cur.execute("SELECT datasets.name, threads, time FROM thread_results"
+          + " JOIN datasets ON thread_results.dataset_id = datasets.id WHERE "
+          + self.SameRun("build_id") + " AND method_id=? ORDER BY "
+          + "datasets.name, threads", (buildId, methodId))
+      return self.cur.fetchall()
+
+  '''
+  Add a new complexity record of an axis to the complexity table.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param axis - The subsampled axis ('n' for the rows, 'd' for the columns).
+  @param size - The full size of the axis.
+  @param exponent - The fitted scaling exponent.
+  @param low - The lower bound of the confidence interval of the exponent.
+  @param high - The upper bound of the confidence interval of the exponent.
+  @param intercept - The intercept of the log-log fit.
+  @param points - The measured (size, time) points as JSON string.
+  '''
+  def NewComplexityResult(self, buildId, libaryId, datasetId, methodId, axis,
+      size, exponent, low, high, intercept, points):
+    self.Write("INSERT INTO complexity VALUES (NULL,?,?,?,?,?,?,?,?,?,?,?)",
+        (buildId, libaryId, datasetId, methodId, axis, size, exponent, low,
+        high, intercept, points))
+
+  '''
+  Remove the complexity records of a cell.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  '''
+  def DeleteComplexityResults(self, buildId, libaryId, datasetId, methodId):
+    self.Flush()
+    with self.con:
+      self.cur.execute("DELETE FROM complexity WHERE build_id=? AND "
+          + "libary_id=? AND dataset_id=? AND method_id=?", (buildId, libaryId,
+          datasetId, methodId))
+
+  '''
+  Get the complexity results for the specified method and build id.
+
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
+  @param methodId - The method id.
+  @return A list with the records (dataset name, axis, size, exponent, lower
+  bound, upper bound, intercept).
+  '''
+  def GetMethodComplexityResultsForLibrary(self, buildId, methodId):
+    with self.con:
+      self.cur.execute("SELECT datasets.name, axis, complexity.size, exponent,"
+          + " ci_low, ci_high, intercept FROM complexity JOIN datasets ON"
+          + " complexity.dataset_id = datasets.id WHERE "
+          + self.SameRun("build_id") + " AND method_id=? ORDER BY "
+          + "datasets.name, axis", (buildId, methodId))
+      return self.cur.fetchall()
 
   '''
   Get the method id from the methods table with the given name and parameters.
@@ -392,8 +1359,8 @@ class Database:
   '''
   def GetMethod(self, name, parameters):
      with self.con:
-      self.cur.execute("SELECT id FROM methods WHERE name='" + name +
-          "' AND parameters='" + parameters + "'")
+      self.cur.execute("SELECT id FROM methods WHERE name=? AND "
+          + "parameters=?", (name, parameters))
       return self.cur.fetchall()
 
   '''
@@ -405,6 +1372,7 @@ class Database:
   @return The record id.
   '''
   def NewMethod(self, name, parameters, alias):
+    self.Flush()
     with self.con:
       self.cur.execute("INSERT INTO methods VALUES (NULL,?, ?,?)",
           (name, parameters, alias))
@@ -412,33 +1380,30 @@ class Database:
       return self.cur.fetchall()[0][0]
 
   def UpdateMethod(self, methodId, alias):
-    self.cur.execute("UPDATE methods SET alias=\'" + alias + "\' WHERE id="
-        + str(methodId))
+    self.Flush()
+    with self.con:
+      self.cur.execute("UPDATE methods SET alias=? WHERE id=?", (alias,
+          methodId))
 
   '''
-  Get the sum of the time column of all build of the given name.
+  Get the sum of the time column of all build of the given name. The builds of
+  a run are summed together.
 
   @param name - The name of the library.
   @return The sum of the time column if there are records otherwise None.
   '''
   def GetResultsSum(self, name):
-    libaryId = self.GetLibrary(name)
-    if libaryId:
-      libaryId = libaryId[0][0]
-    else:
-      return None
-
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build ASC")
-      timeSummed = []
+      self.cur.execute("SELECT MAX(builds.id), SUM(build_summary.time) FROM "
+          + "builds JOIN libraries ON builds.libary_id = libraries.id LEFT "
+          + "JOIN build_summary ON build_summary.build_id = builds.id WHERE "
+          + "libraries.name=? GROUP BY " + Database.RunGroup("builds")
+          + " ORDER BY MIN(builds.build) ASC", (name,))
       res = self.cur.fetchall()
-      for buildId in res:
-        self.cur.execute("SELECT SUM(time) FROM results WHERE build_id=" +
-           str(buildId[0]))
-        timeSummed.append(self.cur.fetchall()[0][0])
+
     if res:
-      return (buildId[0], timeSummed)
+      return (res[-1][0], [timeSum for buildId, timeSum in res])
     else:
       return None
 
@@ -456,12 +1421,15 @@ class Database:
   Get the latest build id for the specified libary id.
 
   @param libaryId - Get the build id for the libary id.
+  @param fingerprint - If set, only the builds of the machine with the given
+  fingerprint and the builds without a fingerprint are taken into account.
   @param The latest build id if there is a latest build otherwise -1.
   '''
-  def GetLatestBuildFromLibary(self, libaryId):
+  def GetLatestBuildFromLibary(self, libaryId, fingerprint=None):
     with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build DESC")
+      self.cur.execute("SELECT id FROM builds WHERE libary_id=? AND (? IS NULL "
+          + "OR fingerprint IS NULL OR fingerprint=?) ORDER BY build DESC",
+          (libaryId, fingerprint, fingerprint))
       res = self.cur.fetchall()
       if res:
         return res
@@ -469,12 +1437,441 @@ class Database:
         return [(-1,)]
 
   def CopyLatestBuildFromLibary(self, buildId, newBuildId):
-    self.cur.execute("SELECT * FROM results WHERE build_id=" + str(buildId))
+    self.cur.execute("SELECT * FROM results WHERE build_id=?", (buildId,))
     results = self.cur.fetchall()
     with self.con:
       for res in results:
-        self.cur.execute("INSERT INTO results VALUES (NULL,?,?,?,?,?,?)",
-            (newBuildId, res[2], res[3], res[4], res[5], res[6]))
+        self.NewResult(newBuildId, *res[2:])
+
+  '''
+  Get the cached result of the given key.
+
+  @param key - The cache key.
+  @return The records (result, created).
+  '''
+  def GetCachedResult(self, key):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT result, created FROM result_cache WHERE key=?",
+          (key,))
+      return self.cur.fetchall()
+
+  '''
+  Add or replace a cached result in the result_cache table.
+
+  @param key - The cache key.
+  @param result - The result as string.
+  @param created - The creation time in seconds since the epoch.
+  '''
+  def NewCachedResult(self, key, result, created):
+    self.Write("INSERT OR REPLACE INTO result_cache VALUES (?,?,?)", (key,
+        result, created))
+
+  '''
+  Get the builds which are dropped by the retention policy. The latest builds
+  of every library are kept; of the older builds only the latest build of
+  every period is kept.
+
+  @param keep - The number of latest builds of every library which are kept.
+  @param period - The period of the older builds ('week' or 'month') or None
+  to drop all older builds.
+  @return List of the ids of the dropped builds.
+  '''
+  def GetExpiredBuilds(self, keep, period="month"):
+    periods = {"week": "%Y-%W", "month": "%Y-%m"}
+
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT id, libary_id, strftime(?, build) FROM builds "
+          + "ORDER BY libary_id, build DESC, id DESC",
+          (periods.get(period, ""),))
+      builds = self.cur.fetchall()
+
+    expired = []
+    count, seen = {}, set()
+    for buildId, libaryId, key in builds:
+      count[libaryId] = count.get(libaryId, 0) + 1
+      if count[libaryId] <= keep:
+        continue
+
+      if period and key and (libaryId, key) not in seen:
+        seen.add((libaryId, key))
+      else:
+        expired.append(buildId)
+
+    return sorted(expired)
+
+  '''
+  Write the records of the given builds to a compressed archive. Every line
+  of the archive is a JSON object with the table and the record; the library,
+  dataset and method records used by the builds are written as well.
+
+  @param buildIds - The ids of the builds.
+  @param fileName - The name of the archive file (gzip).
+  '''
+  def ArchiveBuilds(self, buildIds, fileName):
+    tables = ["builds", "results", "trial_results", "thread_results",
+        "complexity", "metrics", "bootstrap", "memory", "journal"]
+    references = {"libary_id": ("libraries", set()),
+        "dataset_id": ("datasets", set()), "method_id": ("methods", set())}
+
+    self.Flush()
+    with gzip.open(fileName + ".tmp", "wt") as fid:
+      for table in tables:
+        column = "id" if table == "builds" else "build_id"
+        for ids in Database.Chunks(buildIds):
+          self.cur.execute("SELECT * FROM " + table + " WHERE " + column
+              + " IN (" + ",".join("?" * len(ids)) + ")", ids)
+          names = [description[0] for description in self.cur.description]
+
+          for row in self.cur.fetchall():
+            record = dict(zip(names, row))
+            for name, (referenced, used) in references.items():
+              if record.get(name) is not None:
+                used.add(record[name])
+
+            fid.write(json.dumps({"table": table, "record": record},
+                default=str) + "\n")
+
+      for referenced, used in references.values():
+        for ids in Database.Chunks(sorted(used)):
+          self.cur.execute("SELECT * FROM " + referenced + " WHERE id IN ("
+              + ",".join("?" * len(ids)) + ")", ids)
+          names = [description[0] for description in self.cur.description]
+          for row in self.cur.fetchall():
+            fid.write(json.dumps({"table": referenced,
+                "record": dict(zip(names, row))}, default=str) + "\n")
+
+    os.rename(fileName + ".tmp", fileName)
+
+  '''
+  Remove the given builds, the records of the builds are removed by the
+  foreign keys of the tables.
+
+  @param buildIds - The ids of the builds.
+  '''
+  def DeleteBuilds(self, buildIds):
+    self.Flush()
+    with self.con:
+      for ids in Database.Chunks(buildIds):
+        self.cur.execute("DELETE FROM builds WHERE id IN ("
+            + ",".join("?" * len(ids)) + ")", ids)
+
+  '''
+  Rebuild the database file to release the space of removed records and
+  update the statistics of the query planner.
+  '''
+  def Compact(self):
+    self.Flush()
+    self.con.commit()
+    self.con.execute("VACUUM")
+    self.con.execute("ANALYZE")
+    self.con.execute("pragma wal_checkpoint(truncate)")
+
+  '''
+  Split the given ids into chunks which fit into the parameter limit of a
+  statement.
+
+  @param ids - List of ids.
+  @param size - The maximal number of ids of a chunk.
+  @return List of the chunks.
+  '''
+  @staticmethod
+  def Chunks(ids, size=500):
+    ids = list(ids)
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+  '''
+  Get the latest build of every library.
+
+  @return A list with the records (library id, library name, build id)
+  ordered by the library id.
+  '''
+  def GetLatestBuilds(self):
+    with self.con:
+      self.cur.execute("SELECT libraries.id, libraries.name, "
+          + "latest_builds.build_id FROM libraries JOIN latest_builds ON "
+          + "latest_builds.libary_id = libraries.id ORDER BY libraries.id")
+      return self.cur.fetchall()
+
+  '''
+  Get the latest result of every method, dataset and library for the export
+  of the reports.
+
+  @return A list with the records (method name, parameters, time, var,
+  library id, library name, dataset name, dataset id, instances, attributes,
+  size) ordered by the method, the parameters and the dataset id.
+  '''
+  def GetLatestResults(self):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT methods.name, methods.parameters, "
+          + "latest_results.time, latest_results.var, libraries.id, "
+          + "libraries.name, datasets.name, datasets.id, datasets.instances, "
+          + "datasets.attributes, datasets.size FROM latest_results JOIN "
+          + "libraries ON latest_results.libary_id = libraries.id JOIN "
+          + "datasets ON latest_results.dataset_id = datasets.id JOIN methods "
+          + "ON latest_results.method_id = methods.id ORDER BY methods.name, "
+          + "methods.parameters, datasets.id, libraries.id")
+      return self.cur.fetchall()
+
+  '''
+  Get the results of all builds for the export of the reports. Only the builds
+  which ran on the machine of the latest build of the library are taken into
+  account, so the history doesn't mix the timings of different machines.
+
+  @return A list with the records (method name, parameters, dataset name,
+  time, var, build id, build, library name) ordered by the method, the
+  parameters, the dataset and the build.
+  '''
+  def GetResultsHistory(self):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT methods.name, methods.parameters, datasets.name, "
+          + "results.time, results.var, results.build_id, builds.build, "
+          + "libraries.name FROM results JOIN builds ON results.build_id = "
+          + "builds.id JOIN libraries ON results.libary_id = libraries.id JOIN "
+          + "datasets ON results.dataset_id = datasets.id JOIN methods ON "
+          + "results.method_id = methods.id WHERE " + self.SameMachine("builds")
+          + " ORDER BY methods.name, "
+          + "methods.parameters, datasets.name, builds.build, builds.id")
+      return self.cur.fetchall()
+
+  '''
+  Get the latest non-empty metrics of every method, dataset and library for the
+  export of the reports.
+
+  @return A list with the records (method name, parameters, metric, library
+  id, library name, dataset name, dataset id) ordered by the method, the
+  parameters and the dataset id.
+  '''
+  def GetLatestMetrics(self):
+    self.Flush()
+    with self.con:
+      # The bare columns are taken from the row of the latest build.
+      self.cur.execute("SELECT methods.name, methods.parameters, "
+          + "metrics.metric, libraries.id, libraries.name, datasets.name, "
+          + "datasets.id, MAX(builds.build) FROM metrics JOIN builds ON "
+          + "metrics.build_id = builds.id JOIN libraries ON metrics.libary_id "
+          + "= libraries.id JOIN datasets ON metrics.dataset_id = datasets.id "
+          + "JOIN methods ON metrics.method_id = methods.id WHERE "
+          + "metrics.metric<>'{}' GROUP BY metrics.method_id, "
+          + "metrics.dataset_id, metrics.libary_id ORDER BY methods.name, "
+          + "methods.parameters, datasets.id, libraries.id")
+      return [row[:-1] for row in self.cur.fetchall()]
+
+  '''
+  Get the metrics of all builds for the export of the reports. Only the builds
+  which ran on the machine of the latest build of the library are taken into
+  account.
+
+  @return A list with the records (method name, parameters, dataset name,
+  metric, build id, build, library name) ordered by the method, the parameters,
+  the dataset and the build.
+  '''
+  def GetMetricsHistory(self):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT methods.name, methods.parameters, datasets.name, "
+          + "metrics.metric, metrics.build_id, builds.build, libraries.name "
+          + "FROM metrics JOIN builds ON metrics.build_id = builds.id JOIN "
+          + "libraries ON metrics.libary_id = libraries.id JOIN datasets ON "
+          + "metrics.dataset_id = datasets.id JOIN methods ON "
+          + "metrics.method_id = methods.id WHERE " + self.SameMachine("builds")
+          + " ORDER BY methods.name, "
+          + "methods.parameters, datasets.name, builds.build, builds.id")
+      return self.cur.fetchall()
+
+  '''
+  Get the condition which selects the builds that ran on the machines of the
+  latest run of their library. Builds without a fingerprint match every
+  machine.
+
+  @param table - The name (or alias) of the builds table in the query.
+  @return The SQL condition.
+  '''
+  def SameMachine(self, table):
+    return ("(" + table + ".fingerprint IS NULL OR " + table + ".fingerprint "
+        + "IN (SELECT IFNULL(b.fingerprint, " + table + ".fingerprint) FROM "
+        + "latest_builds l JOIN builds r ON r.id = l.build_id JOIN builds b ON "
+        + "b.libary_id = r.libary_id AND (b.run = r.run OR b.id = r.id) WHERE "
+        + "l.libary_id = " + table + ".libary_id))")
+
+  '''
+  Get the grouping of the builds by their run, a build without a run is a
+  group of its own.
+
+  @param table - The name (or alias) of the builds table in the query.
+  @return The SQL group by expressions.
+  '''
+  @staticmethod
+  def RunGroup(table):
+    return table + ".run, IFNULL(" + table + ".run, " + table + ".id)"
+
+  '''
+  Get the condition which selects the builds of the run of a build. The builds
+  of a run which was distributed over several machines share the run, a build
+  without a run only selects itself.
+
+  @param column - The build id column in the query.
+  @return The SQL condition, the parameter of the condition is the build id.
+  '''
+  def SameRun(self, column):
+    return (column + " IN (SELECT b.id FROM builds r JOIN builds b ON "
+        + "b.libary_id = r.libary_id AND (b.run = r.run OR b.id = r.id) WHERE "
+        + "r.id = ?)")
+
+  '''
+  Import the builds of another benchmark database, e.g. of a benchmark which
+  ran on another machine. The libraries, datasets and methods are matched by
+  their name (and parameters), the missing records are added; the builds are
+  added with new ids together with their results, trials, thread results,
+  complexity fits, metrics, bootstrap results and memory records. A build
+  which was already imported (same library, time and machine) is skipped, so
+  a database can be merged again after it got new builds.
+
+  @param databasePath - Path to the database which is imported.
+  @param machine - The machine which is stored with the imported builds which
+  don't have a machine.
+  @return Dictionary with the number of imported records of every table.
+  '''
+  def MergeDatabase(self, databasePath, machine):
+    tables = ["results", "trial_results", "thread_results", "complexity",
+        "metrics", "bootstrap", "memory"]
+    references = {"build_id": "builds", "libary_id": "libraries",
+        "dataset_id": "datasets", "method_id": "methods"}
+
+    # Values of the columns which are missing in older databases.
+    defaults = {"finished": "1", "machine": "?", "status": "CASE WHEN "
+        + "s.time = -2 THEN 'timeout' WHEN s.time < 0 THEN 'failure' ELSE "
+        + "'ok' END"}
+
+    self.Flush()
+    self.con.commit()
+    self.cur.execute("ATTACH DATABASE ? AS source", (databasePath,))
+
+    try:
+      with self.con:
+        counts = {}
+        for table, keys in [("libraries", ["name"]), ("datasets", ["name"]),
+            ("methods", ["name", "parameters"])]:
+          counts[table] = self.MergeRecords(table, keys)
+
+        # The id map of the builds, the builds which were already imported
+        # are marked with the id -1.
+        columns = self.Columns("source", "builds")
+        self.cur.execute("DROP TABLE IF EXISTS temp.merge_builds")
+        self.cur.execute("CREATE TEMP TABLE merge_builds AS SELECT s.id AS "
+            + "source_id, s.build, l.id AS libary_id, "
+            + ("s.finished" if "finished" in columns else defaults["finished"])
+            + " AS finished, " + ("COALESCE(s.machine, ?)" if "machine" in
+            columns else defaults["machine"]) + " AS machine, " + (
+            "s.fingerprint" if "fingerprint" in columns else "NULL")
+            + " AS fingerprint, " + ("s.environment" if "environment" in
+            columns else "NULL") + " AS environment, " + ("s.run" if "run" in
+            columns else "NULL") + " AS run, NULL AS id "
+            + "FROM source.builds s JOIN merge_libraries l ON l.source_id = "
+            + "s.libary_id", (machine,))
+        self.cur.execute("UPDATE merge_builds SET id = -1 WHERE EXISTS "
+            + "(SELECT 1 FROM main.builds m WHERE m.build = merge_builds.build "
+            + "AND m.libary_id = merge_builds.libary_id AND m.machine IS "
+            + "merge_builds.machine)")
+        self.cur.execute("INSERT INTO main.builds (build, libary_id, finished, "
+            + "machine, fingerprint, environment, run) SELECT build, "
+            + "libary_id, finished, machine, fingerprint, environment, run "
+            + "FROM merge_builds WHERE id IS NULL ORDER BY source_id")
+        counts["builds"] = self.cur.rowcount
+        self.cur.execute("UPDATE merge_builds SET id = (SELECT MAX(m.id) FROM "
+            + "main.builds m WHERE m.build = merge_builds.build AND "
+            + "m.libary_id = merge_builds.libary_id AND m.machine IS "
+            + "merge_builds.machine) WHERE id IS NULL")
+        self.cur.execute("DELETE FROM merge_builds WHERE id = -1")
+
+        for table in tables:
+          columns = self.Columns("source", table)
+          if not columns:
+            continue
+
+          names, values, joins = [], [], []
+          for column in self.Columns("main", table):
+            if column == "id":
+              continue
+
+            if column in references:
+              values.append(column + "_map.id")
+              joins.append("JOIN merge_" + references[column] + " " + column
+                  + "_map ON " + column + "_map.source_id = s." + column)
+            elif column in columns:
+              values.append("s." + column)
+            elif column in defaults and column != "machine":
+              values.append(defaults[column])
+            else:
+              continue
+            names.append(column)
+
+          self.cur.execute("INSERT INTO main." + table + " (" + ", ".join(names)
+              + ") SELECT " + ", ".join(values) + " FROM source." + table
+              + " s " + " ".join(joins) + " ORDER BY s.id")
+          counts[table] = self.cur.rowcount
+
+        if self.Columns("source", "machines"):
+          self.cur.execute("INSERT OR IGNORE INTO main.machines (fingerprint, "
+              + "info) SELECT fingerprint, info FROM source.machines")
+          counts["machines"] = self.cur.rowcount
+
+        if self.Columns("source", "method_info"):
+          self.cur.execute("INSERT INTO main.method_info (method_id, info) "
+              + "SELECT m.id, s.info FROM source.method_info s JOIN "
+              + "merge_methods m ON m.source_id = s.method_id WHERE NOT EXISTS "
+              + "(SELECT 1 FROM main.method_info i WHERE i.method_id = m.id) "
+              + "GROUP BY m.id")
+          counts["method_info"] = self.cur.rowcount
+
+        for table in ["libraries", "datasets", "methods", "builds"]:
+          self.cur.execute("DROP TABLE temp.merge_" + table)
+    finally:
+      self.cur.execute("DETACH DATABASE source")
+
+    return counts
+
+  '''
+  Add the records of the given table of the attached source database which
+  are missing and create the map of the source ids (temp.merge_<table>). The
+  records are matched by the given key columns.
+
+  @param table - The name of the table.
+  @param keys - The key columns of the records.
+  @return The number of added records.
+  '''
+  def MergeRecords(self, table, keys):
+    source = self.Columns("source", table)
+    columns = [column for column in self.Columns("main", table) if column !=
+        "id" and column in source]
+    match = " AND ".join("m." + key + " = s." + key for key in keys)
+
+    self.cur.execute("INSERT INTO main." + table + " (" + ", ".join(columns)
+        + ") SELECT " + ", ".join("s." + column for column in columns)
+        + " FROM source." + table + " s WHERE s.id IN (SELECT MIN(id) FROM "
+        + "source." + table + " GROUP BY " + ", ".join(keys) + ") AND NOT "
+        + "EXISTS (SELECT 1 FROM main." + table + " m WHERE " + match + ")")
+    count = self.cur.rowcount
+
+    self.cur.execute("DROP TABLE IF EXISTS temp.merge_" + table)
+    self.cur.execute("CREATE TEMP TABLE merge_" + table + " AS SELECT s.id AS "
+        + "source_id, (SELECT MIN(m.id) FROM main." + table + " m WHERE "
+        + match + ") AS id FROM source." + table + " s")
+    return count
+
+  '''
+  Get the column names of the given table.
+
+  @param schema - The name of the database (main or an attached database).
+  @param table - The name of the table.
+  @return List of the column names, the list is empty if there is no table.
+  '''
+  def Columns(self, schema, table):
+    self.cur.execute("PRAGMA " + schema + ".table_info(" + table + ")")
+    return [column[1] for column in self.cur.fetchall()]
 
   '''
   Get a list of all methods.
@@ -489,68 +1886,100 @@ class Database:
   '''
   Get the results for the specified method and build id.
 
-  @param buildId - The build id.
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
   @param methodId - The method id.
   @return A list with the results.
   '''
   def GetMethodResultsForLibary(self, buildId, methodId):
     with self.con:
-      self.cur.execute("SELECT * FROM results JOIN datasets ON" +
-          " results.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
+      self.cur.execute("SELECT results.id, build_id, libary_id, time, var, " +
+          "dataset_id, method_id, datasets.* FROM results JOIN datasets ON" +
+          " results.dataset_id = datasets.id WHERE " + self.SameRun("build_id")
+          + " AND method_id=? ORDER BY datasets.name", (buildId, methodId))
       return self.cur.fetchall()
 
   '''
   Get the metrics results for the specified method and build id.
 
-  @param buildId - The build id.
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
   @param methodId - The method id.
   @return A list with the results.
   '''
   def GetMethodMetricResultsForLibrary(self, buildId, methodId):
     with self.con:
       self.cur.execute("SELECT * FROM metrics JOIN datasets ON" +
-          " metrics.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
+          " metrics.dataset_id = datasets.id WHERE " + self.SameRun("build_id")
+          + " AND method_id=? ORDER BY datasets.name", (buildId, methodId))
       return self.cur.fetchall()
 
   '''
   Get the bootstrap results for the specified method and build id.
 
-  @param buildId - The build id.
+  @param buildId - The build id, the records of all builds of its run are
+  returned.
   @param methodId - The method id.
   @return A list with the results.
   '''
   def GetMethodBootstrapResultsForLibrary(self, buildId, methodId):
     with self.con:
       self.cur.execute("SELECT * FROM bootstrap JOIN datasets ON" +
-          " bootstrap.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
+          " bootstrap.dataset_id = datasets.id WHERE " +
+          self.SameRun("build_id") + " AND method_id=? ORDER BY datasets.name",
+          (buildId, methodId))
       return self.cur.fetchall()
 
   '''
-  Get the sum of the time column of all build of the given method.
+  Get the sum of the time column of all build of the given method. The builds
+  of a run are summed together.
 
   @param name - The name of the library.
   @param methodId - The method id.
   @return The sum of the time column if there are records otherwise None.
   '''
   def GetResultsMethodSum(self, name, methodId):
-    libaryId = self.GetLibrary(name)[0][0]
+    self.Flush()
     with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build ASC")
-      timeSummed = []
+      self.cur.execute("SELECT MAX(builds.id), SUM(build_summary.time) FROM "
+          + "builds JOIN libraries ON builds.libary_id = libraries.id LEFT "
+          + "JOIN build_summary ON build_summary.build_id = builds.id AND "
+          + "build_summary.method_id=? WHERE libraries.name=? GROUP BY "
+          + Database.RunGroup("builds") + " ORDER BY MIN(builds.build) ASC",
+          (methodId, name))
       res = self.cur.fetchall()
-      for buildId in res:
-        self.cur.execute("SELECT SUM(time) FROM results WHERE build_id=" +
-           str(buildId[0]) + " AND method_id=" + str(methodId))
-        timeSummed.append(self.cur.fetchall()[0][0])
+
     if res:
-      return (buildId[0], timeSummed)
+      return (res[-1][0], [timeSum for buildId, timeSum in res])
     else:
       return None
 
+  '''
+  Get the sum of the time column of all builds of the given library for every
+  method with a single query.
+
+  @param name - The name of the library.
+  @return Dictionary with the method id as key and the value of
+  GetResultsMethodSum, the dictionary is empty if there are no builds.
+  '''
+  def GetResultsMethodSums(self, name):
+    self.Flush()
+    with self.con:
+      self.cur.execute("SELECT methods.id, MAX(builds.id), "
+          + "SUM(build_summary.time) FROM builds JOIN libraries ON "
+          + "builds.libary_id = libraries.id JOIN methods LEFT JOIN "
+          + "build_summary ON build_summary.build_id = builds.id AND "
+          + "build_summary.method_id = methods.id WHERE libraries.name=? "
+          + "GROUP BY methods.id, " + Database.RunGroup("builds") + " ORDER BY "
+          + "methods.id, MIN(builds.build) ASC", (name,))
+
+      sums = {}
+      for methodId, buildId, timeSum in self.cur.fetchall():
+        timeSummed = sums[methodId][1] if methodId in sums else []
+        timeSummed.append(timeSum)
+        sums[methodId] = (buildId, timeSummed)
+      return sums
+
   '''
   Add a new memory record to the memory table.
 
@@ -561,9 +1990,8 @@ class Database:
   @param memoryInfo - The text for the memory value.
   '''
   def NewMemory(self, buildId, libaryId, methodId, datasetId, memoryInfo):
-     with self.con:
-      self.cur.execute("INSERT INTO memory VALUES (NULL,?,?,?,?,?)",
-          (buildId, libaryId, methodId, datasetId, memoryInfo))
+    self.Write("INSERT INTO memory VALUES (NULL,?,?,?,?,?)", (buildId,
+        libaryId, methodId, datasetId, memoryInfo))
 
   '''
   Update the given memory record in the memory table if the record is available
@@ -579,10 +2007,9 @@ class Database:
      with self.con:
 
       if self.GetMemoryResults(buildId, libaryId, methodId):
-        self.cur.execute("UPDATE memory SET memory_info=\'" + memoryInfo
-          + "\' WHERE build_id=" + str(buildId) + " AND libary_id="
-          + str(libaryId) + " AND dataset_id=" + str(datasetId)
-          + " AND method_id=" + str(methodId))
+        self.cur.execute("UPDATE memory SET memory_info=? WHERE build_id=? "
+          + "AND libary_id=? AND dataset_id=? AND method_id=?", (memoryInfo,
+          buildId, libaryId, datasetId, methodId))
       else:
         self.NewMemory(buildId, libaryId, methodId, datasetId, memoryInfo)
 
@@ -595,10 +2022,11 @@ class Database:
   @return The memory informations of the method.
   '''
   def GetMemoryResults(self, buildId, libaryId, methodId):
+    self.Flush()
     with self.con:
       self.cur.execute("SELECT * FROM memory JOIN datasets ON " +
-        "memory.dataset_id = datasets.id WHERE libary_id=" + str(libaryId) +
-        " AND build_id="+ str(buildId) + " AND method_id=" + str(methodId))
+        "memory.dataset_id = datasets.id WHERE build_id=? AND libary_id=? " +
+        "AND method_id=?", (buildId, libaryId, methodId))
       return self.cur.fetchall()
 
   '''
@@ -609,8 +2037,8 @@ class Database:
   '''
   def GetMethodInfo(self, methodId):
     with self.con:
-      self.cur.execute("SELECT * FROM method_info WHERE method_id=" +
-          str(methodId))
+      self.cur.execute("SELECT * FROM method_info WHERE method_id=?",
+          (methodId,))
       return self.cur.fetchall()
 
   '''
@@ -620,6 +2048,7 @@ class Database:
   @param info - The info for the method.
   '''
   def NewMethodInfo(self, methodId, info):
+    self.Flush()
     with self.con:
       self.cur.execute("INSERT INTO method_info VALUES (NULL,?,?)",
         (methodId, info))
@@ -632,6 +2061,115 @@ class Database:
   '''
   def GetMethodParameters(self, methodId):
     with self.con:
-      self.cur.execute("SELECT parameters FROM methods WHERE id=" +
-          str(methodId))
+      self.cur.execute("SELECT parameters FROM methods WHERE id=?",
+          (methodId,))
       return self.cur.fetchall()
+
+'''
+This class writes the queued statements of a database in a background thread
+with its own connection. The statements are committed in batches of the given
+size and when the queue is flushed, so a benchmark doesn't wait for the disk
+after every record.
+'''
+class DatabaseWriter(object):
+
+  '''
+  Start the writer thread.
+
+  @param databasePath - Path to the database.
+  @param batchSize - The number of statements committed together.
+  '''
+  def __init__(self, databasePath, batchSize=500):
+    self.databasePath = databasePath
+    self.batchSize = batchSize
+    self.queue = queue.Queue()
+    self.pending = 0
+    self.error = None
+
+    # The thread doesn't keep the program alive, the queued statements are
+    # written by Close, which runs at exit.
+    self.thread = threading.Thread(target=self.Run)
+    self.thread.daemon = True
+    self.thread.start()
+
+  '''
+  Queue the given statement.
+
+  @param statement - The SQL statement.
+  @param parameters - The parameters of the statement.
+  @param many - Execute the statement for every parameter tuple.
+  '''
+  def Put(self, statement, parameters, many=False):
+    self.pending += 1
+    self.queue.put((statement, parameters, many))
+
+  '''
+  Wait until the queued statements are committed. An error of the queued
+  statements is raised here.
+  '''
+  def Flush(self):
+    if self.pending:
+      done = threading.Event()
+      self.queue.put(done)
+      done.wait()
+      self.pending = 0
+
+    if self.error:
+      error, self.error = self.error, None
+      raise error
+
+  '''
+  Commit the queued statements and stop the thread.
+  '''
+  def Close(self):
+    self.queue.put(None)
+    self.thread.join()
+    self.pending = 0
+
+    if self.error:
+      error, self.error = self.error, None
+      raise error
+
+  '''
+  Execute the queued statements until the writer is closed.
+  '''
+  def Run(self):
+    con = Database.Connect(self.databasePath)
+    count = 0
+
+    while True:
+      item = self.queue.get()
+
+      if item is None or isinstance(item, threading.Event):
+        self.Commit(con)
+        count = 0
+        if item is None:
+          con.close()
+          return
+        item.set()
+        continue
+
+      statement, parameters, many = item
+      try:
+        if many:
+          con.executemany(statement, parameters)
+        else:
+          con.execute(statement, parameters)
+      except sqlite3.Error as e:
+        self.error = self.error or e
+
+      count += 1
+      if count >= self.batchSize:
+        self.Commit(con)
+        count = 0
+
+  '''
+  Commit the open transaction of the given connection.
+
+  @param con - The connection of the writer thread.
+  '''
+  def Commit(self, con):
+    try:
+      con.commit()
+    except sqlite3.Error as e:
+      self.error = self.error or e
@@ -0,0 +1,225 @@
+'''
+  @file generator.py
+  @author Marcus Edel
+
+  Implementation of the synthetic dataset generator used for the scaling
+  datasets.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+
+import math
+import hashlib
+
+'''
+This class generates synthetic datasets from a generate block of the config
+file, e.g.:
+
+  generate: {kind: gaussian_blobs, n: {start: 1e3, stop: 1e7, num: 5}, d: 10,
+      seed: 42}
+
+A dataset is created for every size. The rows are written in chunks, so the
+full matrix is never held in memory. Every chunk is drawn from its own random
+stream seeded with the seed and the chunk number, so the datasets are
+reproducible and the smaller datasets are prefixes of the larger ones. The
+files are kept in the generated dataset directory and reused by the next runs.
+'''
+class DatasetGenerator(object):
+
+  # The directory of the generated datasets, an empty string disables the
+  # generator.
+  path = os.environ.get("GENERATED_DATASETS", "reports/cache/generated/")
+
+  # The number of rows of every chunk. Changing the value changes the
+  # generated datasets.
+  chunkSize = 65536
+
+  # The supported dataset kinds and output formats.
+  kinds = ["gaussian_blobs", "uniform"]
+  formats = ["csv", "arff", "npy"]
+
+  '''
+  Get the dataset sizes of the generate block. The sizes are given as single
+  number, as list or as geometric range {start, stop, num}.
+
+  @param n - The size value of the generate block.
+  @return Sorted list of the dataset sizes.
+  '''
+  @staticmethod
+  def Sizes(n):
+    if isinstance(n, dict):
+      start, stop = float(n["start"]), float(n["stop"])
+      num = int(n.get("num", int(round(math.log10(stop / start))) + 1))
+      if num < 2:
+        return [int(round(start))]
+      factor = (stop / start) ** (1.0 / (num - 1))
+      sizes = [start * factor ** i for i in range(num)]
+    elif isinstance(n, (list, tuple)):
+      sizes = [float(v) for v in n]
+    else:
+      sizes = [float(n)]
+
+    return sorted(set(int(round(v)) for v in sizes))
+
+  '''
+  Check the settings of the generate block.
+
+  @param spec - The generate block.
+  @return An error message or None if the settings are correct.
+  '''
+  @staticmethod
+  def Check(spec):
+    if not isinstance(spec, dict):
+      return "the generate value has to be a dictionary"
+
+    if spec.get("kind") not in DatasetGenerator.kinds:
+      return "unknown kind '" + str(spec.get("kind")) + "' (" + ", ".join(
+          DatasetGenerator.kinds) + ")"
+
+    if spec.get("format", "csv") not in DatasetGenerator.formats:
+      return "unknown format '" + str(spec.get("format")) + "' (" + \
+          ", ".join(DatasetGenerator.formats) + ")"
+
+    try:
+      sizes = DatasetGenerator.Sizes(spec.get("n"))
+      d = int(spec.get("d", 2))
+      int(spec.get("seed", 0))
+      int(spec.get("centers", 3))
+      float(spec.get("std", 1.0))
+    except (TypeError, ValueError, KeyError) as e:
+      return "invalid value (" + str(e) + ")"
+
+    if not sizes or min(sizes) < 1 or d < 1:
+      return "the dataset size and dimension have to be positive"
+
+    if not DatasetGenerator.path:
+      return "the generated dataset directory (GENERATED_DATASETS) is disabled"
+
+    return None
+
+  '''
+  Get the file name of the generated dataset. The directory depends on all
+  settings of the generate block, the file name contains the kind, size,
+  dimension and seed. The name doesn't contain '_', since the part in front
+  of the first '_' is used as dataset name.
+
+  @param spec - The generate block.
+  @param n - The number of rows.
+  @return The file name.
+  '''
+  @staticmethod
+  def FileName(spec, n):
+    settings = dict((k, v) for k, v in spec.items() if k != "n")
+    key = repr((sorted(settings.items()), DatasetGenerator.chunkSize))
+    directory = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    name = "%s-n%d-d%d-s%d.%s" % (spec["kind"].replace("_", "-"), n,
+        int(spec.get("d", 2)), int(spec.get("seed", 0)),
+        spec.get("format", "csv"))
+    return os.path.join(DatasetGenerator.path, directory, name)
+
+  '''
+  Generate the rows of the given chunk.
+
+  @param spec - The generate block.
+  @param chunk - The number of the chunk.
+  @param rows - The number of rows of the chunk.
+  @return The rows of the chunk; the label is the last column if the labels
+  option is set.
+  '''
+  @staticmethod
+  def Chunk(spec, chunk, rows):
+    import numpy as np
+
+    seed = int(spec.get("seed", 0))
+    d = int(spec.get("d", 2))
+    # The labels and the values are drawn from separate streams, so the first
+    # rows of a chunk don't depend on the number of rows.
+    rng = np.random.default_rng([seed, chunk + 1, 0])
+
+    if spec["kind"] == "gaussian_blobs":
+      # The centers only depend on the seed, so every chunk uses the same.
+      k = int(spec.get("centers", 3))
+      centers = np.random.default_rng(seed).uniform(-10.0, 10.0, (k, d))
+
+      labels = np.random.default_rng([seed, chunk + 1, 1]).integers(0, k,
+          rows)
+      data = centers[labels] + rng.normal(0.0, float(spec.get("std", 1.0)),
+          (rows, d))
+
+      if spec.get("labels", False):
+        data = np.column_stack((data, labels))
+    else:
+      data = rng.uniform(0.0, 1.0, (rows, d))
+
+    return data
+
+  '''
+  Write the given dataset chunk by chunk.
+
+  @param spec - The generate block.
+  @param n - The number of rows.
+  @param fileName - The name of the dataset file.
+  '''
+  @staticmethod
+  def Write(spec, n, fileName):
+    import numpy as np
+
+    fileFormat = spec.get("format", "csv")
+    columns = int(spec.get("d", 2))
+    labels = spec["kind"] == "gaussian_blobs" and spec.get("labels", False)
+    fmt = ["%.8g"] * columns + (["%d"] if labels else [])
+
+    with AtomicFile(fileName, "wb") as fid:
+      if fileFormat == "npy":
+        np.lib.format.write_array_header_1_0(fid, {"descr": "<f8",
+            "fortran_order": False, "shape": (n, len(fmt))})
+      elif fileFormat == "arff":
+        name = os.path.splitext(os.path.basename(fileName))[0]
+        header = "@relation " + name + "\n\n"
+        for i in range(len(fmt)):
+          header += "@attribute " + name + "_dim" + str(i) + " NUMERIC\n"
+        fid.write((header + "\n@data\n").encode())
+
+      for chunk in range(0, int(math.ceil(n / float(
+          DatasetGenerator.chunkSize)))):
+        rows = min(DatasetGenerator.chunkSize, n - chunk *
+            DatasetGenerator.chunkSize)
+        data = DatasetGenerator.Chunk(spec, chunk, rows)
+
+        if fileFormat == "npy":
+          fid.write(data.astype("<f8").tobytes())
+        else:
+          np.savetxt(fid, data, fmt=fmt, delimiter=",")
+
+  '''
+  Get the files of the generate block. Datasets which don't exist are
+  generated.
+
+  @param spec - The generate block.
+  @return List of the dataset files, ordered by size.
+  '''
+  @staticmethod
+  def Files(spec):
+    files = []
+    for n in DatasetGenerator.Sizes(spec["n"]):
+      fileName = DatasetGenerator.FileName(spec, n)
+      if not os.path.isfile(fileName):
+        Log.Info("Generate dataset: " + fileName)
+        CreateDirectoryStructure([os.path.dirname(fileName)])
+        DatasetGenerator.Write(spec, n, fileName)
+      files.append(fileName)
+
+    return files
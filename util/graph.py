@@ -248,6 +248,52 @@ def GenerateBarChart(results, libraries, fileName, bestlib="mlpack"):
 
   return (len(timingData), totalTime, failure, timeouts, bestLibCount, timingData, fileName + '.js', build)
 
+'''
+Generate a line chart of the thread scaling with the specified informations.
+
+@param curves - Dictionary which maps the library name to the scaling curve
+(see ScalingCurve).
+@param title - The title of the chart.
+@param column - The plotted value of the curve (1 = speedup, 2 = efficiency).
+@return The filename of the line chart and the container id.
+'''
+def GenerateScalingChart(curves, title, column):
+  threads = sorted(set(n for curve in curves.values() for n, s, e in curve))
+
+  build = str(abs(hash(datetime.datetime.now()) + hash(title)))
+
+  fileName = 'graphs/scaling_' + str(build)
+
+  header = 'dummy,' + ','.join(str(n) for n in threads) + '\n'
+
+  # Write the csv file that contains the data.
+  with open('reports/' + fileName + '.csv', 'wb+') as fid:
+    fid.write(header.encode('UTF-8'))
+
+    lines = []
+    for library, curve in sorted(curves.items()):
+      values = dict((point[0], point[column]) for point in curve)
+      lines.append(library + ',' + ','.join(str(values.get(n, 0))
+          for n in threads))
+    fid.write('\n'.join(lines).encode('UTF-8'))
+
+  content = {}
+  content['container'] = build
+  content['type'] = 'line'
+  content['title'] = title
+  content['subtitle'] = 'Hide data series by clicking the legend item.'
+  content['xAxisLabels'] = 'true'
+  content['xAxisRotation'] = '0'
+  content['yAxis'] = 'Speedup' if column == 1 else 'Efficiency'
+  content['tooltipText'] = ''
+  content['data'] = fileName + '.csv'
+
+  with open('reports/' + fileName + '.js', 'wb+') as fid:
+      c = chartTemplate % content
+      fid.write(c.encode('UTF-8'))
+
+  return (fileName + '.js', build)
+
 '''
 Generate a memory chart with the specified informations.
 
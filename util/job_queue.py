@@ -0,0 +1,441 @@
+'''
+  @file job_queue.py
+  @author Marcus Edel
+
+  Implementation of the job queue used to distribute the benchmark cells to
+  workers on other hosts.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import time
+import pickle
+import hashlib
+import socket
+import sqlite3
+import threading
+
+from multiprocessing.managers import BaseManager
+
+'''
+This class implements a durable job queue stored in a SQLite file. A worker
+claims a job by lease; the lease has to be renewed while the job runs,
+otherwise the job is queued again, so the jobs of a lost worker are picked up
+by the remaining workers. The jobs are identified by the key of their cell, so
+a restarted coordinator continues with the jobs of the queue.
+'''
+class JobQueue(object):
+
+  '''
+  Open the queue file and create the job table.
+
+  @param path - The location of the queue file.
+  @param leaseTime - The lease time of a claimed job in seconds.
+  @param maxAttempts - The number of claims before a job is marked as failed.
+  '''
+  def __init__(self, path, leaseTime=300, maxAttempts=3):
+    self.leaseTime = leaseTime
+    self.maxAttempts = maxAttempts
+    self.closed = False
+
+    # The server handles every connection in its own thread.
+    self.lock = threading.Lock()
+    self.con = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    self.con.execute("PRAGMA journal_mode=WAL")
+    self.con.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+          id INTEGER PRIMARY KEY,
+          key TEXT,
+          cell BLOB NOT NULL,
+          status TEXT NOT NULL DEFAULT 'pending',
+          worker TEXT,
+          lease REAL,
+          attempts INTEGER NOT NULL DEFAULT 0,
+          result BLOB,
+          delivered INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status_lease_idx ON jobs (status, lease);
+        """)
+
+    # The queue files of older versions don't have the job key.
+    columns = [column[1] for column in self.con.execute(
+        "PRAGMA table_info(jobs)").fetchall()]
+    if "key" not in columns:
+      self.con.execute("ALTER TABLE jobs ADD COLUMN key TEXT")
+    self.con.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_key_idx ON jobs "
+        + "(key)")
+
+  '''
+  Get the key of the job of a cell, the hash of the cell settings. A cell
+  with changed settings is a new job.
+
+  @param cell - The cell of the job.
+  @return The job key.
+  '''
+  @staticmethod
+  def Key(cell):
+    return hashlib.sha1(repr(sorted(cell.items())).encode()).hexdigest()
+
+  '''
+  Add the jobs of the given cells to the queue. The jobs which are already in
+  the queue are kept, so the leases and the results of the running workers
+  survive a restart of the coordinator; only a job whose result was already
+  delivered is queued again.
+
+  @param cells - List of cells.
+  @return List with the job key of every cell.
+  '''
+  def Put(self, cells):
+    keys = [JobQueue.Key(cell) for cell in cells]
+    with self.lock, self.con:
+      self.con.executemany("INSERT OR IGNORE INTO jobs (key, cell) VALUES "
+          + "(?, ?)", [(key, sqlite3.Binary(pickle.dumps(cell, 2)))
+          for key, cell in zip(keys, cells)])
+      self.con.executemany("UPDATE jobs SET status='pending', worker=NULL, "
+          + "lease=NULL, attempts=0, result=NULL, delivered=0 WHERE key=? AND "
+          + "delivered=1", [(key,) for key in keys])
+    self.closed = False
+    return keys
+
+  '''
+  Remove all jobs of the queue.
+  '''
+  def Reset(self):
+    with self.lock, self.con:
+      self.con.execute("DELETE FROM jobs")
+
+  '''
+  Claim the next pending job.
+
+  @param worker - The name of the worker.
+  @return Tuple with the job id and the cell or None if there is no pending
+  job.
+  '''
+  def Claim(self, worker):
+    with self.lock, self.con:
+      row = self.con.execute("SELECT id, cell FROM jobs WHERE status='pending' "
+          + "ORDER BY id LIMIT 1").fetchone()
+      if not row:
+        return None
+
+      self.con.execute("UPDATE jobs SET status='leased', worker=?, lease=?, "
+          + "attempts=attempts+1 WHERE id=?",
+          (worker, time.time() + self.leaseTime, row[0]))
+    return (row[0], pickle.loads(row[1]))
+
+  '''
+  Extend the lease of a running job.
+
+  @param jobId - The id of the job.
+  @param worker - The name of the worker which holds the lease.
+  @return True if the worker still holds the lease.
+  '''
+  def Renew(self, jobId, worker):
+    with self.lock, self.con:
+      cursor = self.con.execute("UPDATE jobs SET lease=? WHERE id=? AND "
+          + "worker=? AND status='leased'",
+          (time.time() + self.leaseTime, jobId, worker))
+    return cursor.rowcount > 0
+
+  '''
+  Store the result of a job. The first result of a job wins, a worker which
+  lost its lease may still deliver the result if the job isn't finished yet.
+
+  @param jobId - The id of the job.
+  @param worker - The name of the worker.
+  @param result - The result of the cell.
+  @return True if the result was stored.
+  '''
+  def Complete(self, jobId, worker, result):
+    with self.lock, self.con:
+      cursor = self.con.execute("UPDATE jobs SET status='done', worker=?, "
+          + "lease=NULL, result=? WHERE id=? AND status IN "
+          + "('pending', 'leased')",
+          (worker, sqlite3.Binary(pickle.dumps(result, 2)), jobId))
+    return cursor.rowcount > 0
+
+  '''
+  Queue the jobs with an expired lease again. A job which was claimed too
+  often is marked as failed.
+  '''
+  def Requeue(self):
+    with self.lock, self.con:
+      expired = self.con.execute("SELECT id, worker, attempts FROM jobs WHERE "
+          + "status='leased' AND lease<?", (time.time(),)).fetchall()
+
+      for jobId, worker, attempts in expired:
+        if attempts >= self.maxAttempts:
+          Log.Fatal("Lease of job " + str(jobId) + " on " + str(worker) +
+              " expired " + str(attempts) + " times, the job failed.")
+          status = "failed"
+        else:
+          Log.Warn("Lease of job " + str(jobId) + " on " + str(worker) +
+              " expired, queue the job again.")
+          status = "pending"
+
+        self.con.execute("UPDATE jobs SET status=?, worker=NULL, lease=NULL "
+            + "WHERE id=?", (status, jobId))
+
+  '''
+  Get the results which weren't returned yet.
+
+  @return List of (job key, result) tuples, the result of a failed job is
+  None.
+  '''
+  def Results(self):
+    with self.lock, self.con:
+      rows = self.con.execute("SELECT id, key, result FROM jobs WHERE status "
+          + "IN ('done', 'failed') AND delivered=0 ORDER BY id").fetchall()
+      self.con.executemany("UPDATE jobs SET delivered=1 WHERE id=?",
+          [(row[0],) for row in rows])
+
+    return [(row[1], pickle.loads(row[2]) if row[2] is not None else None)
+        for row in rows]
+
+  '''
+  Count the jobs of every status.
+
+  @return Dictionary with the number of jobs of every status.
+  '''
+  def Status(self):
+    with self.lock:
+      return dict(self.con.execute("SELECT status, COUNT(*) FROM jobs "
+          + "GROUP BY status").fetchall())
+
+  '''
+  Mark the queue as closed, the workers stop once they see the closed queue.
+  '''
+  def Close(self):
+    self.closed = True
+
+  '''
+  Check if the queue is closed.
+
+  @return True if the queue is closed.
+  '''
+  def IsClosed(self):
+    return self.closed
+
+  '''
+  Get the lease time of the queue.
+
+  @return The lease time in seconds.
+  '''
+  def LeaseTime(self):
+    return self.leaseTime
+
+'''
+This class implements the coordinator of a distributed run. The coordinator
+puts the cells into the job queue and serves the queue over TCP; workers on
+other hosts claim the cells, run them and send the results back. The results
+are recorded by the coordinator, so the database is only written by a single
+process. The interface matches the Scheduler class.
+'''
+class Coordinator(object):
+
+  # The cell entries which are only used by the coordinator.
+  localKeys = ["group"]
+
+  '''
+  Create the coordinator instance.
+
+  @param address - The address of the queue server, 'host:port'.
+  @param path - The location of the queue file.
+  @param leaseTime - The lease time of a claimed job in seconds.
+  @param reset - If True remove the jobs of a previous run from the queue.
+  '''
+  def __init__(self, address, path="reports/queue.db", leaseTime=300,
+      reset=False):
+    self.address = Coordinator.ParseAddress(address)
+    self.queue = JobQueue(path, leaseTime)
+    if reset:
+      self.queue.Reset()
+
+  '''
+  Split the given 'host:port' string into a (host, port) tuple.
+
+  @param address - The address string.
+  @return Tuple with the host and the port.
+  '''
+  @staticmethod
+  def ParseAddress(address):
+    host, port = address.rsplit(":", 1)
+    return (host, int(port))
+
+  '''
+  Check if the given host is a loopback address.
+
+  @param host - The host name or address.
+  @return True if the host is only reachable from the local machine.
+  '''
+  @staticmethod
+  def IsLoopback(host):
+    if host in ["localhost", "::1"]:
+      return True
+
+    try:
+      return bool(host) and socket.gethostbyname(host).startswith("127.")
+    except socket.error:
+      return False
+
+  '''
+  Get the authentication key shared by the coordinator and the workers from
+  the BENCHMARK_AUTHKEY environment variable. The queue is served with pickle,
+  so anyone who knows the key can run code on the coordinator; the default key
+  is only used on a loopback address.
+
+  @param host - The host of the queue server.
+  @return The authentication key or None if the key isn't set and the host
+  isn't a loopback address.
+  '''
+  @staticmethod
+  def AuthKey(host):
+    key = os.environ.get("BENCHMARK_AUTHKEY")
+    if not key:
+      if not Coordinator.IsLoopback(host):
+        Log.Fatal("BENCHMARK_AUTHKEY isn't set, set a secret key to use the "
+            + "queue on " + str(host) + ".")
+        return None
+
+      Log.Warn("BENCHMARK_AUTHKEY isn't set, use the default key.")
+      key = "benchmark"
+    return key.encode("utf-8")
+
+  '''
+  Create the manager which serves or connects to the job queue.
+
+  @param address - Tuple with the host and the port.
+  @param queue - The queue to serve, None to connect to a remote queue.
+  @return The manager instance or None if there is no authentication key.
+  '''
+  @staticmethod
+  def Manager(address, queue=None):
+    authKey = Coordinator.AuthKey(address[0])
+    if not authKey:
+      return None
+
+    class QueueManager(BaseManager):
+      pass
+
+    QueueManager.register("JobQueue", callable=(lambda: queue) if queue
+        else None)
+    return QueueManager(address=address, authkey=authKey)
+
+  '''
+  Run the given cells on the connected workers and call the callback function
+  for every finished cell in the coordinator process.
+
+  @param cells - List of cells to run.
+  @param fun - Unused, the workers run the cells.
+  @param callback - Function which takes the cell and the result.
+  '''
+  def Run(self, cells, fun, callback):
+    manager = Coordinator.Manager(self.address, self.queue)
+    if not manager:
+      return
+
+    # The results are matched by the job key, the queue may still contain the
+    # jobs of a previous run.
+    keys = self.queue.Put([dict((key, value) for key, value in cell.items()
+        if key not in Coordinator.localKeys) for cell in cells])
+    pending = dict(zip(keys, cells))
+
+    server = manager.get_server()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    Log.Info("Waiting for workers on " + server.address[0] + ":" +
+        str(server.address[1]) + ", " + str(len(cells)) + " cells queued.")
+
+    while pending:
+      self.queue.Requeue()
+
+      results = self.queue.Results()
+      for key, result in results:
+        if key in pending:
+          callback(pending.pop(key), result)
+
+      if not results:
+        time.sleep(1)
+
+    self.queue.Close()
+
+  '''
+  Claim and run cells from the queue of the coordinator until the queue is
+  closed. The lease of the running cell is renewed in the background.
+
+  @param address - The address of the coordinator, 'host:port'.
+  @param fun - Function which takes a cell and returns the result.
+  @param poll - The time in seconds to wait if there is no pending cell.
+  '''
+  @staticmethod
+  def Work(address, fun, poll=5):
+    manager = Coordinator.Manager(Coordinator.ParseAddress(address))
+    if not manager:
+      return
+
+    try:
+      manager.connect()
+    except IOError as e:
+      Log.Fatal("Could not connect to the coordinator " + address + ": " +
+          str(e))
+      return
+
+    queue = manager.JobQueue()
+    worker = socket.gethostname() + ":" + str(os.getpid())
+    leaseTime = queue.LeaseTime()
+
+    while True:
+      try:
+        job = queue.Claim(worker)
+        if not job:
+          if queue.IsClosed():
+            break
+          time.sleep(poll)
+          continue
+      except (EOFError, IOError):
+        # The coordinator is gone, so the run is over.
+        break
+
+      jobId, cell = job
+      stop = threading.Event()
+
+      def Renew():
+        while not stop.wait(leaseTime / 3.0):
+          try:
+            if not queue.Renew(jobId, worker):
+              Log.Warn("Lost the lease of job " + str(jobId) + ".")
+          except (EOFError, IOError):
+            return
+
+      renew = threading.Thread(target=Renew)
+      renew.daemon = True
+      renew.start()
+
+      try:
+        result = fun(cell)
+      except Exception as e:
+        Log.Fatal("Exception: " + str(e))
+        result = None
+      finally:
+        stop.set()
+        renew.join()
+
+      try:
+        queue.Complete(jobId, worker, result)
+      except (EOFError, IOError):
+        break
+
+    Log.Info("Worker " + worker + " done.")
@@ -6,6 +6,10 @@
 '''
 
 import os
+import re
+import hashlib
+import tempfile
+import collections
 
 '''
 This function determinate if the given number is a float.
@@ -95,33 +99,166 @@ def FindRightRow(dataMatrix, datasetName, datasetCount):
     if (dataMatrix[row][0] == datasetName) or (dataMatrix[row][0] == "-"):
       return row
 
+# Header, comment (e.g. arff) and empty lines which don't contain data.
+headerPattern = re.compile(b"^(?:[@%][^\n]*|[ \t\r]*)\n", re.M)
+
+# Fields with the value zero (e.g. '0', '0.0' or '-0e5').
+zeroPattern = re.compile(
+    b"(?<![^,\\s])[-+]?0*\\.?0+(?:[eE][-+]?[0-9]+)?(?![^,\\s])")
+
 '''
-Collect informations for the given dataset.
+Collect informations for the given dataset. The file is read once in large
+blocks; the hash is computed over the whole file and the other values are
+counted over the data lines, header and comment lines are skipped. The type
+is always 'real', as before the single pass.
 
 @param path - Path to the dataset.
 @return Tuple that contains the informations about the given dataset
-(name, size, attributes, instances, type).
+(name, size, attributes, instances, type, bytes, hash, sparsity, mtime).
 '''
 def DatasetInfo(path):
   if not isinstance(path, str):
     path = path[0]
 
-  instances = 0
-  with open(path, "r") as fid:
-    for line in fid:
-      instances += 1
+  stat = os.stat(path)
+  sha = hashlib.sha1()
+  instances, attributes, fields, zeros = 0, 0, 0, 0
+
+  # The binary datasets (npy, Armadillo binary) are mapped, only the hash is
+  # computed from the file content.
+  if os.path.splitext(path)[1] in (".npy", ".bin"):
+    return BinaryDatasetInfo(path)
+
+  with open(path, "rb") as fid:
+    rest = b""
+    while rest is not None:
+      block = fid.read(1 << 20)
+      sha.update(block)
+
+      if block:
+        # Only complete lines are counted, the rest is kept for the next block.
+        block = rest + block
+        last = block.rfind(b"\n") + 1
+        block, rest = block[:last], block[last:]
+      else:
+        # The last line doesn't have to end with a newline.
+        block, rest = rest + b"\n", None
+
+      data = headerPattern.sub(b"", block)
+      if not data:
+        continue
+
+      if not attributes:
+        attributes = data[:data.find(b"\n")].count(b",") + 1
+
+      lines = data.count(b"\n")
+      instances += lines
+      fields += data.count(b",") + lines
+      zeros += len(zeroPattern.findall(data))
+
+  name = NormalizeDatasetName(path)
+  size = stat.st_size / (1 << 20)
+  sparsity = zeros / float(fields) if fields else 0.0
+
+  return (name, size, attributes, instances, "real", stat.st_size,
+      sha.hexdigest(), sparsity, stat.st_mtime)
 
-  attributes = 0
-  with open(path, "r") as fid:
-    for line in fid:
-      attributes = line.count(",") + 1
-      break
+'''
+Collect informations for the given binary dataset (npy or Armadillo binary).
+
+@param path - Path to the dataset.
+@return Tuple that contains the informations about the given dataset
+(name, size, attributes, instances, type, bytes, hash, sparsity, mtime).
+'''
+def BinaryDatasetInfo(path):
+  import numpy as np
+
+  stat = os.stat(path)
+  data = LoadBinaryDataset(path)
+  if data.ndim == 1:
+    data = data.reshape(-1, 1)
+
+  zeros = 0
+  for i in range(0, data.shape[0], 65536):
+    zeros += int(np.count_nonzero(data[i:i + 65536] == 0))
 
   name = NormalizeDatasetName(path)
-  size = os.path.getsize(path) / (1 << 20)
-  datasetType = "real"
+  size = stat.st_size / (1 << 20)
+  sparsity = zeros / float(data.size) if data.size else 0.0
 
-  return (name, size, attributes, instances, datasetType)
+  return (name, size, data.shape[1], data.shape[0], "real", stat.st_size,
+      FileHash(path), sparsity, stat.st_mtime)
+
+'''
+Check if the stored informations of the given dataset are out of date, because
+the file was modified since the informations were collected.
+
+@param path - Path to the dataset.
+@param fileSize - The stored size of the file in bytes.
+@param mtime - The stored modification time of the file.
+@return True if the informations have to be collected again.
+'''
+def IsDatasetInfoOutdated(path, fileSize, mtime):
+  if not isinstance(path, str):
+    path = path[0]
+
+  stat = os.stat(path)
+  return stat.st_size != fileSize or stat.st_mtime != mtime
+
+'''
+Get the id of the dataset record. The informations of the dataset are only
+collected if the dataset isn't in the datasets table or the file the record
+was read from was modified since the record was written. Several files share
+the name of a dataset (e.g. iris.csv and iris_train.csv), the other files
+don't change the record.
+
+@param db - The database object.
+@param dataset - Path to the dataset.
+@return The id of the dataset record.
+'''
+def GetDatasetId(db, dataset):
+  path = os.path.realpath(dataset if isinstance(dataset, str) else dataset[0])
+  record = db.GetDatasetIndex(NormalizeDatasetName(dataset))
+  if not record:
+    return db.NewDataset(*DatasetInfo(dataset), path=path)
+
+  datasetId, fileSize, mtime, recordPath = record[0]
+  if recordPath in (None, path):
+    if IsDatasetInfoOutdated(dataset, fileSize, mtime):
+      db.UpdateDataset(datasetId, *DatasetInfo(dataset), path=path)
+    elif recordPath is None:
+      # The record of an older database was read from this file.
+      db.UpdateDatasetPath(datasetId, path)
+  return datasetId
+
+'''
+Compute the content hash of the given file. The file is read in large blocks.
+
+@param path - The path of the file.
+@return The hex digest of the sha1 hash.
+'''
+def FileHash(path):
+  sha = hashlib.sha1()
+  with open(path, "rb") as fid:
+    while True:
+      block = fid.read(1 << 20)
+      if not block:
+        break
+      sha.update(block)
+  return sha.hexdigest()
+
+'''
+Format the given number of bytes with the matching unit.
+
+@param size - The number of bytes.
+@return The formatted size (e.g. '1.50 GB').
+'''
+def FormatSize(size):
+  for unit in ["B", "KB", "MB", "GB"]:
+    if size < 1024:
+      return "{0:.2f} {1}".format(size, unit)
+    size /= 1024.0
+  return "{0:.2f} TB".format(size)
 
 '''
 This function removes a given file or list of files.
@@ -146,6 +283,19 @@ Check if the given file is available.
 def CheckFileAvailable(fileName):
     return True if os.path.isfile(fileName) else False
 
+# The file extensions of the formats whose name isn't the extension. mlpack
+# detects Armadillo binary files by the 'bin' extension.
+formatExtensions = {"arma_binary": "bin"}
+
+'''
+Get the file extension of the given format.
+
+@param format - The name of the format (e.g. 'csv' or 'arma_binary').
+@return The file extension.
+'''
+def FormatExtension(format):
+  return formatExtensions.get(format, format)
+
 '''
 Check if the file is available in one of the given formats.
 
@@ -155,10 +305,11 @@ Check if the file is available in one of the given formats.
 '''
 def CheckFileExtension(dataset, formats):
   dataExtension = os.path.splitext(dataset)[1][1:]
-  if dataExtension in formats:
+  if dataExtension in [FormatExtension(f) for f in formats]:
     return dataset
   else:
-    return dataset[0:len(dataset) - len(dataExtension)] + formats[0]
+    return dataset[0:len(dataset) - len(dataExtension)] + \
+        FormatExtension(formats[0])
 
 '''
 Create the directory structure for the scripts.
@@ -170,6 +321,50 @@ def CreateDirectoryStructure(directories):
     if not os.path.exists(directory):
        os.makedirs(directory)
 
+'''
+Keep the recently loaded datasets in memory, so that further LoadDataset calls
+for an unchanged file don't parse the file again if the binary dataset cache is
+disabled. This is used by the warm worker processes which run many trials on
+the same dataset.
+
+@param count - The number of datasets to keep in memory.
+'''
+def KeepDatasetsInMemory(count=4):
+  global datasetMemory, datasetMemoryCount
+  datasetMemory = collections.OrderedDict()
+  datasetMemoryCount = count
+
+datasetMemory = None
+datasetMemoryCount = 0
+
+'''
+Load a binary dataset (npy or Armadillo binary) as copy-on-write memory mapped
+array. Like the parsed text files, a dataset with a single row or column is
+returned as vector.
+
+@param dataset - The location of the dataset file.
+@return The loaded dataset.
+'''
+def LoadBinaryDataset(dataset):
+  import numpy as np
+
+  if dataset.endswith(".npy"):
+    data = np.load(dataset, mmap_mode="c")
+  else:
+    # The Armadillo header is followed by the matrix in column-major order.
+    with open(dataset, "rb") as fid:
+      fileType = fid.readline().strip()
+      rows, cols = [int(v) for v in fid.readline().split()]
+      offset = fid.tell()
+
+    if fileType != b"ARMA_MAT_BIN_FN8":
+      raise ValueError("Unsupported Armadillo binary type: " + str(fileType))
+    data = np.memmap(dataset, dtype="<f8", mode="c", offset=offset,
+        shape=(rows, cols), order="F")
+
+  data = np.asarray(data)
+  return data.ravel() if 1 in data.shape else data
+
 '''
 Load a given dataset.
 
@@ -178,7 +373,41 @@ Load a given dataset.
 '''
 def LoadDataset(dataset, delimiter=','):
   import numpy as np
-  return np.genfromtxt(dataset, delimiter=delimiter)
+  from cache import DatasetCache
+  from broker import DatasetBroker
+
+  # The binary datasets are mapped directly, they don't have to be parsed.
+  if os.path.splitext(dataset)[1] in (".npy", ".bin"):
+    return LoadBinaryDataset(dataset)
+
+  # Map the dataset if the runner published it in shared memory.
+  data = DatasetBroker.View(DatasetBroker.Name(dataset, delimiter),
+      readOnly=False)
+  if data is not None:
+    return data
+
+  # Load the parsed array from the binary dataset cache if available.
+  cache = DatasetCache.Default()
+  if cache and cache.Accepts(dataset):
+    return cache.Load(dataset, delimiter)
+
+  if datasetMemory is None:
+    return np.genfromtxt(dataset, delimiter=delimiter)
+
+  # The modification time and the size detect changed files (e.g. the
+  # predictions of the last run).
+  stat = os.stat(dataset)
+  key = (os.path.realpath(dataset), delimiter, stat.st_mtime, stat.st_size)
+  if key in datasetMemory:
+    data = datasetMemory.pop(key)
+  else:
+    data = np.genfromtxt(dataset, delimiter=delimiter)
+    while len(datasetMemory) >= datasetMemoryCount:
+      datasetMemory.popitem(last=False)
+  datasetMemory[key] = data
+
+  # Return a copy, the scripts are allowed to modify the data.
+  return data.copy()
 
 '''
 Split the train labels from the given train dataset.
@@ -187,9 +416,52 @@ Split the train labels from the given train dataset.
 @return Trainset and the train labels as vector.
 '''
 def SplitTrainData(dataset):
-  import numpy as np
   if dataset:
-    trainData = np.genfromtxt(dataset[0], delimiter=',')
+    trainData = LoadDataset(dataset[0])
     return (trainData[:,:-1], trainData[:, (trainData.shape[1] - 1)])
   else:
     return None
+
+'''
+This class writes a file atomically: the content is written to a temporary
+file in the same directory, which replaces the target file on success.
+Concurrent readers see either the old or the complete new file.
+'''
+class AtomicFile(object):
+
+  # The umask of the process; the umask can only be read by setting it, so it's
+  # read once on import.
+  umask = os.umask(0)
+  os.umask(umask)
+
+  '''
+  Create the atomic file instance.
+
+  @param fileName - The name of the target file.
+  @param mode - The file mode ('w' or 'wb').
+  '''
+  def __init__(self, fileName, mode="w"):
+    self.fileName = fileName
+    self.mode = mode
+
+  '''
+  Open the temporary file.
+  '''
+  def __enter__(self):
+    fd, self.tempName = tempfile.mkstemp(dir=os.path.dirname(self.fileName)
+        or ".", prefix=".tmp_")
+    self.fid = os.fdopen(fd, self.mode)
+    return self.fid
+
+  '''
+  Close the temporary file and replace the target file, or remove the
+  temporary file in case of an exception. The temporary file is only readable
+  by the owner, the target file gets the default mode of new files.
+  '''
+  def __exit__(self, type, value, traceback):
+    self.fid.close()
+    if type is None:
+      os.chmod(self.tempName, 0o666 & ~AtomicFile.umask)
+      os.replace(self.tempName, self.fileName)
+    else:
+      os.remove(self.tempName)
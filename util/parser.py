@@ -18,9 +18,42 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from loader import *
+from misc import *
+from generator import *
+from cache import *
 
 import yaml
 import collections
+import concurrent.futures
+
+'''
+Check if the given script contains a callable method class with a RunTiming
+function. The function imports the script, so the config check runs it in
+separate processes (the loader changes the working directory).
+
+@param methodName - The method name.
+@param methodScript - The script path and name.
+@return False if the script dosen't exist or the RunTiming method is not
+available otherwise True.
+'''
+def CheckScript(methodName, methodScript):
+  try:
+    with open(methodScript): pass
+  except IOError:
+    return False
+
+  try:
+    module = Loader.ImportModuleFromPath(methodScript)
+  except Exception as e:
+    Log.Warn("Exception: " + str(e))
+    return False
+
+  methodClass = getattr(module, methodName, None)
+  if callable(methodClass):
+    if getattr(methodClass, "RunTiming", None):
+      return True
+
+  return False
 
 '''
 This class implements the parser to parse and check the config file.
@@ -38,6 +71,10 @@ class Parser(object):
     self.config = config
     self.mc = 0
 
+    # Datasets which are already checked; the same dataset is usually used by
+    # many methods.
+    self.available = set()
+
     # Default values.
     self.RUN = []
     self.ITERATION = 3
@@ -147,6 +184,15 @@ class Parser(object):
     if "datasets" in attributes:
       datasets = attributes['datasets']
       for dataset in datasets:
+        # Generate the synthetic datasets of the generate block and add them
+        # to the dataset files.
+        if "generate" in dataset:
+          error = DatasetGenerator.Check(dataset["generate"])
+          if error:
+            return self.GenerateErrorMsg(error)
+          dataset["files"] = list(dataset.get("files", [])) + \
+              DatasetGenerator.Files(dataset["generate"])
+
         Log.Info("Dataset: " + str(dataset["files"]), self.verbose)
 
         if not "options" in dataset:
@@ -224,6 +270,21 @@ class Parser(object):
     Log.Warn("The method: " + methodName + " in script: " + methodScript
         + " is not callable.")
 
+  '''
+  Show invalid generate block error message.
+
+  @param error - The error message.
+  @param streamNum - The number of the stream.
+  @return False
+  '''
+  def GenerateErrorMsg(self, error, streamNum=0):
+    if streamNum == 0:
+      Log.Fatal("Invalid [generate] block: " + error + ".")
+    else:
+      Log.Fatal("Stream number: " + str(streamNum) + " has an invalid " +
+          "[generate] block: " + error + ".")
+    return False
+
   '''
   Show file not available error message.
 
@@ -244,23 +305,7 @@ class Parser(object):
   available otherwise True.
   '''
   def CheckIfCallable(self, methodName, methodScript):
-    try:
-      with open(methodScript): pass
-    except IOError:
-      return False
-
-    try:
-      module = Loader.ImportModuleFromPath(methodScript)
-    except Exception as e:
-      Log.Warn("Exception: " + str(e))
-      return False
-
-    methodClass = getattr(module, methodName, None)
-    if callable(methodClass):
-      if getattr(methodClass, "RunTiming", None):
-        return True
-
-    return False
+    return CheckScript(methodName, methodScript)
 
   '''
   This function checks if a file is readable.
@@ -270,10 +315,13 @@ class Parser(object):
   '''
   def CheckIfAvailable(self, files):
     def CheckDataset(dataset):
+        if dataset in self.available:
+          return True
         try:
             with open(dataset): pass
         except IOError:
             return self.NotAvailableErrorMsg(datasets)
+        self.available.add(dataset)
         return True
 
     for datasets in files:
@@ -290,15 +338,25 @@ class Parser(object):
 
   '''
   This function checks the config attributes and keys. The function checks also,
-  if the script is runable and if the datasets are readable.
+  if the script is runable and if the datasets are readable. The datasets and
+  the scripts are checked concurrently after the keys are checked; the content
+  hashes of the datasets are stored in the manifest, so unchanged datasets
+  aren't read again.
 
+  @param jobs - The number of datasets and scripts to check concurrently.
+  @param checksums - If True compute the content hash of the datasets.
   @return The function returns False if the config file is not correct and the
   function shows some information to adjust the config. If the config is correct
   the function prints a successful message.
   '''
-  def CheckConfig(self):
+  def CheckConfig(self, jobs=8, checksums=True):
     Log.Info("Check config file: " + self.config, self.verbose)
     streamNum = 0
+
+    # The datasets with the number of cells which read them and the scripts
+    # with the stream number, checked after the keys.
+    datasetUses = collections.OrderedDict()
+    scripts = collections.OrderedDict()
     for stream in self.streams:
       streamNum += 1
 
@@ -332,8 +390,16 @@ class Parser(object):
                 else:
                   for dataset in value["datasets"]:
 
-                    if not self.CheckIfAvailable(dataset["files"]):
-                      return False
+                    if "generate" in dataset:
+                      error = DatasetGenerator.Check(dataset["generate"])
+                      if error:
+                        return self.GenerateErrorMsg(error, streamNum)
+                    elif not "files" in dataset:
+                      return self.EmptyErrorMsg("files", streamNum)
+
+                    for files in dataset.get("files", []):
+                      for f in [files] if isinstance(files, str) else files:
+                        datasetUses[f] = datasetUses.get(f, 0) + 1
 
                     if not "options" in dataset:
                       self.KeyWarnMsg("options", streamNum)
@@ -344,13 +410,84 @@ class Parser(object):
               else:
                 return self.KeyErrorMsg("datasets", streamNum)
 
-              if not self.CheckIfCallable(key, value["script"]):
-                self.CallableMethodWarnMsg(key, value["script"], streamNum)
+              scripts.setdefault((key, value["script"]), streamNum)
 
           except AttributeError as e:
             return self.KeyErrorMsg("methods", streamNum)
 
+    if not self.CheckFiles(datasetUses, scripts, jobs, checksums):
+      return False
+
     Log.Info("Config file check: successful", self.verbose)
+    return True
+
+  '''
+  Check the datasets and the scripts concurrently. The datasets are checked
+  in a thread pool, since the time is spent waiting for the file system
+  (e.g. NFS). The scripts are imported in a process pool, because importing
+  a script changes the working directory of the process.
+
+  @param datasetUses - Dictionary with the datasets and the number of cells
+  which read the dataset.
+  @param scripts - Dictionary with the (method, script) tuples and the stream
+  number.
+  @param jobs - The number of datasets and scripts to check concurrently.
+  @param checksums - If True compute the content hash of the datasets.
+  @return False if a dataset isn't available otherwise True.
+  '''
+  def CheckFiles(self, datasetUses, scripts, jobs=8, checksums=True):
+    manifest = DatasetManifest.Default()
+    jobs = max(1, jobs)
+
+    with concurrent.futures.ProcessPoolExecutor(jobs) as processes:
+      scriptChecks = [(key, processes.submit(CheckScript, *key)) for key in
+          scripts]
+
+      with concurrent.futures.ThreadPoolExecutor(jobs) as threads:
+        datasetChecks = [(dataset, threads.submit(manifest.Check, dataset,
+            checksums)) for dataset in datasetUses]
+
+        available = True
+        totalSize, readSize, hashedSize = 0, 0, 0
+        for dataset, check in datasetChecks:
+          try:
+            entry, hashed, changed = check.result()
+          except (IOError, OSError):
+            available = self.NotAvailableErrorMsg(dataset)
+            continue
+
+          if changed:
+            Log.Warn("The dataset: " + dataset + " changed since the last " +
+                "check.")
+          totalSize += entry["size"]
+          readSize += entry["size"] * datasetUses[dataset]
+          hashedSize += hashed
+
+      for (methodName, methodScript), check in scriptChecks:
+        try:
+          isCallable = check.result()
+        except Exception as e:
+          Log.Warn("Exception: " + str(e))
+          isCallable = False
+
+        if not isCallable:
+          self.CallableMethodWarnMsg(methodName, methodScript,
+              scripts[(methodName, methodScript)])
+
+    manifest.Save()
+
+    # Summary of the expected disk reads, every cell reads its datasets at
+    # least once.
+    Log.Info("Datasets: " + str(len(datasetUses)) + " files, " +
+        FormatSize(totalSize), self.verbose)
+    Log.Info("Expected dataset reads of the run: " + FormatSize(readSize) +
+        " (" + str(sum(datasetUses.values())) + " dataset references)",
+        self.verbose)
+    Log.Info("Read to compute the checksums: " + FormatSize(hashedSize),
+        self.verbose)
+    Log.Info("Scripts: " + str(len(scripts)), self.verbose)
+
+    return available
 
   '''
   Merge the streams and create a dictionary which contains the data.
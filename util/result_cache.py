@@ -0,0 +1,211 @@
+'''
+  @file result_cache.py
+  @author Marcus Edel
+
+  Implementation of the result cache used to skip unchanged cells.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+from system import *
+
+import time
+import hashlib
+import simplejson
+
+'''
+This class implements a content-addressed cache for the results of the cells.
+The key of a cell is the hash of the wrapper script, the library version, the
+dataset content and the method settings; as long as none of them changes, the
+cached result is reused instead of measuring the cell again. The entries are
+stored in the result_cache table of the database.
+'''
+class ResultCache(object):
+
+  # The environment variables which point to the library binaries.
+  binaries = {"mlpack": ["MLPACK_BIN"], "matlab": ["MATLAB_BIN"],
+      "weka": ["WEKA_CLASSPATH"], "shogun": ["SHOGUN_PATH"],
+      "ann": ["ANN_PATH"], "flann": ["FLANN_PATH"]}
+
+  # The python packages of the libraries.
+  packages = {"scikit": "sklearn", "mlpy": "mlpy", "shogun": "modshogun"}
+
+  '''
+  Create the result cache instance.
+
+  @param db - The database which stores the cached results.
+  @param maxAge - Cached results older than this age (in days) are measured
+  again; zero means no limit.
+  '''
+  def __init__(self, db, maxAge=0):
+    self.db = db
+    self.maxAge = maxAge
+    self.versions = {}
+    self.hashes = {}
+
+  '''
+  Get the version of a python package without importing the package if the
+  package metadata is available.
+
+  @param name - The name of the package.
+  @return The version string or None if the package isn't available.
+  '''
+  @staticmethod
+  def PackageVersion(name):
+    try:
+      from importlib import metadata
+      return metadata.version(name)
+    except Exception:
+      pass
+
+    try:
+      module = __import__(name)
+      return str(getattr(module, "__version__", ""))
+    except Exception:
+      return None
+
+  '''
+  Get the fingerprint of the files in the given path list. The fingerprint
+  contains the name, size and modification time of every file, so a rebuilt
+  binary changes the fingerprint.
+
+  @param paths - List of files or directories separated by ':'.
+  @return List with the file informations.
+  '''
+  @staticmethod
+  def PathFingerprint(paths):
+    files = []
+    for path in paths.split(":"):
+      if os.path.isdir(path):
+        entries = [os.path.join(path, e) for e in sorted(os.listdir(path))]
+      else:
+        entries = [path]
+
+      for entry in entries:
+        if os.path.isfile(entry):
+          stat = os.stat(entry)
+          files.append((entry, stat.st_size, stat.st_mtime))
+    return files
+
+  '''
+  Get the version fingerprint of the given library.
+
+  @param library - The name of the library.
+  @return The version string of the library.
+  '''
+  def LibraryVersion(self, library):
+    if library not in self.versions:
+      version = []
+      for variable in ResultCache.binaries.get(library, []):
+        version.append(ResultCache.PathFingerprint(os.environ.get(variable,
+            "")))
+      if library in ResultCache.packages:
+        version.append(ResultCache.PackageVersion(
+            ResultCache.packages[library]))
+      self.versions[library] = repr(version)
+
+    return self.versions[library]
+
+  '''
+  Get the content hash of the given dataset. The hash is computed once per
+  file and modification time.
+
+  @param dataset - Dataset or list of datasets.
+  @return The content hash.
+  '''
+  def DatasetHash(self, dataset):
+    if isinstance(dataset, str):
+      dataset = [dataset]
+
+    hashes = []
+    for f in dataset:
+      stat = os.stat(f)
+      key = (os.path.realpath(f), stat.st_mtime, stat.st_size)
+      if key not in self.hashes:
+        self.hashes[key] = FileHash(f)
+      hashes.append(self.hashes[key])
+    return hashes
+
+  '''
+  Get the cache key of a cell. The key contains the fingerprint of the
+  machine and the package versions, so the results of another machine or of
+  older packages aren't reused, and the timeout, so a cached timeout isn't
+  reused after the timeout was raised.
+
+  @param cell - Dictionary which contains the cell settings.
+  @return The cache key or None if a file of the cell isn't available.
+  '''
+  def Key(self, cell):
+    try:
+      key = (cell["method"], cell["options"], cell["library"],
+          sorted(cell["tasks"]), cell["trials"], cell["bootstrap"],
+          cell["adaptive"], cell.get("threads"), cell["timeout"],
+          FileHash(cell["script"]),
+          self.LibraryVersion(cell["library"]),
+          self.DatasetHash(cell["dataset"]),
+          SystemInfo.GetFingerprint()["id"],
+          SystemInfo.GetFingerprint()["packages"])
+
+      # Only the cells of the complexity mode extend the key, so the other
+      # cached results stay valid.
+      if cell.get("complexity"):
+        key += (sorted((k, v) for k, v in cell["complexity"].items()
+            if k != "extrapolate"),)
+      key = repr(key)
+    except (IOError, OSError) as e:
+      return None
+
+    return hashlib.sha1(key.encode()).hexdigest()
+
+  '''
+  Get the cached result of the given key.
+
+  @param key - The cache key.
+  @return The cached result or None if there is no (recent) result.
+  '''
+  def Get(self, key):
+    if not key:
+      return None
+
+    entry = self.db.GetCachedResult(key)
+    if not entry:
+      return None
+
+    result, created = entry[0]
+    if self.maxAge and time.time() - created > self.maxAge * 86400:
+      return None
+
+    return simplejson.loads(result)
+
+  '''
+  Store the result of a cell. Failed cells aren't cached, so they run again
+  on the next build.
+
+  @param key - The cache key.
+  @param result - The result of the cell.
+  '''
+  def Put(self, key, result):
+    if not key or not result:
+      return
+
+    times = result.get("time")
+    if times and sum(times) < 0 and sum(times) != -2:
+      return
+
+    description = result.get("description")
+    if isinstance(description, bytes):
+      result = dict(result, description=description.decode("utf-8",
+          "replace"))
+
+    self.db.NewCachedResult(key, simplejson.dumps(result), time.time())
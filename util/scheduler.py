@@ -0,0 +1,223 @@
+'''
+  @file scheduler.py
+  @author Marcus Edel
+
+  Implementation of the cell scheduler used to run independent benchmark cells
+  concurrently.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import shutil
+import tempfile
+import multiprocessing
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+'''
+This class implements a scheduler which runs independent benchmark cells
+(method, options, library, dataset) concurrently. Every running cell gets its
+own set of reserved cores, so that the timings of concurrently running cells
+don't disturb each other.
+'''
+class Scheduler(object):
+
+  # The environment variables which control the number of threads of the
+  # OpenMP and BLAS runtimes.
+  threadVariables = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+      "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+  '''
+  Create the scheduler instance and reserve the cores.
+
+  @param jobs - The maximum number of cells to run concurrently.
+  @param coresPerCell - The number of cores reserved for every cell.
+  '''
+  def __init__(self, jobs=1, coresPerCell=1):
+    self.jobs = max(1, int(jobs))
+    self.coresPerCell = max(1, int(coresPerCell))
+    self.slots = Scheduler.ReserveCores(self.jobs, self.coresPerCell)
+
+    if len(self.slots) < self.jobs:
+      Log.Warn("Only " + str(len(self.slots)) + " cells fit on the available "
+          + "cores, reduce the number of jobs to " + str(len(self.slots)) + ".")
+      self.jobs = max(1, len(self.slots))
+
+  '''
+  Split the cores available to this process into disjoint sets.
+
+  @param jobs - The number of sets.
+  @param coresPerCell - The number of cores in every set.
+  @return List of core sets.
+  '''
+  @staticmethod
+  def ReserveCores(jobs, coresPerCell):
+    if hasattr(os, "sched_getaffinity"):
+      cores = sorted(os.sched_getaffinity(0))
+    else:
+      cores = list(range(multiprocessing.cpu_count()))
+
+    slots = []
+    for i in range(0, len(cores) - coresPerCell + 1, coresPerCell):
+      if len(slots) == jobs:
+        break
+      slots.append(cores[i:i + coresPerCell])
+
+    return slots
+
+  '''
+  Create a private working directory for a cell. The wrapper scripts write
+  scratch files (e.g. output.csv) into the working directory and refer to
+  datasets and scripts relative to the benchmark root, so the directory mirrors
+  every entry of the benchmark root as symlink.
+
+  @param root - The benchmark root directory.
+  @return The path of the new working directory.
+  '''
+  @staticmethod
+  def CreateSandbox(root):
+    sandbox = tempfile.mkdtemp(prefix="benchmark_cell_")
+    for entry in os.listdir(root):
+      os.symlink(os.path.join(root, entry), os.path.join(sandbox, entry))
+    return sandbox
+
+  '''
+  Run a single cell in a child process. The child is pinned to the reserved
+  cores and works in its own working directory; processes started by the
+  wrapper scripts inherit both.
+
+  @param fun - The function which runs the cell.
+  @param cell - The cell to run.
+  @param index - The index of the cell.
+  @param cores - The reserved cores.
+  @param sandbox - The working directory of the cell.
+  @param results - Queue to send the result back to the scheduler.
+  '''
+  @staticmethod
+  def RunCell(fun, cell, index, cores, sandbox, results):
+    if hasattr(os, "sched_setaffinity"):
+      os.sched_setaffinity(0, cores)
+
+    os.chdir(sandbox)
+    try:
+      result = fun(cell)
+    except Exception as e:
+      Log.Fatal("Exception: " + str(e))
+      result = None
+
+    results.put((index, result))
+
+  '''
+  Limit the number of threads of the calling process and the processes it
+  starts: the thread environment variables of the BLAS and OpenMP runtimes
+  are set to the given count and the process is pinned to the first cores of
+  the given core set.
+
+  @param threads - The number of threads.
+  @param cores - The cores available to the cell.
+  @return Dictionary with the previous values of the environment variables.
+  '''
+  @staticmethod
+  def SetThreads(threads, cores):
+    previous = {}
+    for variable in Scheduler.threadVariables:
+      previous[variable] = os.environ.get(variable)
+      os.environ[variable] = str(threads)
+
+    if hasattr(os, "sched_setaffinity") and cores:
+      if threads > len(cores):
+        Log.Warn("Only " + str(len(cores)) + " cores available for " +
+            str(threads) + " threads.")
+      os.sched_setaffinity(0, cores[:threads])
+
+    return previous
+
+  '''
+  Restore the thread settings changed by SetThreads.
+
+  @param previous - The previous values of the environment variables.
+  @param cores - The cores available to the cell.
+  '''
+  @staticmethod
+  def ResetThreads(previous, cores):
+    for variable, value in previous.items():
+      if value is None:
+        os.environ.pop(variable, None)
+      else:
+        os.environ[variable] = value
+
+    if hasattr(os, "sched_setaffinity") and cores:
+      os.sched_setaffinity(0, cores)
+
+  '''
+  Run the given cells and call the callback function for every finished cell
+  in the scheduling process. If only a single job is requested the cells run
+  serially in the current process.
+
+  @param cells - List of cells to run.
+  @param fun - Function which takes a cell and returns the result.
+  @param callback - Function which takes the cell and the result.
+  '''
+  def Run(self, cells, fun, callback):
+    if self.jobs == 1:
+      for cell in cells:
+        callback(cell, fun(cell))
+      return
+
+    root = os.path.realpath(os.path.curdir)
+    results = multiprocessing.Queue()
+    freeSlots = list(range(len(self.slots)))
+    pending = list(range(len(cells)))
+    running = {}
+
+    while pending or running:
+      # Start new cells as long as there are free cores.
+      while pending and freeSlots:
+        index = pending.pop(0)
+        slot = freeSlots.pop(0)
+        sandbox = Scheduler.CreateSandbox(root)
+        process = multiprocessing.Process(target=Scheduler.RunCell,
+            args=(fun, cells[index], index, self.slots[slot], sandbox, results))
+        process.start()
+        running[index] = (process, slot, sandbox)
+
+      try:
+        finished = [results.get(timeout=1)]
+      except queue.Empty:
+        finished = []
+
+        # A cell which was killed (e.g. by the OOM killer) never sends a
+        # result, so collect the remaining results and treat it as failure.
+        for index, (process, slot, sandbox) in list(running.items()):
+          if not process.is_alive():
+            while True:
+              try:
+                finished.append(results.get_nowait())
+              except queue.Empty:
+                break
+
+            if index not in [f[0] for f in finished]:
+              Log.Fatal("Cell process died with exit code: " +
+                  str(process.exitcode))
+              finished.append((index, None))
+
+      for index, result in finished:
+        process, slot, sandbox = running.pop(index)
+        process.join()
+        shutil.rmtree(sandbox, ignore_errors=True)
+        freeSlots.append(slot)
+        callback(cells[index], result)
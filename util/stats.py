@@ -0,0 +1,221 @@
+'''
+  @file stats.py
+  @author Marcus Edel
+
+  Statistic functions used to summarize the measured trials.
+'''
+
+import math
+
+'''
+Calculate the median of the given values.
+
+@param values - List of values.
+@return The median or None if the list is empty.
+'''
+def Median(values):
+  if not values:
+    return None
+
+  values = sorted(values)
+  n = len(values)
+  if n % 2:
+    return values[n // 2]
+  else:
+    return (values[n // 2 - 1] + values[n // 2]) / 2.0
+
+'''
+Calculate the distribution-free confidence interval of the median. The bounds
+are order statistics of the values; the ranks are chosen with the binomial
+distribution B(n, 0.5), so the interval holds for any distribution of the
+measured times.
+
+@param values - List of values.
+@param confidence - The confidence level.
+@return Tuple (lower bound, upper bound) or None if there are too few values
+to reach the confidence level.
+'''
+def MedianConfidenceInterval(values, confidence=0.95):
+  n = len(values)
+  if n == 0:
+    return None
+
+  values = sorted(values)
+  alpha = (1.0 - confidence) / 2.0
+
+  # Find the largest rank j (0-based) with P(Binomial(n, 0.5) <= j) <= alpha.
+  cdf = 0.0
+  j = -1
+  for i in range(n):
+    cdf += math.exp(math.lgamma(n + 1) - math.lgamma(i + 1) -
+        math.lgamma(n - i + 1) - n * math.log(2))
+    if cdf > alpha:
+      break
+    j = i
+
+  if j < 0:
+    return None
+
+  return (values[j], values[n - 1 - j])
+
+'''
+Check if the confidence interval of the median is within the given relative
+width.
+
+@param values - List of values.
+@param width - The relative width (e.g. 0.05 for 5% of the median).
+@param confidence - The confidence level.
+@return True if the interval is narrow enough otherwise False.
+'''
+def IsMedianStable(values, width, confidence=0.95):
+  interval = MedianConfidenceInterval(values, confidence)
+  median = Median(values)
+  if not interval or not median:
+    return False
+
+  return (interval[1] - interval[0]) <= width * abs(median)
+
+'''
+Calculate the speedup and the parallel efficiency curve of a method. The
+speedup of every dataset is relative to the smallest measured thread count of
+the dataset; the curve is the geometric mean of the speedups over the
+datasets, so every dataset has the same weight.
+
+@param timings - Dictionary which maps the dataset to a dictionary of the
+thread count and the measured time (failures are skipped).
+@return Ordered list of tuples (thread count, speedup, efficiency).
+'''
+def ScalingCurve(timings):
+  speedups = {}
+  for dataset, values in timings.items():
+    # Skip the failures and timeouts (e.g. 'failure' or '>9000').
+    times = {}
+    for n, t in values.items():
+      try:
+        t = float(t)
+      except (TypeError, ValueError):
+        continue
+      if t > 0:
+        times[n] = t
+
+    if not times:
+      continue
+
+    baseline = min(times)
+    for n, t in times.items():
+      speedups.setdefault(n, []).append((baseline, times[baseline] / t))
+
+  curve = []
+  for n in sorted(speedups):
+    values = speedups[n]
+    speedup = math.exp(sum(math.log(s) for b, s in values) / len(values))
+    baseline = math.exp(sum(math.log(b) for b, s in values) / len(values))
+    curve.append((n, speedup, speedup * baseline / n))
+  return curve
+
+'''
+Get the percentile of the given values with the nearest-rank method.
+
+@param values - List of values.
+@param percent - The percentile in the range (0, 100].
+@return The percentile or None if the list is empty.
+'''
+def Percentile(values, percent):
+  if not values:
+    return None
+
+  values = sorted(values)
+  rank = int(math.ceil(percent / 100.0 * len(values)))
+  return values[min(max(rank, 1), len(values)) - 1]
+
+'''
+Calculate the median absolute deviation of the given values, a measure of the
+spread which isn't affected by a few outliers.
+
+@param values - List of values.
+@return The median absolute deviation or None if the list is empty.
+'''
+def MedianAbsoluteDeviation(values):
+  if not values:
+    return None
+
+  median = Median(values)
+  return Median([abs(value - median) for value in values])
+
+'''
+Calculate the variance of the given values.
+
+@param values - List of values.
+@return The variance or zero if the list is empty.
+'''
+def Variance(values):
+  if not values:
+    return 0
+
+  avg = sum(values) / len(values)
+  return sum((avg - value) ** 2 for value in values) / len(values)
+
+# The 97.5% quantiles of the t-distribution for 1 to 30 degrees of freedom.
+tQuantiles = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+    2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093,
+    2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045,
+    2.042]
+
+'''
+Get the quantile of the t-distribution for a two-sided 95% confidence
+interval. Above 30 degrees of freedom the quantile is approximated with the
+expansion of the normal quantile.
+
+@param df - The degrees of freedom.
+@return The 97.5% quantile.
+'''
+def TQuantile(df):
+  if df <= len(tQuantiles):
+    return tQuantiles[df - 1]
+
+  z = 1.959964
+  return z + (z ** 3 + z) / (4.0 * df) + (5 * z ** 5 + 16 * z ** 3 +
+      3 * z) / (96.0 * df ** 2)
+
+'''
+Fit the scaling exponent of the measured times, the least squares fit of
+log(time) = intercept + exponent * log(size). The confidence interval of the
+exponent uses the standard error of the slope.
+
+@param points - List of tuples (size, time); points which aren't positive are
+skipped.
+@return Tuple (exponent, lower bound, upper bound, intercept) or None if there
+are less than two sizes. The bounds are None if there are only two points.
+'''
+def LogLogFit(points):
+  points = [(math.log(s), math.log(t)) for s, t in points if s > 0 and t > 0]
+  n = len(points)
+  if n < 2:
+    return None
+
+  mx = sum(x for x, y in points) / n
+  my = sum(y for x, y in points) / n
+  sxx = sum((x - mx) ** 2 for x, y in points)
+  if sxx == 0:
+    return None
+
+  exponent = sum((x - mx) * (y - my) for x, y in points) / sxx
+  intercept = my - exponent * mx
+
+  if n < 3:
+    return (exponent, None, None, intercept)
+
+  residuals = sum((y - intercept - exponent * x) ** 2 for x, y in points)
+  error = math.sqrt(residuals / (n - 2) / sxx) * TQuantile(n - 2)
+  return (exponent, exponent - error, exponent + error, intercept)
+
+'''
+Extrapolate the time to the given size with the fitted scaling exponent.
+
+@param exponent - The fitted exponent.
+@param intercept - The fitted intercept.
+@param size - The size (e.g. the number of rows).
+@return The extrapolated time.
+'''
+def Extrapolate(exponent, intercept, size):
+  return math.exp(intercept + exponent * math.log(size))
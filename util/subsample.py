@@ -0,0 +1,112 @@
+'''
+  @file subsample.py
+  @author Marcus Edel
+
+  Functions to create the row and column subsamples of a dataset used by the
+  complexity mode.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+from convert import *
+
+'''
+Get the number of rows and columns of the given dataset.
+
+@param dataset - The location of the dataset file.
+@return Tuple (rows, columns).
+'''
+def DatasetShape(dataset):
+  if os.path.splitext(dataset)[1] in (".npy", ".bin"):
+    data = LoadBinaryDataset(dataset)
+    return (data.shape[0], data.shape[1] if data.ndim > 1 else 1)
+
+  columns = 0
+  with open(dataset, "r") as fid:
+    for line in fid:
+      if line.strip() and line[0] not in "@%":
+        columns = len(line.split(",") if "," in line else line.split())
+        break
+
+  return (Convert.CountRows(dataset), columns)
+
+'''
+Get the geometric subsample sizes below the given size.
+
+@param size - The full size.
+@param steps - The number of sizes including the full size.
+@param factor - The factor between two sizes.
+@param minimum - The smallest size.
+@return Sorted list of the sizes, without the full size.
+'''
+def SubsampleSizes(size, steps, factor, minimum=1):
+  sizes = set(int(size / float(factor) ** k) for k in range(1, steps))
+  return sorted(s for s in sizes if minimum <= s < size)
+
+'''
+Write a subsample of the given dataset with evenly spaced rows and the first
+columns. The file is written in the format of the dataset; text datasets are
+streamed line by line.
+
+@param dataset - The location of the dataset file.
+@param rows - The number of rows of the subsample.
+@param columns - The number of columns of the subsample or None to keep all
+columns.
+@param fileName - The location of the subsample file.
+'''
+def Subsample(dataset, rows, columns, fileName):
+  extension = os.path.splitext(dataset)[1]
+  total = DatasetShape(dataset)[0]
+  selected = set(i * total // rows for i in range(rows))
+
+  if extension in (".npy", ".bin"):
+    import numpy as np
+
+    data = LoadBinaryDataset(dataset)
+    if data.ndim == 1:
+      data = data.reshape(-1, 1)
+    data = np.asarray(data[sorted(selected)][:, :columns], dtype="<f8")
+
+    with AtomicFile(fileName, "wb") as fid:
+      if extension == ".npy":
+        np.save(fid, data)
+      else:
+        fid.write(("ARMA_MAT_BIN_FN8\n%d %d\n" % data.shape).encode())
+        fid.write(data.tobytes(order="F"))
+    return
+
+  index = 0
+  attribute = 0
+  with open(dataset, "r") as fid, AtomicFile(fileName, "w") as nfid:
+    for line in fid:
+      if not line.strip():
+        continue
+
+      # Keep the arff header, without the attributes of the removed columns.
+      if line[0] in "@%":
+        if line.lower().startswith("@attribute"):
+          attribute += 1
+          if columns and attribute > columns:
+            continue
+        nfid.write(line)
+        continue
+
+      if index in selected:
+        if columns:
+          separator = "," if "," in line else " "
+          values = line.split() if separator == " " else line.rstrip(
+              "\r\n").split(",")
+          line = separator.join(values[:columns]) + "\n"
+        nfid.write(line)
+      index += 1
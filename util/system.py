@@ -23,12 +23,153 @@ import collections
 import sys
 import shlex
 import subprocess
+import hashlib
+import json
+import re
 
 '''
 This class implements functions the get system informations.
 '''
 class SystemInfo(object):
 
+  # The fingerprint of this machine, read once by GetFingerprint.
+  fingerprint = None
+
+  # The python packages which are part of the fingerprint.
+  packages = ["numpy", "scipy", "scikit-learn", "mlpy", "shogun", "milk",
+      "matplotlib"]
+
+  # The fingerprint entries which identify the machine (hardware, kernel and
+  # memory); the remaining entries, e.g. the package versions, change with
+  # upgrades and aren't part of the id.
+  machineKeys = ["model", "flags", "cpus", "cores", "sockets", "caches",
+      "memory", "kernel", "platform"]
+
+  '''
+  Read the content of the given file.
+
+  @param path - The path of the file.
+  @return The stripped content of the file or None if the file can't be read.
+  '''
+  @staticmethod
+  def ReadFile(path):
+    try:
+      with open(path) as fid:
+        return fid.read().strip()
+    except (IOError, OSError):
+      return None
+
+  '''
+  Parse a cpu list of the /sys filesystem (e.g. '0-3,8').
+
+  @param cpus - The cpu list.
+  @return List of cpu numbers.
+  '''
+  @staticmethod
+  def ParseCPUList(cpus):
+    result = []
+    for part in (cpus or "").split(","):
+      if "-" in part:
+        first, last = part.split("-")
+        result.extend(range(int(first), int(last) + 1))
+      elif part:
+        result.append(int(part))
+    return result
+
+  '''
+  Get the versions of the installed python packages of the fingerprint.
+
+  @return Dictionary with the version of every installed package.
+  '''
+  @staticmethod
+  def GetPackageVersions():
+    try:
+      from importlib import metadata
+    except ImportError:
+      return {}
+
+    versions = {}
+    for package in SystemInfo.packages:
+      try:
+        versions[package] = metadata.version(package)
+      except Exception:
+        pass
+    return versions
+
+  '''
+  Get the fingerprint of this machine: the CPU model and flags, the core and
+  cache topology, the memory, the kernel, the frequency governor and the
+  versions of the python packages. The values are read from /proc and /sys
+  once, the following calls return the cached fingerprint.
+
+  @return Dictionary with the fingerprint, the 'id' entry is the hash of
+  the machine entries (see machineKeys).
+  '''
+  @staticmethod
+  def GetFingerprint():
+    if SystemInfo.fingerprint:
+      return SystemInfo.fingerprint
+
+    info = collections.OrderedDict()
+    info["model"] = None
+    info["flags"] = []
+    cpuinfo = SystemInfo.ReadFile("/proc/cpuinfo") or ""
+    for line in cpuinfo.split("\n"):
+      key, _, value = line.partition(":")
+      key, value = key.strip(), value.strip()
+      if key in ["model name", "Processor"] and not info["model"]:
+        info["model"] = value
+      elif key in ["flags", "Features"] and not info["flags"]:
+        info["flags"] = sorted(value.split())
+      elif not line.strip() and info["model"]:
+        # The remaining processors have the same model and flags.
+        break
+
+    # The core topology of the online cpus.
+    cpuPath = "/sys/devices/system/cpu/"
+    cpus = SystemInfo.ParseCPUList(SystemInfo.ReadFile(cpuPath + "online"))
+    cores, sockets = set(), set()
+    for cpu in cpus:
+      topology = cpuPath + "cpu" + str(cpu) + "/topology/"
+      package = SystemInfo.ReadFile(topology + "physical_package_id")
+      cores.add((package, SystemInfo.ReadFile(topology + "core_id")))
+      sockets.add(package)
+    info["cpus"] = len(cpus) or int(SystemInfo.GetCPUCores())
+    info["cores"] = len(cores) or info["cpus"]
+    info["sockets"] = len(sockets) or 1
+
+    info["caches"] = []
+    cachePath = cpuPath + "cpu0/cache/"
+    if os.path.isdir(cachePath):
+      for index in sorted(os.listdir(cachePath)):
+        if index.startswith("index"):
+          info["caches"].append(" ".join(str(SystemInfo.ReadFile(cachePath +
+              index + "/" + entry)) for entry in ["level", "type", "size"]))
+
+    info["memory"] = None
+    meminfo = SystemInfo.ReadFile("/proc/meminfo") or ""
+    match = re.search(r"MemTotal:\s+(\d+) kB", meminfo)
+    if match:
+      info["memory"] = int(match.group(1)) // 1024
+
+    info["kernel"] = (SystemInfo.ReadFile("/proc/sys/kernel/osrelease") or
+        platform.release())
+    info["governor"] = SystemInfo.ReadFile(cpuPath +
+        "cpu0/cpufreq/scaling_governor")
+    info["distribution"] = None
+    match = re.search(r'^PRETTY_NAME="?([^"\n]*)"?', SystemInfo.ReadFile(
+        "/etc/os-release") or "", re.M)
+    if match:
+      info["distribution"] = match.group(1)
+    info["platform"] = platform.machine()
+    info["python"] = platform.python_version()
+    info["packages"] = SystemInfo.GetPackageVersions()
+
+    info["id"] = hashlib.sha1(json.dumps(dict((key, info[key]) for key in
+        SystemInfo.machineKeys), sort_keys=True).encode()).hexdigest()[:16]
+    SystemInfo.fingerprint = info
+    return info
+
   '''
   Get the available memory of this machine.
 
@@ -37,11 +178,8 @@ class SystemInfo(object):
   @staticmethod
   def GetMemory():
     if sys.platform.startswith("posix") or sys.platform.startswith("linux"):
-      cmd = "free -m"
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=True)
-
-      mem = s.decode().split('\n')[1].split()[1]
-      return str(float(mem) / 1024) + ' GB'
+      mem = SystemInfo.GetFingerprint()["memory"]
+      return str(float(mem) / 1024) + ' GB' if mem else 'N/A'
 
     elif sys.platform.startswith('darwin'):
       cmd = shlex.split("sysctl -n hw.memsize")
@@ -61,17 +199,7 @@ class SystemInfo(object):
   @staticmethod
   def GetCPUModel():
     if sys.platform.startswith('posix') or sys.platform.startswith('linux'):
-      cmd = 'cat /proc/cpuinfo'
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
-          shell=True).strip()
-      for line in s.decode().split("\n"):
-        if "model name" in line:
-          modelName = re.sub( ".*model name.*:", "", line, 1)
-          return modelName
-        elif "Processor" in line:
-          modelName = re.sub( ".*Processor.*:", "", line, 1)
-          return modelName
-      return 'N/A'
+      return SystemInfo.GetFingerprint()["model"] or 'N/A'
 
     elif sys.platform.startswith('darwin'):
       cmd = shlex.split("sysctl -n machdep.cpu.brand_string")
@@ -95,6 +223,10 @@ class SystemInfo(object):
   @staticmethod
   def GetDistribution():
     if sys.platform.startswith('posix') or sys.platform.startswith('linux'):
+      # The platform functions were removed in python 3.8.
+      if SystemInfo.GetFingerprint()["distribution"]:
+        return SystemInfo.GetFingerprint()["distribution"]
+
       try:
         osInfo = platform.linux_distribution()
         if len(osInfo) != 0:
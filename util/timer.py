@@ -22,6 +22,81 @@ from log import *
 import time
 from multiprocessing import Process, Queue
 
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+'''
+The resource usage of the last timed region (see Timer). The timeout function
+passes the usage of the timed process back to the calling process.
+'''
+lastUsage = None
+
+'''
+This class holds the resource usage of a timed region: the wall time and the
+process and children CPU time in seconds, the maximum resident set size of the
+process and of the waited-for children in kilobytes, the major and minor page
+faults and the voluntary and involuntary context switches.
+'''
+class Usage(dict):
+  pass
+
+'''
+Return the value of a monotonic high-resolution clock in nanoseconds. Unlike
+time.time() the clock isn't adjusted by NTP.
+'''
+def Clock():
+  if hasattr(time, "perf_counter_ns"):
+    return time.perf_counter_ns()
+  return int(time.perf_counter() * 1e9)
+
+'''
+Take a snapshot of the clock and the resource usage of the calling process and
+its waited-for children.
+
+@return Dictionary with the snapshot.
+'''
+def ResourceUsage():
+  snapshot = {"clock": Clock()}
+  if resource:
+    for who, prefix in [(resource.RUSAGE_SELF, ""),
+        (resource.RUSAGE_CHILDREN, "children_")]:
+      usage = resource.getrusage(who)
+      snapshot[prefix + "cpu"] = usage.ru_utime + usage.ru_stime
+      snapshot[prefix + "maxrss"] = usage.ru_maxrss
+      snapshot[prefix + "majflt"] = usage.ru_majflt
+      snapshot[prefix + "minflt"] = usage.ru_minflt
+      snapshot[prefix + "nvcsw"] = usage.ru_nvcsw
+      snapshot[prefix + "nivcsw"] = usage.ru_nivcsw
+  return snapshot
+
+'''
+Calculate the resource usage between two snapshots. The counters of the
+process and the children are summed up, the maximum resident set sizes are
+the high-water marks at the end of the region.
+
+@param start - The snapshot at the start of the region.
+@param end - The snapshot at the end of the region.
+@return The resource usage of the region.
+'''
+def UsageDifference(start, end):
+  usage = Usage(wall=(end["clock"] - start["clock"]) / 1e9)
+  if "cpu" in end:
+    usage["cpu"] = end["cpu"] - start["cpu"]
+    usage["children_cpu"] = end["children_cpu"] - start["children_cpu"]
+    usage["maxrss"] = end["maxrss"]
+    usage["children_maxrss"] = end["children_maxrss"]
+    for key in ["majflt", "minflt", "nvcsw", "nivcsw"]:
+      usage[key] = (end[key] - start[key] + end["children_" + key] -
+          start["children_" + key])
+  return usage
+
 '''
 This class implements three functions to measure the time.
 '''
@@ -31,30 +106,73 @@ class Timer(object):
   Start the timer.
   '''
   def __enter__(self):
-    self.__start = time.time()
+    self.__start = ResourceUsage()
 
   '''
   Stop the timer.
   '''
   def __exit__(self, type, value, traceback):
-    self.__finish = time.time()
+    global lastUsage
+    self.__usage = UsageDifference(self.__start, ResourceUsage())
+    lastUsage = self.__usage
 
   '''
   Return the elapsed time of the timer.
   '''
   def ElapsedTime(self):
-    return self.__finish - self.__start
+    return self.__usage["wall"]
+
+  '''
+  Return the resource usage of the timer.
+  '''
+  def Usage(self):
+    return self.__usage
+
+'''
+Run the timed functions in the calling process instead of starting a new
+process for every call. The warm worker processes (see worker.py) enable this
+and enforce the timeout themselves.
+'''
+runInline = False
+
+'''
+Run the timed function in the process started by the timeout function and send
+the resource usage of the timed region after the return value.
+
+@param fun - The timed function.
+@param q - The queue of the timeout function.
+'''
+def RunTimed(fun, q):
+  global lastUsage
+  lastUsage = None
+  try:
+    fun(q)
+  finally:
+    q.put(Usage(lastUsage or {}))
 
 '''
-This function implements a timeout for a function call.
+This function implements a timeout for a function call. The resource usage of
+the timed region of the function is stored in lastUsage.
 
 @param fun - Start the process with the given function.
 @param timeout - The time until the timeout. Default 9000 seconds.
 @return The return value of the process.
 '''
 def timeout(fun, timeout=9000):
+  global lastUsage
+  lastUsage = None
+
+  if runInline:
+    q = queue.Queue()
+    try:
+      fun(q)
+      r = q.get_nowait()
+    except Exception as e:
+      r = -1
+    return r
+
   q = Queue()
-  p = Process(target=fun, args=(q,))
+  p = Process(target=RunTimed, args=(fun, q))
   p.start()
   p.join(timeout)
 
@@ -70,4 +188,16 @@ def timeout(fun, timeout=9000):
       r = q.get(timeout=3)
     except Exception as e:
       r = -1
+
+    # The function didn't return a value, only the usage was sent.
+    usage = r
+    if not isinstance(r, Usage):
+      try:
+        usage = q.get(timeout=1)
+      except Exception as e:
+        usage = None
+    else:
+      r = -1
+
+    lastUsage = usage or None
     return r
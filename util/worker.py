@@ -0,0 +1,199 @@
+'''
+  @file worker.py
+  @author Marcus Edel
+
+  Implementation of the warm worker pool used to run the trials of the
+  in-process python scripts.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from loader import *
+from misc import *
+
+import timer
+import multiprocessing
+
+'''
+This class implements a long-lived worker process. The worker is forked from
+the process which already imported the script, so the library imports are
+preloaded, and the worker keeps the loaded datasets between the trials.
+'''
+class Worker(object):
+
+  '''
+  Start the worker process.
+
+  @param spawn - If True the worker starts a new interpreter instead of a fork,
+  so the libraries read the current thread settings on import.
+  '''
+  def __init__(self, spawn=False):
+    context = multiprocessing
+    if spawn and hasattr(multiprocessing, "get_context"):
+      context = multiprocessing.get_context("spawn")
+
+    self.connection, child = context.Pipe()
+    self.process = context.Process(target=Worker.Loop, args=(child,))
+    self.process.daemon = True
+    self.process.start()
+    child.close()
+
+  '''
+  The main loop of the worker process. Every task is a tuple of (script,
+  method, dataset, function, options, timeout) and the worker sends back the
+  return value of the called function and the resource usage of the timed
+  region.
+
+  @param connection - The connection to the scheduling process.
+  '''
+  @staticmethod
+  def Loop(connection):
+    # The timeout is enforced by the scheduling process.
+    timer.runInline = True
+    KeepDatasetsInMemory()
+
+    modules = {}
+    instance = None
+    instanceKey = None
+
+    while True:
+      try:
+        task = connection.recv()
+      except EOFError:
+        break
+
+      if task is None:
+        break
+
+      script, method, dataset, function, options, timeout = task
+      timer.lastUsage = None
+      try:
+        if script not in modules:
+          modules[script] = Loader.ImportModuleFromPath(script)
+
+        # Keep the instance of the current cell.
+        key = (script, method, str(dataset))
+        if key != instanceKey:
+          instance = None
+          instance = getattr(modules[script], method)(dataset,
+              timeout=timeout, verbose=False)
+          instanceKey = key
+
+        result = getattr(instance, function)(options)
+      except Exception as e:
+        Log.Fatal("Exception: " + str(e))
+        instanceKey = None
+        result = -1
+
+      connection.send((result, timer.lastUsage))
+
+  '''
+  Run a function of the script in the worker process. The resource usage of
+  the timed region is stored in timer.lastUsage.
+
+  @param task - The task tuple (see Loop).
+  @param timeout - The time until the worker is killed, zero means no timeout.
+  @return The return value of the function, -2 if the worker timed out or -1
+  if the worker died.
+  '''
+  def Call(self, task, timeout=0):
+    timer.lastUsage = None
+    self.connection.send(task)
+
+    if not self.connection.poll(timeout if timeout else None):
+      self.Kill()
+      Log.Warn("Script timed out after " + str(timeout) + " seconds")
+      return -2
+
+    try:
+      result, timer.lastUsage = self.connection.recv()
+      return result
+    except EOFError:
+      self.Kill()
+      Log.Fatal("Worker process died with exit code: " +
+          str(self.process.exitcode))
+      return -1
+
+  '''
+  Check if the worker process is alive.
+
+  @return True if the worker is alive otherwise False.
+  '''
+  def IsAlive(self):
+    return self.process.is_alive()
+
+  '''
+  Stop the worker process.
+  '''
+  def Stop(self):
+    if self.process.is_alive():
+      try:
+        self.connection.send(None)
+      except (IOError, OSError):
+        pass
+      self.process.join(3)
+    self.Kill()
+
+  '''
+  Kill the worker process.
+  '''
+  def Kill(self):
+    if self.process.is_alive():
+      self.process.terminate()
+    self.process.join()
+    self.connection.close()
+
+'''
+This class implements the pool of warm workers, one worker for every library
+and thread count. A worker which timed out or died is replaced on the next
+call.
+'''
+class WorkerPool(object):
+
+  workers = {}
+
+  '''
+  Run a function of the script in the worker of the given library.
+
+  @param library - The name of the library.
+  @param script - The path of the script.
+  @param method - The name of the method class.
+  @param dataset - The dataset passed to the method class.
+  @param function - The name of the function to call (e.g. 'RunTiming').
+  @param options - The options passed to the function.
+  @param timeout - The time until the timeout.
+  @param threads - The thread count of the worker. The worker is started
+  with the thread settings of the calling process, see Scheduler.SetThreads.
+  @return The return value of the function or a negative value if the
+  function was not successful.
+  '''
+  @staticmethod
+  def Call(library, script, method, dataset, function, options, timeout,
+      threads=None):
+    key = (library, threads)
+    worker = WorkerPool.workers.get(key)
+    if not worker or not worker.IsAlive():
+      worker = Worker(spawn=threads is not None)
+      WorkerPool.workers[key] = worker
+
+    return worker.Call((script, method, dataset, function, options, timeout),
+        timeout)
+
+  '''
+  Stop all workers.
+  '''
+  @staticmethod
+  def Shutdown():
+    for worker in WorkerPool.workers.values():
+      worker.Stop()
+    WorkerPool.workers = {}